@@ -20,6 +20,7 @@ django_asgi_app = get_asgi_application()
 # 导入 WebSocket 路由（在 Django 初始化之后）
 from SkillSpace.myapps.ai_demo import routing as ai_routing
 from SkillSpace.myapps.monitor import routing as monitor_routing
+from SkillSpace.myapps.resume import routing as resume_routing
 
 # ASGI 应用配置
 application = ProtocolTypeRouter(
@@ -28,7 +29,13 @@ application = ProtocolTypeRouter(
         "http": django_asgi_app,
         # WebSocket 请求使用 Channels
         "websocket": AllowedHostsOriginValidator(
-            AuthMiddlewareStack(URLRouter(ai_routing.websocket_urlpatterns + monitor_routing.websocket_urlpatterns))
+            AuthMiddlewareStack(
+                URLRouter(
+                    ai_routing.websocket_urlpatterns
+                    + monitor_routing.websocket_urlpatterns
+                    + resume_routing.websocket_urlpatterns
+                )
+            )
         ),
     }
 )
@@ -2,6 +2,7 @@
 import os  # <--- 必须导入 os
 
 from celery import Celery
+from celery.schedules import crontab
 from kombu import Queue  # 从 kombu 导入 Queue 类：kombu 是 Celery 底层依赖的消息传输库
 
 # 告诉 Celery Django 的配置文件在哪里
@@ -58,3 +59,12 @@ app.conf.worker_prefetch_multiplier = 1
 # 2.  Worker 最大任务数：每个 Worker 进程处理 N 个任务后自动重启（默认无限制）
 # 设为 50 是为了防止长期运行导致的内存泄漏（如 AI 模型加载后内存不释放、第三方库缓存累积）
 app.conf.worker_max_tasks_per_child = 50
+
+# 定时任务（需启动 celery beat）
+app.conf.beat_schedule = {
+    # 每天凌晨 3:30 归档长期无活动的对话会话
+    "archive-cold-chat-sessions": {
+        "task": "myapps.ai_demo.tasks.archive_cold_chat_sessions",
+        "schedule": crontab(hour=3, minute=30),
+    },
+}
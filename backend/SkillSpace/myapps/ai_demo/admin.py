@@ -3,7 +3,7 @@ from django.http import HttpResponseRedirect
 from django.urls import path, reverse
 from django.utils.html import format_html
 
-from .models import AITask, ChatRecord
+from .models import AITask, ChatArchive, ChatRecord
 
 
 @admin.register(AITask)
@@ -185,3 +185,25 @@ class ChatRecordAdmin(admin.ModelAdmin):
 
         # 重定向回列表页
         return HttpResponseRedirect(reverse("admin:ai_demo_chatrecord_changelist"))
+
+
+@admin.register(ChatArchive)
+class ChatArchiveAdmin(admin.ModelAdmin):
+    """归档会话管理（只读，回迁由打开会话时自动完成）"""
+
+    list_display = ["session_id", "user", "record_count", "first_message_at", "last_message_at", "archived_at"]
+    list_filter = ["archived_at"]
+    search_fields = ["session_id", "user__username"]
+    readonly_fields = [
+        "session_id",
+        "user",
+        "file_path",
+        "record_count",
+        "first_message_at",
+        "last_message_at",
+        "archived_at",
+    ]
+    ordering = ["-archived_at"]
+
+    def has_add_permission(self, request):
+        return False
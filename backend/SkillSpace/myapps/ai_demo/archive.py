@@ -0,0 +1,229 @@
+# ai_demo/archive.py
+"""
+对话记录归档
+
+ChatRecord 每轮对话写入两行且从不删除，表和 session_id 索引会无限增长。
+这里把长期无活动的"冷会话"整体移出主表：
+
+1. archive_cold_sessions(): 找出最后一条消息早于 N 天的会话，分批归档（由 Celery Beat 定时调用）
+2. archive_session(): 将单个会话流式写入 gzip 压缩的 JSONL 文件，再在事务中删除原记录
+3. restore_session(): 打开已归档会话时，从文件回迁到 ChatRecord（保留原 id 和时间），
+   对调用方透明，游标分页 / 检索 / 上下文拼接照常工作
+"""
+
+import gzip
+import json
+import logging
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ChatArchive, ChatRecord
+from .search import build_search_text
+
+logger = logging.getLogger(__name__)
+
+# 归档字段（写入 JSONL 的每行内容）
+ARCHIVE_FIELDS = ("id", "session_id", "user_id", "role", "content", "is_hidden", "created_at")
+
+# 写入 / 回迁时每批处理的记录数
+CHUNK_SIZE = 1000
+
+
+def get_archive_root():
+    """归档文件根目录"""
+    return getattr(settings, "CHAT_ARCHIVE_ROOT", os.path.join(settings.BASE_DIR, "archives", "chat"))
+
+
+def _archive_path(session_id, when):
+    """归档文件相对路径：按归档月份分目录"""
+    safe_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in session_id)
+    return os.path.join(when.strftime("%Y"), when.strftime("%m"), f"{safe_id}.jsonl.gz")
+
+
+def read_archive(archive):
+    """逐行读取归档文件（导出接口也用它读取已归档会话）"""
+    full_path = os.path.join(get_archive_root(), archive.file_path)
+    with gzip.open(full_path, "rt", encoding="utf-8") as fp:
+        for line in fp:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _serialize(record):
+    row = {field: getattr(record, field) for field in ARCHIVE_FIELDS}
+    row["created_at"] = record.created_at.isoformat()
+    return json.dumps(row, ensure_ascii=False)
+
+
+def find_cold_sessions(cutoff, limit):
+    """
+    查找最后一条消息早于 cutoff 的会话
+
+    按 session_id 分组聚合，可走 (session_id, created_at) 索引。
+    """
+    return list(
+        ChatRecord.objects.values("session_id")
+        .annotate(last_at=Max("created_at"))
+        .filter(last_at__lt=cutoff)
+        .order_by("last_at")
+        .values_list("session_id", flat=True)[:limit]
+    )
+
+
+def archive_session(session_id):
+    """
+    归档单个会话
+
+    先写临时文件并原子重命名，文件落盘后才在事务中删除数据库记录；
+    若该会话已有归档（回迁后又变冷），新文件会合并旧归档内容。
+
+    Returns:
+        归档的记录条数（会话不存在时为 0）
+    """
+    queryset = ChatRecord.objects.filter(session_id=session_id).order_by("created_at", "id")
+    existing = ChatArchive.objects.filter(session_id=session_id).first()
+
+    now = timezone.now()
+    relative_path = _archive_path(session_id, now)
+    full_path = os.path.join(get_archive_root(), relative_path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    tmp_path = f"{full_path}.tmp"
+
+    count = 0
+    max_id = 0
+    first_at = last_at = None
+    user_id = None
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as fp:
+        if existing:
+            for row in read_archive(existing):
+                fp.write(json.dumps(row, ensure_ascii=False) + "\n")
+                count += 1
+                first_at = first_at or parse_datetime(row["created_at"])
+                user_id = row["user_id"] or user_id
+        for record in queryset.iterator(chunk_size=CHUNK_SIZE):
+            fp.write(_serialize(record) + "\n")
+            count += 1
+            max_id = max(max_id, record.id)
+            first_at = first_at or record.created_at
+            last_at = record.created_at
+            user_id = record.user_id or user_id
+
+    if not max_id:
+        # 没有需要归档的新记录
+        os.remove(tmp_path)
+        return 0
+
+    os.replace(tmp_path, full_path)
+
+    try:
+        with transaction.atomic():
+            ChatArchive.objects.update_or_create(
+                session_id=session_id,
+                defaults={
+                    "user_id": user_id,
+                    "file_path": relative_path,
+                    "record_count": count,
+                    "first_message_at": first_at,
+                    "last_message_at": last_at,
+                },
+            )
+            # 只删除已写入文件的记录，归档期间新写入的消息保留在主表
+            queryset.filter(id__lte=max_id).delete()
+    except Exception:
+        if not existing or existing.file_path != relative_path:
+            os.remove(full_path)
+        raise
+
+    if existing and existing.file_path != relative_path:
+        try:
+            os.remove(os.path.join(get_archive_root(), existing.file_path))
+        except OSError as e:
+            logger.warning(f"删除旧归档文件失败: {existing.file_path} - {e}")
+
+    return count
+
+
+def archive_cold_sessions(days=None, max_sessions=None):
+    """
+    归档冷会话（Celery Beat 定时任务入口）
+
+    Args:
+        days: 超过多少天无新消息视为冷会话（默认 settings.CHAT_ARCHIVE_AFTER_DAYS）
+        max_sessions: 单次最多归档的会话数（默认 settings.CHAT_ARCHIVE_SESSIONS_PER_RUN）
+
+    Returns:
+        {"sessions": 归档会话数, "records": 归档记录数, "failed": 失败会话数}
+    """
+    days = days or getattr(settings, "CHAT_ARCHIVE_AFTER_DAYS", 90)
+    max_sessions = max_sessions or getattr(settings, "CHAT_ARCHIVE_SESSIONS_PER_RUN", 500)
+    cutoff = timezone.now() - timedelta(days=days)
+
+    stats = {"sessions": 0, "records": 0, "failed": 0}
+    for session_id in find_cold_sessions(cutoff, max_sessions):
+        try:
+            stats["records"] += archive_session(session_id)
+            stats["sessions"] += 1
+        except Exception as e:
+            stats["failed"] += 1
+            logger.error(f"归档会话失败: {session_id} - {e}")
+
+    logger.info(f"对话归档完成: {stats}")
+    return stats
+
+
+def restore_session(session_id):
+    """
+    若会话已归档，将其回迁到 ChatRecord（保留原 id 与创建时间）
+
+    Returns:
+        回迁的记录条数（会话未归档时为 0）
+    """
+    archive = ChatArchive.objects.filter(session_id=session_id).first()
+    if archive is None:
+        return 0
+
+    file_path = os.path.join(get_archive_root(), archive.file_path)
+    count = 0
+    with transaction.atomic():
+        # 加锁防止并发请求重复回迁
+        archive = ChatArchive.objects.select_for_update().filter(pk=archive.pk).first()
+        if archive is None:
+            return 0
+
+        batch = []
+        for row in read_archive(archive):
+            row["created_at"] = parse_datetime(row["created_at"])
+            # 旧版本写入的匿名记录归属到会话所属用户
+            row["user_id"] = row["user_id"] or archive.user_id
+            batch.append(ChatRecord(search_text=build_search_text(row["content"]), **row))
+            if len(batch) >= CHUNK_SIZE:
+                count += _insert_batch(batch)
+                batch = []
+        if batch:
+            count += _insert_batch(batch)
+
+        archive.delete()
+
+    try:
+        os.remove(file_path)
+    except OSError as e:
+        logger.warning(f"删除已回迁的归档文件失败: {archive.file_path} - {e}")
+
+    logger.info(f"归档会话已回迁: {session_id}, {count} 条")
+    return count
+
+
+def _insert_batch(records):
+    # bulk_create 会触发 auto_now_add 覆盖创建时间，插入后再写回原始时间
+    created_at = [record.created_at for record in records]
+    ChatRecord.objects.bulk_create(records, ignore_conflicts=True)
+    for record, value in zip(records, created_at):
+        record.created_at = value
+    ChatRecord.objects.bulk_update(records, ["created_at"])
+    return len(records)
@@ -0,0 +1,220 @@
+# ai_demo/export.py
+"""
+对话记录流式导出
+
+导出接口和 export_chat_records 管理命令共用这里的生成器：
+- 查询使用 values_list().iterator(chunk_size=...)，不实例化模型、不缓存结果集，
+  PostgreSQL 下走服务端游标，内存占用与导出行数无关；
+- 已归档的会话（见 archive.py）从归档文件逐行读取，排在数据库记录之后输出，不回迁；
+- 逐行生成 NDJSON / CSV 文本，可选再经过增量 gzip 压缩；
+- ASGI（daphne）下 StreamingHttpResponse 会把同步迭代器整体读入列表后才发送，
+  导出接口因此改用 aiter_chunks 包装成异步迭代器，每次在线程中取一批输出；管理命令和 WSGI 仍直接使用同步生成器。
+"""
+
+import csv
+import json
+import zlib
+from datetime import datetime, time
+from itertools import chain, islice
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from asgiref.sync import sync_to_async
+
+from .archive import read_archive
+from .models import ChatArchive, ChatRecord
+
+# 导出字段（列顺序）
+EXPORT_FIELDS = ("id", "session_id", "user", "role", "content", "is_hidden", "created_at")
+
+# 支持的导出格式
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# 每次从数据库读取的行数
+CHUNK_SIZE = 2000
+
+# ASGI 下每次切换到同步线程取出的输出块数
+ASYNC_BATCH_SIZE = 500
+
+
+def parse_bound(value, end=False):
+    """
+    解析时间范围参数，支持 "YYYY-MM-DD" 和 ISO 8601 时间
+
+    纯日期作为结束时间时取当天 23:59:59.999999。
+
+    Raises:
+        ValueError: 格式无法解析
+    """
+    if not value:
+        return None
+    dt = parse_datetime(value)
+    if dt is None:
+        d = parse_date(value)
+        if d is None:
+            raise ValueError(f"无法解析时间: {value}")
+        dt = datetime.combine(d, time.max if end else time.min)
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def build_export_queryset(user=None, session_id=None, start=None, end=None, include_hidden=False):
+    """
+    构建导出查询集（按 id 正序，保证导出结果稳定）
+
+    Args:
+        user: 只导出该用户的记录（None 表示不限）
+        session_id: 只导出该会话
+        start / end: 创建时间范围（datetime）
+        include_hidden: 是否包含已隐藏记录
+    """
+    queryset = ChatRecord.objects.all()
+    if user is not None:
+        queryset = queryset.filter(user=user)
+    if session_id:
+        queryset = queryset.filter(session_id=session_id)
+    if start:
+        queryset = queryset.filter(created_at__gte=start)
+    if end:
+        queryset = queryset.filter(created_at__lte=end)
+    if not include_hidden:
+        queryset = queryset.filter(is_hidden=False)
+    return queryset.order_by("id")
+
+
+def iter_rows(queryset, chunk_size=CHUNK_SIZE):
+    """逐行读取导出字段，返回 dict"""
+    columns = ("id", "session_id", "user__username", "role", "content", "is_hidden", "created_at")
+    for values in queryset.values_list(*columns).iterator(chunk_size=chunk_size):
+        row = dict(zip(EXPORT_FIELDS, values))
+        row["created_at"] = timezone.localtime(row["created_at"]).isoformat()
+        yield row
+
+
+def iter_archive_rows(user_id=None, session_id=None, start=None, end=None, include_hidden=False):
+    """
+    逐行读取已归档会话中符合条件的记录（格式与 iter_rows 相同）
+
+    归档文件中没有用户的记录归属到会话所属用户（ChatArchive.user）。
+
+    Args:
+        user_id: 只导出该用户的记录（None 表示不限）
+        其余参数同 build_export_queryset
+    """
+    archives = ChatArchive.objects.select_related("user").order_by("id")
+    if user_id is not None:
+        archives = archives.filter(user_id=user_id)
+    if session_id:
+        archives = archives.filter(session_id=session_id)
+    if start:
+        archives = archives.filter(last_message_at__gte=start)
+    if end:
+        archives = archives.filter(first_message_at__lte=end)
+
+    usernames = {}
+    for archive in archives.iterator():
+        if archive.user_id:
+            usernames[archive.user_id] = archive.user.username
+        for row in read_archive(archive):
+            owner = row["user_id"] or archive.user_id
+            created_at = parse_datetime(row["created_at"])
+            if user_id is not None and owner != user_id:
+                continue
+            if (start and created_at < start) or (end and created_at > end):
+                continue
+            if row["is_hidden"] and not include_hidden:
+                continue
+            if owner and owner not in usernames:
+                usernames[owner] = get_user_model().objects.filter(pk=owner).values_list("username", flat=True).first()
+            yield {
+                "id": row["id"],
+                "session_id": row["session_id"],
+                "user": usernames.get(owner),
+                "role": row["role"],
+                "content": row["content"],
+                "is_hidden": row["is_hidden"],
+                "created_at": timezone.localtime(created_at).isoformat(),
+            }
+
+
+def iter_ndjson(rows):
+    """生成 NDJSON 文本（每行一个 JSON 对象）"""
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+class _Echo:
+    """csv.writer 的伪文件对象：write() 直接返回写入内容"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    """生成 CSV 文本（首行为表头，带 BOM 方便 Excel 识别 UTF-8）"""
+    writer = csv.writer(_Echo())
+    yield "\ufeff" + writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+def iter_export(queryset, export_format="ndjson", chunk_size=CHUNK_SIZE, archived=None):
+    """
+    按格式生成导出文本
+
+    Args:
+        queryset: build_export_queryset 的结果
+        archived: 已归档会话的导出行（iter_archive_rows），排在数据库记录之后
+    """
+    rows = chain(iter_rows(queryset, chunk_size), archived or ())
+    if export_format == "csv":
+        return iter_csv(rows)
+    return iter_ndjson(rows)
+
+
+async def aiter_chunks(chunks, batch_size=ASYNC_BATCH_SIZE):
+    """
+    把同步输出流包装成异步迭代器（ASGI 下使用）
+
+    每次通过 sync_to_async 在同步线程中取出 batch_size 块（数据库游标始终在同一线程中使用），
+    内存占用只与 batch_size 有关。
+    """
+    iterator = iter(chunks)
+    take = sync_to_async(lambda: list(islice(iterator, batch_size)))
+    while True:
+        batch = await take()
+        if not batch:
+            return
+        for chunk in batch:
+            yield chunk
+
+
+def gzip_stream(chunks, level=6, flush_size=64 * 1024):
+    """
+    增量 gzip 压缩
+
+    累积约 flush_size 字节的输入再交给压缩器，避免逐行压缩产生大量碎片输出。
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 输出 gzip 格式
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        buffer.append(data)
+        buffered += len(data)
+        if buffered >= flush_size:
+            out = compressor.compress(b"".join(buffer))
+            buffer, buffered = [], 0
+            if out:
+                yield out
+    if buffer:
+        out = compressor.compress(b"".join(buffer))
+        if out:
+            yield out
+    yield compressor.flush()
@@ -0,0 +1,70 @@
+# ai_demo/management/commands/export_chat_records.py
+"""
+Django管理命令：流式导出对话记录
+使用方法：
+    python manage.py export_chat_records --format ndjson --output chats.ndjson
+    python manage.py export_chat_records --format csv --gzip --user alice --start 2025-01-01 -o chats.csv.gz
+"""
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ai_demo.export import EXPORT_FORMATS, build_export_queryset, gzip_stream, iter_archive_rows, iter_export, parse_bound
+from auth_system.models import User
+
+
+class Command(BaseCommand):
+    help = "流式导出对话记录（NDJSON / CSV，可选 gzip），内存占用与记录数无关"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="ndjson", help="导出格式")
+        parser.add_argument("--gzip", action="store_true", help="输出 gzip 压缩流")
+        parser.add_argument("-o", "--output", help="输出文件路径（默认输出到标准输出）")
+        parser.add_argument("--user", help="只导出指定用户名的记录")
+        parser.add_argument("--session", help="只导出指定会话")
+        parser.add_argument("--start", help="开始时间（YYYY-MM-DD 或 ISO 8601）")
+        parser.add_argument("--end", help="结束时间（YYYY-MM-DD 或 ISO 8601）")
+        parser.add_argument("--include-hidden", action="store_true", help="包含已隐藏的记录")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="每次从数据库读取的行数")
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user"]:
+            user = User.objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"用户不存在: {options['user']}")
+
+        try:
+            start = parse_bound(options["start"])
+            end = parse_bound(options["end"], end=True)
+        except ValueError as e:
+            raise CommandError(str(e)) from e
+
+        filters = {
+            "session_id": options["session"],
+            "start": start,
+            "end": end,
+            "include_hidden": options["include_hidden"],
+        }
+        queryset = build_export_queryset(user=user, **filters)
+        # 已归档的会话从归档文件读取，排在数据库记录之后
+        archived = iter_archive_rows(user_id=user.pk if user else None, **filters)
+
+        stream = iter_export(queryset, options["format"], chunk_size=options["chunk_size"], archived=archived)
+        if options["gzip"]:
+            chunks = gzip_stream(stream)
+        else:
+            chunks = (chunk.encode("utf-8") for chunk in stream)
+
+        output = open(options["output"], "wb") if options["output"] else sys.stdout.buffer
+        written = 0
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if options["output"]:
+                output.close()
+
+        if options["output"]:
+            self.stderr.write(self.style.SUCCESS(f"✅ 导出完成: {options['output']} ({written} 字节)"))
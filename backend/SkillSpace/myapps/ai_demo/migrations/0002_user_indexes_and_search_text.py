@@ -0,0 +1,65 @@
+# Generated by Django 4.2.27 on 2026-10-19 02:34
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("ai_demo", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="aitask",
+            name="user",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="发起任务的用户（可为空，支持匿名）",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="ai_tasks",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="chatrecord",
+            name="search_text",
+            field=models.TextField(blank=True, default="", editable=False, help_text="全文检索分词文本（自动生成）"),
+        ),
+        migrations.AddField(
+            model_name="chatrecord",
+            name="user",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="对话用户（可为空，支持匿名）",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="chat_records",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="aitask",
+            index=models.Index(fields=["user", "-created_at"], name="ai_demo_ait_user_id_ca0589_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="aitask",
+            index=models.Index(fields=["session_id", "-created_at"], name="ai_demo_ait_session_b77dbd_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="aitask",
+            index=models.Index(fields=["status", "-created_at"], name="ai_demo_ait_status_e6e15f_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="chatrecord",
+            index=models.Index(fields=["user", "-created_at"], name="ai_demo_cha_user_id_4129f8_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="chatrecord",
+            index=models.Index(fields=["session_id", "created_at"], name="ai_demo_cha_session_704ef4_idx"),
+        ),
+    ]
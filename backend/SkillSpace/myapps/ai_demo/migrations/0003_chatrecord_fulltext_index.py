@@ -0,0 +1,81 @@
+# 对话记录全文检索索引
+# - 回填已有记录的 search_text
+# - PostgreSQL: 在 to_tsvector('simple', search_text) 上创建 GIN 函数索引
+# - SQLite: 创建 FTS5 外部内容表及同步触发器
+
+from django.db import migrations
+
+FTS_TABLE = "ai_demo_chatrecord_fts"
+GIN_INDEX_NAME = "ai_demo_chatrecord_fts_gin"
+
+SQLITE_FORWARD = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "search_text, content='ai_demo_chatrecord', content_rowid='id', tokenize='unicode61')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON ai_demo_chatrecord BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON ai_demo_chatrecord BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF search_text ON ai_demo_chatrecord BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def _gin_index():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    return GinIndex(SearchVector("search_text", config="simple"), name=GIN_INDEX_NAME)
+
+
+def backfill_search_text(apps, schema_editor):
+    from ai_demo.search import build_search_text
+
+    ChatRecord = apps.get_model("ai_demo", "ChatRecord")
+    batch = []
+    for record in ChatRecord.objects.only("id", "content").iterator(chunk_size=2000):
+        record.search_text = build_search_text(record.content)
+        batch.append(record)
+        if len(batch) >= 2000:
+            ChatRecord.objects.bulk_update(batch, ["search_text"])
+            batch = []
+    if batch:
+        ChatRecord.objects.bulk_update(batch, ["search_text"])
+
+
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.add_index(apps.get_model("ai_demo", "ChatRecord"), _gin_index())
+    elif vendor == "sqlite":
+        for sql in SQLITE_FORWARD:
+            schema_editor.execute(sql)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.remove_index(apps.get_model("ai_demo", "ChatRecord"), _gin_index())
+    elif vendor == "sqlite":
+        for sql in SQLITE_BACKWARD:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai_demo", "0002_user_indexes_and_search_text"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
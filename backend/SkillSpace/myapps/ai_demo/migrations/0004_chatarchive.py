@@ -0,0 +1,45 @@
+# Generated by Django 4.2.27 on 2026-10-19 02:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("ai_demo", "0003_chatrecord_fulltext_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChatArchive",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("session_id", models.CharField(help_text="会话ID", max_length=100, unique=True)),
+                ("file_path", models.CharField(help_text="归档文件路径（相对 CHAT_ARCHIVE_ROOT）", max_length=500)),
+                ("record_count", models.PositiveIntegerField(default=0, help_text="归档记录条数")),
+                ("first_message_at", models.DateTimeField(blank=True, help_text="会话第一条消息时间", null=True)),
+                ("last_message_at", models.DateTimeField(blank=True, help_text="会话最后一条消息时间", null=True)),
+                ("archived_at", models.DateTimeField(auto_now=True, help_text="归档时间")),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="会话所属用户（取会话中最后一条有用户的记录）",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="chat_archives",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "归档会话",
+                "verbose_name_plural": "归档会话",
+                "ordering": ["-archived_at"],
+                "indexes": [models.Index(fields=["user", "-last_message_at"], name="ai_demo_cha_user_id_06f161_idx")],
+            },
+        ),
+    ]
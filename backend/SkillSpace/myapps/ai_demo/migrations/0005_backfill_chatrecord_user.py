@@ -0,0 +1,36 @@
+# 回填对话记录的用户
+# /api/ai/qwen/ 之前写入的 ChatRecord 没有 user，按用户检索 / 导出时查不到。
+# 同一会话中只要有一条记录带用户（如 /api/ai/qwen/async/ 写入的记录），就把该会话的匿名记录归属到该用户
+# （取会话中最后一条带用户的记录）；整个会话都没有用户的记录保持匿名。
+
+from django.db import migrations
+
+CHUNK_SIZE = 500
+
+
+def backfill_chat_record_users(apps, schema_editor):
+    ChatRecord = apps.get_model("ai_demo", "ChatRecord")
+    sessions = list(ChatRecord.objects.filter(user__isnull=True).values_list("session_id", flat=True).distinct())
+    for i in range(0, len(sessions), CHUNK_SIZE):
+        chunk = sessions[i : i + CHUNK_SIZE]
+        owners = {}
+        rows = (
+            ChatRecord.objects.filter(session_id__in=chunk, user__isnull=False)
+            .order_by("created_at", "id")
+            .values_list("session_id", "user_id")
+        )
+        for session_id, user_id in rows:
+            owners[session_id] = user_id
+        for session_id, user_id in owners.items():
+            ChatRecord.objects.filter(session_id=session_id, user__isnull=True).update(user_id=user_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai_demo", "0004_chatarchive"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_chat_record_users, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,8 @@
 from django.conf import settings
 from django.db import models
 
+from .search import build_search_text
+
 # Create your models here.
 
 
@@ -67,6 +69,7 @@ class ChatRecord(models.Model):
     role = models.CharField(max_length=20, choices=(("user", "User"), ("assistant", "AI")), help_text="角色")
     content = models.TextField(help_text="对话内容")
     is_hidden = models.BooleanField(default=False, db_index=True, help_text="是否隐藏此记录（软删除）")
+    search_text = models.TextField(blank=True, default="", editable=False, help_text="全文检索分词文本（自动生成）")
     created_at = models.DateTimeField(auto_now_add=True, help_text="创建时间")
 
     class Meta:
@@ -81,3 +84,43 @@ class ChatRecord(models.Model):
     def __str__(self):
         username = self.user.username if self.user else "匿名用户"
         return f"{username} - {self.role} - {self.content[:30]}..."
+
+    def save(self, *args, **kwargs):
+        # 保存时同步生成全文检索分词文本
+        self.search_text = build_search_text(self.content)
+        super().save(*args, **kwargs)
+
+
+class ChatArchive(models.Model):
+    """
+    已归档会话索引表
+
+    冷会话的对话记录被移出 ChatRecord，压缩写入 JSONL 文件（每个会话一个 .jsonl.gz），
+    本表记录文件位置和统计信息，打开归档会话时据此透明回迁。
+    """
+
+    session_id = models.CharField(max_length=100, unique=True, help_text="会话ID")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="chat_archives",
+        help_text="会话所属用户（取会话中最后一条有用户的记录）",
+    )
+    file_path = models.CharField(max_length=500, help_text="归档文件路径（相对 CHAT_ARCHIVE_ROOT）")
+    record_count = models.PositiveIntegerField(default=0, help_text="归档记录条数")
+    first_message_at = models.DateTimeField(null=True, blank=True, help_text="会话第一条消息时间")
+    last_message_at = models.DateTimeField(null=True, blank=True, help_text="会话最后一条消息时间")
+    archived_at = models.DateTimeField(auto_now=True, help_text="归档时间")
+
+    class Meta:
+        ordering = ["-archived_at"]
+        verbose_name = "归档会话"
+        verbose_name_plural = "归档会话"
+        indexes = [
+            models.Index(fields=["user", "-last_message_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.session_id[:12]}... ({self.record_count} 条)"
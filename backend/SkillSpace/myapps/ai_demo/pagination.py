@@ -0,0 +1,123 @@
+# ai_demo/pagination.py
+"""
+游标（Keyset）分页工具
+
+基于 (created_at, id) 组合键翻页，避免 OFFSET 深翻页时的全表扫描；
+游标是对 "created_at|id" 的 urlsafe base64 编码，对前端不透明。
+"""
+
+import base64
+import binascii
+from datetime import datetime
+
+from django.db import connection
+from django.db.models import Q
+
+# 每页默认数量 / 最大数量（防止一次请求拉取整表）
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# 计数上限：超过该值时只返回估算值，不再执行精确 COUNT(*)
+COUNT_CAP = 1000
+
+
+class InvalidCursor(ValueError):
+    """游标格式非法"""
+
+
+def parse_page_size(raw, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """
+    解析每页数量参数，非法值回退到默认值，并限制在 [1, maximum] 区间
+    """
+    try:
+        size = int(raw)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def encode_cursor(created_at, pk):
+    """将 (created_at, id) 编码为不透明游标字符串"""
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    解析游标字符串
+
+    Returns:
+        (created_at, id) 元组
+
+    Raises:
+        InvalidCursor: 游标无法解析
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        created_at_str, pk_str = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at_str), int(pk_str)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursor(f"无效的游标: {cursor}") from e
+
+
+def keyset_filter(queryset, cursor, descending=True):
+    """
+    按游标过滤查询集
+
+    descending=True 时返回游标之前（更早）的记录，否则返回游标之后（更新）的记录。
+    过滤条件可以直接命中 (xxx, -created_at) 复合索引。
+    """
+    created_at, pk = decode_cursor(cursor)
+    if descending:
+        condition = Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+    else:
+        condition = Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+    return queryset.filter(condition)
+
+
+def paginate_keyset(queryset, page_size, descending=True):
+    """
+    取一页数据（多取一条用于判断是否还有下一页）
+
+    Returns:
+        (records, next_cursor)，没有更多数据时 next_cursor 为 None
+    """
+    if descending:
+        queryset = queryset.order_by("-created_at", "-id")
+    else:
+        queryset = queryset.order_by("created_at", "id")
+
+    records = list(queryset[: page_size + 1])
+    next_cursor = None
+    if len(records) > page_size:
+        records = records[:page_size]
+        last = records[-1]
+        next_cursor = encode_cursor(last.created_at, last.pk)
+    return records, next_cursor
+
+
+def estimate_count(queryset, cap=COUNT_CAP):
+    """
+    廉价的总数估算
+
+    - 未过滤的 PostgreSQL 大表：直接读取 pg_class.reltuples 统计值
+    - 其他情况：最多数到 cap 条（COUNT 子查询带 LIMIT），超出即视为估算值
+
+    Returns:
+        (count, is_estimate)
+    """
+    if connection.vendor == "postgresql" and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] > cap:
+            return int(row[0]), True
+
+    count = queryset.order_by()[: cap + 1].count()
+    if count > cap:
+        return cap, True
+    return count, False
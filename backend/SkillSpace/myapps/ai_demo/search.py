@@ -0,0 +1,161 @@
+# ai_demo/search.py
+"""
+对话记录全文检索
+
+分词策略（中英文混合）：
+- 连续的中日韩字符切分为二元组（bigram），并追加每段的最后一个单字，
+  这样任意单字都是某个词元的前缀，单字查询可用前缀匹配命中；
+- 其他字母数字串按单词切分并转小写。
+分词结果存入 ChatRecord.search_text（空格分隔），数据库只需按空格切词：
+
+- PostgreSQL: to_tsvector('simple', search_text) + GIN 函数索引
+- SQLite (开发环境): FTS5 外部内容表 ai_demo_chatrecord_fts + 触发器同步
+- 其他数据库: 退化为 icontains 模糊匹配
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+
+# SQLite FTS5 虚拟表名称（由迁移创建）
+FTS_TABLE = "ai_demo_chatrecord_fts"
+
+_CJK = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_CJK_RE = re.compile(f"[{_CJK}]+")
+_SEGMENT_RE = re.compile(f"[{_CJK}]+|[^\\W_{_CJK}]+")
+
+
+def _segments(text):
+    """切分出中文连续段和单词段"""
+    return _SEGMENT_RE.findall(text or "")
+
+
+def _cjk_tokens(segment):
+    """中文段切分为二元组，并追加末尾单字"""
+    if len(segment) == 1:
+        return [segment]
+    return [segment[i : i + 2] for i in range(len(segment) - 1)] + [segment[-1]]
+
+
+def tokenize(text):
+    """将文本切分为检索词元列表"""
+    tokens = []
+    for segment in _segments(text):
+        if _CJK_RE.fullmatch(segment):
+            tokens.extend(_cjk_tokens(segment))
+        else:
+            tokens.append(segment.lower())
+    return tokens
+
+
+def build_search_text(content):
+    """生成写入 search_text 字段的分词文本"""
+    return " ".join(tokenize(content))
+
+
+def _query_terms(query):
+    """
+    将用户查询转换为 (词元, 是否前缀匹配) 列表
+
+    中文段只取二元组（不含末尾单字），单字和英文单词使用前缀匹配。
+    """
+    terms = []
+    for segment in _segments(query):
+        if _CJK_RE.fullmatch(segment):
+            if len(segment) == 1:
+                terms.append((segment, True))
+            else:
+                terms.extend((segment[i : i + 2], False) for i in range(len(segment) - 1))
+        else:
+            terms.append((segment.lower(), True))
+    # 去重并保持顺序
+    return list(dict.fromkeys(terms))
+
+
+def _postgres_search(queryset, terms):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+    raw = " & ".join(f"'{token}'{':*' if prefix else ''}" for token, prefix in terms)
+    query = SearchQuery(raw, config="simple", search_type="raw")
+    # 表达式需与迁移中创建的 GIN 函数索引保持一致
+    vector = SearchVector("search_text", config="simple")
+    return (
+        queryset.annotate(search_vector=vector)
+        .filter(search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by("-rank", "-created_at")
+    )
+
+
+def _sqlite_search(queryset, terms):
+    match = " AND ".join(f'"{token}"{"*" if prefix else ""}' for token, prefix in terms)
+    table = queryset.model._meta.db_table
+    matched_ids = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,))
+    # bm25() 越小越相关，取负数使 rank 越大越相关
+    rank = RawSQL(
+        f"SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id",
+        (match,),
+    )
+    return queryset.filter(id__in=matched_ids).annotate(rank=rank).order_by("-rank", "-created_at")
+
+
+def _fallback_search(queryset, query):
+    condition = Q()
+    for segment in _segments(query):
+        condition &= Q(content__icontains=segment)
+    return queryset.filter(condition).annotate(rank=RawSQL("NULL", ())).order_by("-created_at")
+
+
+def search_chat_records(queryset, query):
+    """
+    在给定查询集范围内执行全文检索
+
+    Args:
+        queryset: 已按权限过滤的 ChatRecord 查询集
+        query: 用户输入的检索词
+
+    Returns:
+        按相关度降序排列、带 rank 注解的查询集；查询词为空时返回空查询集
+    """
+    terms = _query_terms(query)
+    if not terms:
+        return queryset.none()
+
+    if connection.vendor == "postgresql":
+        return _postgres_search(queryset, terms)
+    if connection.vendor == "sqlite":
+        return _sqlite_search(queryset, terms)
+    return _fallback_search(queryset, query)
+
+
+def highlight(content, query, radius=60):
+    """
+    生成带 <mark> 高亮的摘要片段（HTML 已转义）
+
+    以第一个命中位置为中心截取前后 radius 个字符。
+    """
+    content = content or ""
+    segments = sorted({s for s in _segments(query)}, key=len, reverse=True)
+    if not segments:
+        return escape(content[: radius * 2])
+
+    pattern = re.compile("|".join(re.escape(s) for s in segments), re.IGNORECASE)
+    first = pattern.search(content)
+    start = max(0, first.start() - radius) if first else 0
+    end = min(len(content), start + radius * 2 + (first.end() - first.start() if first else 0))
+    snippet = content[start:end]
+
+    parts = []
+    last = 0
+    for m in pattern.finditer(snippet):
+        parts.append(escape(snippet[last : m.start()]))
+        parts.append(f"<mark>{escape(m.group())}</mark>")
+        last = m.end()
+    parts.append(escape(snippet[last:]))
+
+    prefix = "..." if start > 0 else ""
+    suffix = "..." if end < len(content) else ""
+    return prefix + "".join(parts) + suffix
@@ -109,3 +109,16 @@ def qwen_chat_task(self, prompt, resume_id=None):
     except Exception as e:
         print(f"❌ [Task Error] {str(e)}")
         return {"status": "error", "error": str(e)}
+
+
+@shared_task(name="myapps.ai_demo.tasks.archive_cold_chat_sessions")
+def archive_cold_chat_sessions(days=None, max_sessions=None):
+    """
+    归档冷会话（由 Celery Beat 每天凌晨触发）
+
+    将长期无新消息的会话压缩写入 JSONL 文件并从 ChatRecord 中移除，
+    详见 ai_demo/archive.py。
+    """
+    from .archive import archive_cold_sessions
+
+    return archive_cold_sessions(days=days, max_sessions=max_sessions)
@@ -0,0 +1,83 @@
+# ai_demo/tests.py
+"""
+AI Demo 回归测试
+
+运行：cd backend && python manage.py test ai_demo
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from asgiref.sync import async_to_sync
+from auth_system.models import User
+
+from .export import aiter_chunks
+from .models import ChatArchive, ChatRecord
+
+
+class AsyncExportStreamTests(SimpleTestCase):
+    def test_aiter_chunks_pulls_one_batch_at_a_time(self):
+        """ASGI 下按批从同步生成器取数据，而不是一次读完"""
+        pulled = []
+
+        def chunks():
+            for i in range(10000):
+                pulled.append(i)
+                yield f"{i}\n"
+
+        async def first_chunk():
+            stream = aiter_chunks(chunks(), batch_size=100)
+            chunk = await stream.__anext__()
+            await stream.aclose()
+            return chunk
+
+        self.assertEqual(async_to_sync(first_chunk)(), "0\n")
+        self.assertEqual(len(pulled), 100)
+
+
+class ChatExportAPITests(TestCase):
+    def setUp(self):
+        (self.user,) = User.objects.bulk_create([User(username="alice", email="alice@example.com")])
+        for i in range(3):
+            ChatRecord.objects.create(session_id="s1", role="user", content=f"消息 {i}", user=self.user)
+        self.async_client.force_login(self.user)
+
+    async def test_asgi_response_is_async_stream(self):
+        """ASGI 请求返回异步迭代器（同步迭代器会被 Django 整体读入内存）"""
+        response = await self.async_client.get("/api/ai/chat/export/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        lines = b"".join([chunk async for chunk in response.streaming_content]).decode().splitlines()
+        self.assertEqual([json.loads(line)["content"] for line in lines], ["消息 0", "消息 1", "消息 2"])
+
+
+class ArchivedSessionTests(TestCase):
+    def setUp(self):
+        self.archive_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_root, ignore_errors=True)
+        ChatRecord.objects.create(session_id="s1", role="user", content="新消息")
+
+    def test_corrupt_archive_serves_live_rows(self):
+        """归档文件损坏时历史接口仍返回主表中的记录，而不是 500"""
+        with open(os.path.join(self.archive_root, "s1.ndjson.gz"), "wb") as fp:
+            fp.write(b"not gzip")
+        ChatArchive.objects.create(session_id="s1", file_path="s1.ndjson.gz", record_count=2)
+
+        with override_settings(CHAT_ARCHIVE_ROOT=self.archive_root):
+            response = self.client.get("/api/ai/qwen/", {"session_id": "s1"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["content"] for row in response.json()["data"]], ["新消息"])
+        self.assertTrue(ChatArchive.objects.filter(session_id="s1").exists())
+
+
+class ChatSearchAPITests(TestCase):
+    def test_invalid_user_id_returns_400(self):
+        """管理员传入非整数 user_id 返回 400（与导出接口一致），而不是 500"""
+        (admin,) = User.objects.bulk_create([User(username="admin", email="admin@example.com", is_staff=True)])
+        self.client.force_login(admin)
+        response = self.client.get("/api/ai/chat/search/", {"q": "消息", "user_id": "abc"})
+        self.assertEqual(response.status_code, 400)
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from .views import AITaskListAPI, QwenChatAPI, QwenChatAsyncAPI
+from .views import AITaskListAPI, ChatExportAPI, ChatSearchAPI, QwenChatAPI, QwenChatAsyncAPI
 
 urlpatterns = [
     # 原有接口（方案 A：同步流式 SSE）
@@ -9,4 +9,8 @@ urlpatterns = [
     path("qwen-async/", QwenChatAsyncAPI.as_view(), name="qwen-chat-async"),
     # 任务列表查询接口
     path("tasks/", AITaskListAPI.as_view(), name="ai-task-list"),
+    # 对话记录全文检索接口
+    path("chat/search/", ChatSearchAPI.as_view(), name="ai-chat-search"),
+    # 对话记录流式导出接口
+    path("chat/export/", ChatExportAPI.as_view(), name="ai-chat-export"),
 ]
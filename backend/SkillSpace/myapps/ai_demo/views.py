@@ -1,9 +1,14 @@
 # ai_demo/views.py
 # AI模型接口视图，提供通义千问对话服务
+import hashlib
 import json
 import logging
 import uuid
+from datetime import datetime
 
+from django.contrib.auth import get_user
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Max
 from django.http import StreamingHttpResponse
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
@@ -13,8 +18,20 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 # 导入流式生成函数
+from .archive import restore_session
+from .export import (
+    EXPORT_FORMATS,
+    aiter_chunks,
+    build_export_queryset,
+    gzip_stream,
+    iter_archive_rows,
+    iter_export,
+    parse_bound,
+)
 from .model_loader import stream_generate_answer
 from .models import AITask, ChatRecord
+from .pagination import InvalidCursor, encode_cursor, estimate_count, keyset_filter, paginate_keyset, parse_page_size
+from .search import highlight, search_chat_records
 from .serializers import ChatRecordSerializer, ChatRequestSerializer
 
 # 导入 Celery 任务
@@ -23,6 +40,31 @@ from .tasks import qwen_chat_task_streaming
 logger = logging.getLogger(__name__)
 
 
+def get_session_user(request):
+    """
+    当前登录用户（未登录返回 None）
+
+    对话接口为免 CSRF 检查设置了 authentication_classes = []，DRF 的 request.user 始终是匿名用户，
+    这里直接从 Django 会话中读取登录用户。
+    """
+    if not hasattr(request._request, "session"):
+        return None
+    user = get_user(request._request)
+    return user if user.is_authenticated else None
+
+
+def restore_archived_session(session_id):
+    """
+    回迁已归档的会话（见 archive.restore_session）
+
+    归档文件缺失或损坏时只记录日志，继续使用主表中的记录，不让该会话的接口一直返回 500。
+    """
+    try:
+        restore_session(session_id)
+    except Exception as e:
+        logger.error(f"归档会话回迁失败: {session_id} - {e}")
+
+
 class AITaskListAPI(APIView):
     """
     AI 任务列表查询接口
@@ -31,7 +73,8 @@ class AITaskListAPI(APIView):
     查询参数：
         - user_only: true/false (是否只查看自己的任务，默认 true)
         - status: pending/processing/completed/failed (按状态筛选)
-        - limit: 数量限制（默认 20）
+        - limit: 每页数量（默认 20，最大 100）
+        - cursor: 上一页返回的 next_cursor（游标分页，按 created_at/id 倒序）
 
     返回示例：
     {
@@ -44,18 +87,38 @@ class AITaskListAPI(APIView):
                 "status": "processing",
                 "created_at": "2025-12-14 10:30:00"
             }
-        ]
+        ],
+        "count": 1,
+        "next_cursor": "MjAyNS0xMi0xNFQxMDozMDowMCswODowMHw0Mg",
+        "has_more": true,
+        "total": 1000,
+        "total_is_estimate": true
     }
     """
 
+    # 列表接口只加载需要的字段（跳过 error_message 等大字段）
+    LIST_FIELDS = (
+        "id",
+        "task_id",
+        "celery_task_id",
+        "session_id",
+        "prompt",
+        "status",
+        "ws_url",
+        "created_at",
+        "completed_at",
+        "user__username",
+    )
+
     def get(self, request):
         # 获取查询参数
         user_only = request.query_params.get("user_only", "true").lower() == "true"
         status_filter = request.query_params.get("status", None)
-        limit = int(request.query_params.get("limit", 20))
+        limit = parse_page_size(request.query_params.get("limit"))
+        cursor = request.query_params.get("cursor")
 
-        # 构建查询
-        queryset = AITask.objects.all()
+        # 构建查询（一次 JOIN 取出用户名，避免逐行访问 task.user 触发 N+1 查询）
+        queryset = AITask.objects.select_related("user").only(*self.LIST_FIELDS)
 
         # 如果只查看自己的任务（且已登录）
         if user_only and request.user.is_authenticated:
@@ -68,8 +131,17 @@ class AITaskListAPI(APIView):
         if status_filter:
             queryset = queryset.filter(status=status_filter)
 
-        # 限制数量
-        tasks = queryset[:limit]
+        # 总数估算（大表不执行精确 COUNT(*)）
+        total, total_is_estimate = estimate_count(queryset)
+
+        # 游标分页：命中 (user, -created_at) / (status, -created_at) 索引
+        if cursor:
+            try:
+                queryset = keyset_filter(queryset, cursor)
+            except InvalidCursor as e:
+                return Response({"code": 400, "msg": str(e), "data": []}, status=status.HTTP_400_BAD_REQUEST)
+
+        tasks, next_cursor = paginate_keyset(queryset, limit)
 
         # 构建返回数据
         data = []
@@ -89,7 +161,18 @@ class AITaskListAPI(APIView):
                 }
             )
 
-        return Response({"code": 200, "msg": "success", "data": data, "count": len(data)})
+        return Response(
+            {
+                "code": 200,
+                "msg": "success",
+                "data": data,
+                "count": len(data),
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None,
+                "total": total,
+                "total_is_estimate": total_is_estimate,
+            }
+        )
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -124,7 +207,10 @@ class QwenChatAsyncAPI(APIView):
 
         try:
             # 2. 获取当前登录用户（如果已登录）
-            current_user = request.user if request.user.is_authenticated else None
+            current_user = get_session_user(request)
+
+            # 已归档的会话先回迁，保证历史上下文完整
+            restore_archived_session(session_id)
 
             # 3. 保存用户提问到数据库
             ChatRecord.objects.create(session_id=session_id, role="user", content=prompt, user=current_user)
@@ -201,21 +287,106 @@ class QwenChatAPI(APIView):
 
     http_method_names = ["get", "post"]
 
+    # 历史记录默认每页条数 / 最大条数
+    history_page_size = 50
+    history_max_page_size = 200
+
     def get(self, request):
-        """获取历史对话记录（兼容旧前端）"""
-        session_id = request.query_params.get("session_id")
+        """
+        获取历史对话记录（兼容旧前端：只传 session_id 时返回最近一页）
+
+        查询参数：
+            - session_id: 会话ID（必填）
+            - page_size: 每页条数（默认 50，最大 200）
+            - before: 游标，加载更早的消息（向上翻页）
+            - after: 游标，加载更新的消息（增量同步）
+            - since: 已有的最后一条消息 id，只返回 id 更大的消息（增量同步）
+            - include_hidden: true 时包含已隐藏记录（仅管理员有效）
+
+        支持 If-None-Match：会话内容未变化时返回 304，不传输消息体。
+        返回的 data 始终按时间正序排列。
+        """
+        params = request.query_params
+        session_id = params.get("session_id")
         if not session_id:
             return Response(
                 {"code": 400, "msg": "缺少 session_id 参数", "data": []},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        records = ChatRecord.objects.filter(session_id=session_id).order_by("created_at")
+
+        page_size = parse_page_size(
+            params.get("page_size"),
+            default=self.history_page_size,
+            maximum=self.history_max_page_size,
+        )
+        before = params.get("before")
+        after = params.get("after")
+        since = params.get("since")
+
+        # 打开已归档的会话时透明回迁到主表
+        restore_archived_session(session_id)
+
+        queryset = ChatRecord.objects.filter(session_id=session_id)
+        include_hidden = params.get("include_hidden", "false").lower() == "true" and request.user.is_staff
+        if not include_hidden:
+            queryset = queryset.filter(is_hidden=False)
+
+        # ETag：由会话最新消息 id、消息数量和查询参数决定，内容未变化时直接返回 304
+        etag = self._history_etag(queryset, params)
+        if etag in request.headers.get("If-None-Match", ""):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        queryset = queryset.only("id", "session_id", "role", "content", "created_at")
+
+        try:
+            if since or after:
+                # 增量模式：按时间正序取游标之后的消息
+                if since:
+                    queryset = queryset.filter(id__gt=int(since))
+                else:
+                    queryset = keyset_filter(queryset, after, descending=False)
+                records, more_cursor = paginate_keyset(queryset, page_size, descending=False)
+                has_more = more_cursor is not None
+                older_cursor = None
+            else:
+                # 翻页模式：倒序取最近一页（或 before 游标之前的一页），再翻转为正序
+                if before:
+                    queryset = keyset_filter(queryset, before, descending=True)
+                records, older_cursor = paginate_keyset(queryset, page_size, descending=True)
+                records.reverse()
+                has_more = older_cursor is not None
+        except (InvalidCursor, ValueError) as e:
+            return Response(
+                {"code": 400, "msg": f"分页参数错误: {e}", "data": []},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # newer_cursor 指向本页最新一条消息，前端下次用 after=newer_cursor 拉取新消息
+        newer_cursor = encode_cursor(records[-1].created_at, records[-1].pk) if records else after
+
         serializer = ChatRecordSerializer(records, many=True)
         return Response(
-            {"code": 200, "msg": "success", "data": serializer.data},
+            {
+                "code": 200,
+                "msg": "success",
+                "data": serializer.data,
+                "has_more": has_more,
+                "older_cursor": older_cursor,
+                "newer_cursor": newer_cursor,
+                "last_id": records[-1].pk if records else None,
+            },
             status=status.HTTP_200_OK,
+            headers={"ETag": etag, "Cache-Control": "private, no-cache"},
         )
 
+    @staticmethod
+    def _history_etag(queryset, params):
+        """根据会话的 (最新消息id, 消息数) 和查询参数计算弱 ETag"""
+        stats = queryset.aggregate(last_id=Max("id"), total=Count("id"))
+        query = "&".join(f"{k}={params.get(k)}" for k in sorted(params.keys()))
+        digest = hashlib.md5(f"{stats['last_id']}:{stats['total']}:{query}".encode()).hexdigest()
+        return f'W/"{digest}"'
+
     def post(self, request):
         # 1. 验证参数
         request_serializer = ChatRequestSerializer(data=request.data)
@@ -230,9 +401,14 @@ class QwenChatAPI(APIView):
         session_id = request_serializer.validated_data.get("session_id") or str(uuid.uuid4())
         stream_mode = request_serializer.validated_data.get("stream", True)  # 获取流式开关
 
+        current_user = get_session_user(request)
+
         try:
+            # 已归档的会话先回迁，保证历史上下文完整
+            restore_archived_session(session_id)
+
             # 2. 保存用户提问到数据库 (立即保存)
-            ChatRecord.objects.create(session_id=session_id, role="user", content=prompt)
+            ChatRecord.objects.create(session_id=session_id, role="user", content=prompt, user=current_user)
 
             # 3. 获取历史上下文
             history_objs = ChatRecord.objects.filter(session_id=session_id).order_by("created_at")
@@ -274,6 +450,7 @@ class QwenChatAPI(APIView):
                                 session_id=session_id,
                                 role="assistant",
                                 content=full_answer,
+                                user=current_user,
                             )
 
                         logger.info(
@@ -306,7 +483,7 @@ class QwenChatAPI(APIView):
 
                 # 保存答案到数据库（不保存思考过程）
                 if full_answer:
-                    ChatRecord.objects.create(session_id=session_id, role="assistant", content=full_answer)
+                    ChatRecord.objects.create(session_id=session_id, role="assistant", content=full_answer, user=current_user)
 
                 logger.info(
                     f"AI对话完成(Block) - Session: {session_id}, 思考长度: {len(thinking_content)}, 答案长度: {len(full_answer)}"
@@ -329,3 +506,181 @@ class QwenChatAPI(APIView):
                 {"code": 500, "msg": f"系统内部错误: {str(e)}", "data": ""},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+
+class ChatSearchAPI(APIView):
+    """
+    对话记录全文检索接口
+
+    GET /api/ai/chat/search/
+    查询参数：
+        - q: 检索词（必填，支持中英文混合）
+        - session_id: 限定会话（未登录用户必填）
+        - user_id: 限定用户（仅管理员有效）
+        - include_hidden: true 时包含已隐藏记录（仅管理员有效）
+        - page / page_size: 分页（默认每页 20，最大 100）
+
+    权限范围：
+        - 管理员：全部记录
+        - 登录用户：自己的记录（指定 session_id 时为该会话中自己的记录）
+        - 未登录用户：只能检索指定会话中的匿名记录
+
+    返回按相关度排序的结果，highlight 字段为带 <mark> 标签的摘要片段。
+    """
+
+    # 检索结果最多可翻到的条数（相关度排序无法使用游标分页，限制深翻页开销）
+    max_results = 1000
+
+    def get(self, request):
+        params = request.query_params
+        query = params.get("q", "").strip()
+        if not query:
+            return Response(
+                {"code": 400, "msg": "缺少检索词 q", "data": []},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        session_id = params.get("session_id")
+        is_staff = request.user.is_authenticated and request.user.is_staff
+
+        if not (session_id or request.user.is_authenticated):
+            return Response(
+                {"code": 400, "msg": "未登录用户必须指定 session_id", "data": []},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = ChatRecord.objects.all()
+        if not is_staff:
+            # 非管理员只能检索自己的记录，session_id 只是附加条件
+            user = request.user if request.user.is_authenticated else None
+            queryset = queryset.filter(user=user)
+        if session_id:
+            queryset = queryset.filter(session_id=session_id)
+
+        if is_staff and params.get("user_id"):
+            try:
+                queryset = queryset.filter(user_id=int(params.get("user_id")))
+            except ValueError:
+                return Response({"code": 400, "msg": "user_id 必须是整数"}, status=status.HTTP_400_BAD_REQUEST)
+        if not (is_staff and params.get("include_hidden", "false").lower() == "true"):
+            queryset = queryset.filter(is_hidden=False)
+
+        page_size = parse_page_size(params.get("page_size"))
+        try:
+            page = max(1, int(params.get("page", 1)))
+        except ValueError:
+            page = 1
+        offset = (page - 1) * page_size
+        if offset >= self.max_results:
+            return Response(
+                {"code": 400, "msg": f"最多只能查看前 {self.max_results} 条结果，请细化检索词", "data": []},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = search_chat_records(queryset.select_related("user"), query)
+        # 多取一条判断是否有下一页，避免对检索结果执行 COUNT
+        records = list(results[offset : offset + page_size + 1])
+        has_more = len(records) > page_size
+        records = records[:page_size]
+
+        data = [
+            {
+                "id": record.id,
+                "session_id": record.session_id,
+                "user": record.user.username if record.user else "匿名用户",
+                "role": record.role,
+                "highlight": highlight(record.content, query),
+                "rank": round(record.rank, 4) if record.rank is not None else None,
+                "created_at": record.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            for record in records
+        ]
+
+        return Response(
+            {
+                "code": 200,
+                "msg": "success",
+                "data": data,
+                "page": page,
+                "page_size": page_size,
+                "has_more": has_more,
+            }
+        )
+
+
+class ChatExportAPI(APIView):
+    """
+    对话记录流式导出接口
+
+    GET /api/ai/chat/export/
+    查询参数：
+        - export_format: ndjson / csv（默认 ndjson）
+        - gzip: true 时输出 gzip 压缩流
+        - session_id: 只导出指定会话
+        - start / end: 创建时间范围（YYYY-MM-DD 或 ISO 8601）
+        - user_id: 指定用户（仅管理员有效，管理员不传则导出全部用户）
+        - include_hidden: true 时包含已隐藏记录（仅管理员有效）
+
+    普通用户只能导出自己的记录。已归档的会话直接从归档文件读取，排在最后输出。
+    响应为 StreamingHttpResponse，服务端内存占用与导出行数无关（ASGI 下使用异步迭代器，见 export.aiter_chunks）。
+    """
+
+    def get(self, request):
+        if not request.user.is_authenticated:
+            return Response({"code": 401, "msg": "请先登录"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        params = request.query_params
+        export_format = params.get("export_format", "ndjson").lower()
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"code": 400, "msg": f"不支持的导出格式: {export_format}，可选 {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            start = parse_bound(params.get("start"))
+            end = parse_bound(params.get("end"), end=True)
+        except ValueError as e:
+            return Response({"code": 400, "msg": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        is_staff = request.user.is_staff
+        if is_staff:
+            user = None
+            user_id = params.get("user_id")
+        else:
+            user = request.user
+            user_id = None
+
+        filters = {
+            "session_id": params.get("session_id"),
+            "start": start,
+            "end": end,
+            "include_hidden": is_staff and params.get("include_hidden", "false").lower() == "true",
+        }
+        try:
+            owner_id = user.pk if user is not None else (int(user_id) if user_id else None)
+        except ValueError:
+            return Response({"code": 400, "msg": "user_id 必须是整数"}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = build_export_queryset(**filters)
+        if owner_id is not None:
+            queryset = queryset.filter(user_id=owner_id)
+        archived = iter_archive_rows(user_id=owner_id, **filters)
+
+        use_gzip = params.get("gzip", "false").lower() == "true"
+        stream = iter_export(queryset, export_format, archived=archived)
+        filename = f"chat_records_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+        if use_gzip:
+            stream = gzip_stream(stream)
+            filename += ".gz"
+            content_type = "application/gzip"
+        else:
+            content_type = f"{EXPORT_FORMATS[export_format]}; charset=utf-8"
+        if isinstance(request._request, ASGIRequest):
+            stream = aiter_chunks(stream)
+
+        response = StreamingHttpResponse(stream, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        logger.info(f"对话导出: user={request.user.username}, format={export_format}, gzip={use_gzip}")
+        return response
@@ -0,0 +1,314 @@
+"""
+云服务器常驻采样 Agent（流式采集模式）
+
+monitoring.collect_mode: agent 时，后端通过一条长期保持的 SSH 通道在目标机上启动 AGENT_SOURCE：
+一段只依赖 Python 3 标准库的采样程序，按 agent_interval（可小于 1 秒）读取 /proc 原始计数器，
+每个样本输出一行紧凑 JSON（NDJSON）；主机名、df、进程列表等慢变化数据每 slow_interval 秒附带一次。
+
+后端按行读取样本，由 AgentDecoder 换算成与轮询采集相同结构的快照并立即推送。
+与逐周期 exec 相比省去了每次建立通道、启动 shell 和解析文本输出的开销；目标机上只有一个常驻进程。
+通道关闭后远端进程写 stdout 失败即退出，不会残留。
+"""
+
+import asyncio
+import json
+import logging
+import shlex
+import threading
+from typing import Callable, Dict, List, Optional
+
+from .cloud_collectors import build_disk, build_memory, build_network, build_services, build_system
+from .rates import RateEngine, apply_rates
+
+logger = logging.getLogger(__name__)
+
+# 远端采样程序（python3 -u -c 执行，参数：采样间隔 慢数据间隔 是否采集进程）
+AGENT_SOURCE = r"""
+import json, os, socket, subprocess, sys, time
+
+interval, slow_interval, with_ps = float(sys.argv[1]), float(sys.argv[2]), sys.argv[3] == "1"
+MEM_KEYS = ("MemTotal", "MemFree", "MemAvailable", "Buffers", "Cached", "SReclaimable", "SwapTotal", "SwapFree")
+
+
+def read(path):
+    with open(path) as fp:
+        return fp.read()
+
+
+def cpu():
+    result = {}
+    for line in read("/proc/stat").splitlines():
+        if line.startswith("cpu"):
+            parts = line.split()
+            result[parts[0]] = [int(x) for x in parts[1:9]]
+    return result
+
+
+def mem():
+    result = {}
+    for line in read("/proc/meminfo").splitlines():
+        key, _, value = line.partition(":")
+        if key in MEM_KEYS:
+            result[key] = int(value.split()[0]) * 1024
+    return result
+
+
+def net():
+    result = {}
+    for line in read("/proc/net/dev").splitlines()[2:]:
+        name, _, values = line.partition(":")
+        values = values.split()
+        result[name.strip()] = [int(values[0]), int(values[1]), int(values[8]), int(values[9])]
+    return result
+
+
+def disk():
+    # 读完成次数, 读扇区, 写完成次数, 写扇区, IO 耗时(ms)
+    result = {}
+    for line in read("/proc/diskstats").splitlines():
+        v = line.split()
+        if len(v) >= 13 and not v[2].startswith(("loop", "ram")):
+            result[v[2]] = [int(v[3]), int(v[5]), int(v[7]), int(v[9]), int(v[12])]
+    return result
+
+
+def df():
+    rows, seen = [], set()
+    for line in read("/proc/mounts").splitlines():
+        device, mountpoint = line.split()[:2]
+        mountpoint = mountpoint.replace("\\040", " ")
+        if (device.startswith("/dev/") or mountpoint == "/") and mountpoint not in seen:
+            seen.add(mountpoint)
+            try:
+                st = os.statvfs(mountpoint)
+            except OSError:
+                continue
+            used = (st.f_blocks - st.f_bfree) * st.f_frsize
+            rows.append([device, st.f_blocks * st.f_frsize, used, st.f_bavail * st.f_frsize, mountpoint])
+    return rows
+
+
+def listening():
+    ports = set()
+    for path in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            for line in read(path).splitlines()[1:]:
+                v = line.split()
+                if v[3] == "0A":
+                    ports.add(int(v[1].rsplit(":", 1)[1], 16))
+        except (OSError, IndexError, ValueError):
+            pass
+    return sorted(ports)
+
+
+def slow():
+    u = os.uname()
+    record = {
+        "host": socket.gethostname(),
+        "uname": " ".join((u.sysname, u.nodename, u.release, u.version, u.machine)),
+        "uptime": float(read("/proc/uptime").split()[0]),
+        "nproc": os.cpu_count(),
+        "df": df(),
+    }
+    if with_ps:
+        out = subprocess.run(["ps", "-eo", "pid=,pcpu=,pmem=,args="], stdout=subprocess.PIPE, universal_newlines=True).stdout
+        rows = [line.split(None, 1) for line in out.splitlines() if line.strip()]
+        # 排除 Agent 自身
+        record["ps"] = [row[1] for row in rows if len(row) == 2 and row[0] != str(os.getpid())]
+        record["listen"] = listening()
+    return record
+
+
+next_tick = time.time()
+last_slow = None
+try:
+    while True:
+        now = time.time()
+        record = {"t": round(now, 3), "cpu": cpu(), "load": [float(x) for x in read("/proc/loadavg").split()[:3]],
+                  "mem": mem(), "net": net(), "disk": disk()}
+        if last_slow is None or now - last_slow >= slow_interval:
+            last_slow = now
+            record.update(slow())
+        sys.stdout.write(json.dumps(record, separators=(",", ":")) + "\n")
+        sys.stdout.flush()
+        # 按固定节拍调度，处理耗时不累积
+        next_tick += interval
+        delay = next_tick - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_tick = time.time()
+except (IOError, KeyboardInterrupt):
+    pass
+"""
+
+# 采样间隔下限（秒）
+MIN_AGENT_INTERVAL = 0.1
+
+# 远端没有 python3 时 shell 的退出码
+COMMAND_NOT_FOUND = 127
+
+
+def build_agent_command(interval: float, slow_interval: float, with_services: bool = False) -> str:
+    """生成启动远端 Agent 的命令（exec 替换登录 shell，通道关闭即结束）"""
+    interval = max(MIN_AGENT_INTERVAL, float(interval))
+    return (
+        f"exec python3 -u -c {shlex.quote(AGENT_SOURCE)} "
+        f"{interval:g} {max(interval, float(slow_interval)):g} {1 if with_services else 0}"
+    )
+
+
+class AgentDecoder:
+    """
+    把 Agent 的 NDJSON 样本换算成与 parse_collect_output() 相同结构的快照
+
+    CPU 使用率、磁盘 IO、网卡速率由 RateEngine 按相邻两个样本的计数器差值计算，因此第一个样本只作为基准，不产生快照；
+    慢变化数据（主机名、df、进程列表）缓存到下一次更新。
+    """
+
+    def __init__(self, services: Optional[List[Dict]] = None):
+        self.services = services or []
+        self.rates = RateEngine()
+        self.static = {}
+
+    def feed(self, line) -> Optional[Dict]:
+        record = json.loads(line) if isinstance(line, (str, bytes)) else line
+        for key in ("host", "uname", "uptime", "nproc", "df", "ps", "listen"):
+            if key in record:
+                self.static[key] = record[key]
+        self.static["uptime_at"] = record["t"] if "uptime" in record else self.static.get("uptime_at", record["t"])
+
+        rates = self.rates.update("agent", record)
+        if not rates:
+            return None
+        return apply_rates(self.snapshot(record), rates)
+
+    def snapshot(self, record: Dict) -> Dict:
+        static = self.static
+        cpu = record.get("cpu", {})
+        load = (record.get("load") or [0, 0, 0]) + [0, 0, 0]
+        uptime = static.get("uptime", 0) + record["t"] - static.get("uptime_at", record["t"])
+        interfaces = {
+            name: {"bytes_recv": v[0], "packets_recv": v[1], "bytes_sent": v[2], "packets_sent": v[3]}
+            for name, v in record.get("net", {}).items()
+        }
+        return {
+            "system": build_system(static.get("host"), static.get("uname"), uptime),
+            "cpu": {
+                "usage_percent": 0.0,
+                "cores": static.get("nproc") or len([key for key in cpu if key != "cpu"]),
+                "load_avg_1": round(load[0], 2),
+                "load_avg_5": round(load[1], 2),
+                "load_avg_15": round(load[2], 2),
+            },
+            "memory": build_memory(record.get("mem", {})),
+            "disk": build_disk(static.get("df", [])),
+            "network": build_network(interfaces),
+            "services": (
+                build_services(static.get("ps", []), set(static.get("listen", [])), self.services) if self.services else []
+            ),
+            "containers": [],
+        }
+
+
+class AgentStream:
+    """
+    一台服务器的 Agent 流（paramiko 后端）：后台线程逐行读取通道输出，每个快照回调 on_snapshot
+
+    extra 中的字段（如定期刷新的 Docker 容器列表）会合并到每个快照。
+    """
+
+    def __init__(self, server_name: str, ssh, command: str, decoder: AgentDecoder, on_snapshot: Callable):
+        self.server_name = server_name
+        self.ssh = ssh
+        self.command = command
+        self.decoder = decoder
+        self.on_snapshot = on_snapshot
+        self.extra = {}
+        self.channel = None
+        self.thread = None
+        self.exit_status = None
+        self.samples = 0
+
+    def start(self):
+        self.channel = self.ssh.open_stream(self.command)
+        self.thread = threading.Thread(target=self._read, name=f"agent-{self.server_name}", daemon=True)
+        self.thread.start()
+        logger.info(f"Agent 流已启动: {self.server_name}")
+
+    def _read(self):
+        try:
+            for line in self.channel.makefile("r"):
+                self._handle(line)
+            # 远端进程已退出（EOF）：退出码随后到达，通道关闭时也会结束等待
+            self.exit_status = self.channel.recv_exit_status()
+        except Exception as e:
+            logger.warning(f"Agent 流读取中断: {self.server_name} - {e}")
+        finally:
+            self.channel.close()
+            logger.info(f"Agent 流已结束: {self.server_name} (退出码 {self.exit_status})")
+
+    def _handle(self, line):
+        try:
+            snapshot = self.decoder.feed(line)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Agent 样本解析失败: {self.server_name} - {e}")
+            return
+        self.samples += 1
+        if snapshot is not None:
+            snapshot.update(self.extra)
+            self.on_snapshot(self.server_name, snapshot)
+
+    @property
+    def unsupported(self) -> bool:
+        """目标机没有 python3，应回退到轮询采集"""
+        return self.exit_status == COMMAND_NOT_FOUND
+
+    def is_alive(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def stop(self):
+        if self.channel:
+            self.channel.close()
+
+
+class AsyncAgentStream(AgentStream):
+    """一台服务器的 Agent 流（asyncssh 后端）：读取协程在事件循环中运行，on_snapshot 为协程函数"""
+
+    def __init__(self, server_name: str, ssh, command: str, decoder: AgentDecoder, on_snapshot: Callable):
+        super().__init__(server_name, ssh, command, decoder, on_snapshot)
+        self.process = None
+        self.task = None
+
+    async def start(self):
+        self.process = await self.ssh.open_stream(self.command)
+        self.task = asyncio.create_task(self._read())
+        logger.info(f"Agent 流已启动: {self.server_name}")
+
+    async def _read(self):
+        try:
+            async for line in self.process.stdout:
+                try:
+                    snapshot = self.decoder.feed(line)
+                except (ValueError, KeyError, TypeError) as e:
+                    logger.warning(f"Agent 样本解析失败: {self.server_name} - {e}")
+                    continue
+                self.samples += 1
+                if snapshot is not None:
+                    snapshot.update(self.extra)
+                    await self.on_snapshot(self.server_name, snapshot)
+            # 远端进程已退出（EOF）：等待通道关闭以拿到退出码
+            await self.process.wait_closed()
+        except Exception as e:
+            logger.warning(f"Agent 流读取中断: {self.server_name} - {e}")
+        finally:
+            self.exit_status = self.process.exit_status
+            self.process.close()
+            logger.info(f"Agent 流已结束: {self.server_name} (退出码 {self.exit_status})")
+
+    def is_alive(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def stop(self):
+        if self.process:
+            self.process.close()
@@ -0,0 +1,320 @@
+"""
+监控阈值告警
+
+global.enable_alerts 为 true 时，MetricHistory 收到的每个快照同时交给 AlertEngine：
+    add：把该服务器的指标并入 (服务器数, 指标数) 的数值矩阵，矩阵保存自上次判断以来每个指标的最大值，不做判断
+    evaluate：后台线程每秒对所有规则做一次向量化判断（numpy），只处理自上次判断后有新采样的服务器
+采样频率高于判断频率时（如 Agent 模式），两次判断之间的每个快照都通过最大值参与判断，短时尖峰不会漏掉。
+规则对应 history.METRIC_NAMES 中的指标，值 >= threshold 持续 for_seconds 秒后触发，
+值回落到 threshold - hysteresis 以下才恢复（滞回，避免在阈值附近反复触发 / 恢复）。
+服务器超过 stale_seconds 秒没有新采样时，它正在触发的告警以 reason="stale" 恢复（服务器下线或停止上报）。
+正在触发的告警保存在内存中（AlertListView），触发和恢复事件通过频道层推送到 ALERT_GROUP_NAME 频道组。
+规则数量只影响数组长度，上万条规则的一次判断在 1 毫秒以内（见 scripts/bench_alerts.py）。
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from .history import LOCAL_SERVER_NAME, METRIC_NAMES
+
+logger = logging.getLogger(__name__)
+
+# 告警事件推送的频道组（AlertConsumer）
+ALERT_GROUP_NAME = "monitor_alerts"
+
+SEVERITIES = ("warning", "critical")
+
+# 配置中 <前缀>_<级别> 形式的阈值对应的指标，如 cpu_warning
+THRESHOLD_METRICS = {"cpu": "cpu_usage", "memory": "memory_usage", "disk": "disk_usage"}
+
+# 默认恢复滞回量（与指标同单位）和持续时间（秒）
+DEFAULT_HYSTERESIS = 5.0
+DEFAULT_FOR_SECONDS = 0.0
+
+# 判断间隔（秒）
+EVALUATE_INTERVAL = 1.0
+
+# 没有新采样多久后恢复该服务器的告警（秒），至少为采集间隔的 STALE_INTERVALS 倍
+DEFAULT_STALE_SECONDS = 60.0
+STALE_INTERVALS = 3
+
+
+def _server_rules(alerts: Dict, server_name: str) -> Dict[str, Dict]:
+    """把一份 alerts 配置展开为 {规则名: 规则}"""
+    hysteresis = float(alerts.get("hysteresis", DEFAULT_HYSTERESIS))
+    for_seconds = float(alerts.get("for_seconds", DEFAULT_FOR_SECONDS))
+    entries = []
+    for key, threshold in alerts.items():
+        prefix, _, severity = key.rpartition("_")
+        if prefix in THRESHOLD_METRICS and severity in SEVERITIES:
+            entries.append({"name": key, "metric": THRESHOLD_METRICS[prefix], "severity": severity, "threshold": threshold})
+    entries.extend(alerts.get("rules") or [])
+
+    rules = {}
+    for entry in entries:
+        metric = entry.get("metric")
+        severity = entry.get("severity", "warning")
+        name = entry.get("name") or f"{metric}_{severity}"
+        if metric not in METRIC_NAMES or severity not in SEVERITIES:
+            logger.warning(f"忽略无效的告警规则: {server_name} - {name}（指标 {metric}，级别 {severity}）")
+            continue
+        try:
+            rules[name] = {
+                "id": f"{server_name}/{name}",
+                "server_name": server_name,
+                "name": name,
+                "metric": metric,
+                "severity": severity,
+                "threshold": float(entry["threshold"]),
+                "hysteresis": float(entry.get("hysteresis", hysteresis)),
+                "for_seconds": float(entry.get("for_seconds", for_seconds)),
+            }
+        except (KeyError, TypeError, ValueError):
+            logger.warning(f"忽略无效的告警规则: {server_name} - {name}（阈值必须是数值）")
+    return rules
+
+
+def build_rules(global_config: Dict, servers: List[Dict]) -> List[Dict]:
+    """
+    根据配置生成所有服务器的告警规则
+
+    每台服务器使用 global.alerts，服务器自己的 alerts 覆盖同名项（阈值、hysteresis、for_seconds、
+    同名的 rules）；本机监控（LOCAL_SERVER_NAME）只使用 global.alerts。
+
+    Args:
+        global_config: 全局配置
+        servers: 服务器配置列表
+
+    Returns:
+        规则列表：{"id", "server_name", "name", "metric", "severity", "threshold", "hysteresis", "for_seconds"}
+    """
+    base = global_config.get("alerts") or {}
+    rules = list(_server_rules(base, LOCAL_SERVER_NAME).values())
+    for server in servers:
+        overrides = server.get("alerts") or {}
+        merged = {**base, **overrides}
+        # rules 按规则名合并：服务器中的同名规则覆盖全局规则
+        named = {}
+        for entry in list(base.get("rules") or []) + list(overrides.get("rules") or []):
+            named[entry.get("name") or f"{entry.get('metric')}_{entry.get('severity', 'warning')}"] = entry
+        merged["rules"] = list(named.values())
+        rules.extend(_server_rules(merged, server["name"]).values())
+    return rules
+
+
+class AlertEngine:
+    """阈值告警引擎（add 可在任意线程调用，判断和推送在后台线程中进行）"""
+
+    def __init__(self, interval: float = EVALUATE_INTERVAL, stale_seconds: float = DEFAULT_STALE_SECONDS):
+        self.interval = interval
+        self.stale_seconds = stale_seconds
+        self.channel_layer = get_channel_layer()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.thread = None
+        self.rules = []
+        self.server_index = {}
+        self.sample_time = np.zeros(0)
+        self.firing = np.zeros(0, dtype=bool)
+        self.pending_since = np.zeros(0)
+        self.active = {}  # 正在触发的告警 {规则 id: 告警}
+        self.configure([])
+
+    def configure(self, rules: List[Dict]):
+        """
+        替换全部规则（配置重新加载时调用）
+
+        同一 id 的规则保留触发状态，同一服务器保留最近采样时间；已删除规则的告警直接丢弃，不推送恢复事件。
+        """
+        servers = sorted({rule["server_name"] for rule in rules})
+        server_index = {name: i for i, name in enumerate(servers)}
+        width = len(METRIC_NAMES)
+        rows = np.array([server_index[rule["server_name"]] for rule in rules], dtype=np.intp)
+        columns = np.array([METRIC_NAMES.index(rule["metric"]) for rule in rules], dtype=np.intp)
+        threshold = np.array([rule["threshold"] for rule in rules], dtype=float)
+
+        with self._lock:
+            previous = {rule["id"]: i for i, rule in enumerate(self.rules)}
+            firing = np.zeros(len(rules), dtype=bool)
+            pending_since = np.full(len(rules), np.nan)
+            for i, rule in enumerate(rules):
+                j = previous.get(rule["id"])
+                if j is not None:
+                    firing[i] = self.firing[j]
+                    pending_since[i] = self.pending_since[j]
+            sample_time = np.zeros(len(servers))
+            for name, i in server_index.items():
+                j = self.server_index.get(name)
+                if j is not None:
+                    sample_time[i] = self.sample_time[j]
+
+            self.rules = list(rules)
+            self.server_index = server_index
+            self.values = np.full((len(servers), width), np.nan)
+            self.sample_time = sample_time
+            self.evaluated_time = sample_time.copy()
+            self.rule_row = rows
+            self.rule_cell = rows * width + columns  # values.ravel() 中的位置
+            self.threshold = threshold
+            self.clear_below = threshold - np.array([rule["hysteresis"] for rule in rules], dtype=float)
+            self.for_seconds = np.array([rule["for_seconds"] for rule in rules], dtype=float)
+            self.firing = firing
+            self.pending_since = pending_since
+            self.active = {rule["id"]: self.active[rule["id"]] for rule in rules if rule["id"] in self.active}
+
+    def add(self, server_name: str, timestamp: float, row):
+        """
+        记录一台服务器的一个快照（row 与 METRIC_NAMES 对应）；没有规则的服务器直接忽略
+
+        与自上次判断以来的快照逐指标取最大值（NaN 不参与），判断后清空。
+        """
+        with self._lock:
+            index = self.server_index.get(server_name)
+            if index is None:
+                return
+            np.fmax(self.values[index], row, out=self.values[index])
+            self.sample_time[index] = timestamp
+
+    def evaluate(self, now: Optional[float] = None) -> List[Dict]:
+        """
+        对有新采样的服务器的所有规则做一次判断，并恢复超过 stale_seconds 没有新采样的服务器的告警
+
+        Args:
+            now: 当前时间（Unix 时间戳，默认 time.time()），用于判断服务器是否停止上报
+
+        Returns:
+            本次产生的事件列表：{"event": "firing" / "resolved", "alert": {...}}
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            events = self._resolve_stale(now)
+            updated = self.sample_time > self.evaluated_time
+            if not updated.any():
+                return events
+            self.evaluated_time[:] = self.sample_time
+
+            values = np.take(self.values, self.rule_cell)
+            self.values[updated] = np.nan
+            times = self.sample_time[self.rule_row]
+            fresh = updated[self.rule_row] & ~np.isnan(values)
+            above = fresh & (values >= self.threshold)
+
+            # 回落到阈值以下时重新计时；超过阈值时从第一次超过的采样时间开始计时
+            self.pending_since[fresh & ~above] = np.nan
+            start = above & np.isnan(self.pending_since)
+            self.pending_since[start] = times[start]
+
+            fire = above & ~self.firing & (times - self.pending_since >= self.for_seconds)
+            resolve = fresh & self.firing & (values < self.clear_below)
+            self.firing[fire] = True
+            self.firing[resolve] = False
+
+            for i in np.flatnonzero(fire):
+                alert = dict(self.rules[i], value=round(float(values[i]), 2), started_at=float(times[i]))
+                self.active[alert["id"]] = alert
+                events.append({"event": "firing", "alert": alert})
+            for i in np.flatnonzero(resolve):
+                alert = dict(self.active.pop(self.rules[i]["id"], self.rules[i]))
+                alert.update(value=round(float(values[i]), 2), resolved_at=float(times[i]))
+                events.append({"event": "resolved", "alert": alert})
+            return events
+
+    def _resolve_stale(self, now: float) -> List[Dict]:
+        """恢复超过 stale_seconds 没有新采样的服务器正在触发的告警（调用方持有锁）"""
+        stale = (self.sample_time < now - self.stale_seconds)[self.rule_row]
+        resolve = stale & self.firing
+        self.pending_since[stale] = np.nan
+        self.firing[resolve] = False
+        events = []
+        for i in np.flatnonzero(resolve):
+            alert = dict(self.active.pop(self.rules[i]["id"], self.rules[i]))
+            alert.update(resolved_at=now, reason="stale")
+            events.append({"event": "resolved", "alert": alert})
+        return events
+
+    def firing_alerts(self, server_name: Optional[str] = None) -> List[Dict]:
+        """正在触发的告警（按触发时间排序）"""
+        with self._lock:
+            alerts = [alert for alert in self.active.values() if server_name in (None, alert["server_name"])]
+        return sorted(alerts, key=lambda alert: alert["started_at"])
+
+    def notify(self, events: List[Dict]):
+        """记录日志并推送告警事件到 ALERT_GROUP_NAME 频道组"""
+        for event in events:
+            alert = event["alert"]
+            action = "触发" if event["event"] == "firing" else "恢复"
+            detail = "超时未上报" if alert.get("reason") == "stale" else f"{alert['metric']}={alert['value']}"
+            logger.warning(f"告警{action}: {alert['server_name']} - {alert['name']}（{detail}，阈值 {alert['threshold']}）")
+            async_to_sync(self.channel_layer.group_send)(ALERT_GROUP_NAME, {"type": "alert_event", "data": event})
+
+    def start(self):
+        """启动后台判断线程"""
+        if self.thread is None or not self.thread.is_alive():
+            self._stop.clear()
+            self.thread = threading.Thread(target=self._run, name="alert-engine", daemon=True)
+            self.thread.start()
+            logger.info("监控告警已启动")
+
+    def stop(self):
+        self._stop.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        logger.info("监控告警已停止")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                events = self.evaluate()
+                if events:
+                    self.notify(events)
+            except Exception as e:
+                logger.error(f"告警判断失败: {e}")
+
+
+# 全局单例
+_alert_engine = None
+
+
+def get_alert_engine() -> AlertEngine:
+    """
+    获取告警引擎单例
+
+    Returns:
+        AlertEngine实例
+    """
+    global _alert_engine
+    if _alert_engine is None:
+        _alert_engine = AlertEngine()
+    return _alert_engine
+
+
+def configure_alerting(global_config: Dict, servers: List[Dict]) -> Optional[AlertEngine]:
+    """
+    按配置启用 / 更新 / 停用告警（global.enable_alerts、global.alerts、服务器 alerts），启动和重新加载配置时调用
+
+    Returns:
+        启用时返回 AlertEngine，否则返回 None
+    """
+    from .history import get_metric_history
+
+    history = get_metric_history()
+    if not global_config.get("enable_alerts", False):
+        if _alert_engine is not None:
+            history.remove_sink(_alert_engine)
+            _alert_engine.stop()
+            _alert_engine.configure([])
+        return None
+    engine = get_alert_engine()
+    interval = float(global_config.get("collect_interval", 10))
+    alerts = global_config.get("alerts") or {}
+    engine.stale_seconds = float(alerts.get("stale_seconds", max(DEFAULT_STALE_SECONDS, interval * STALE_INTERVALS)))
+    engine.configure(build_rules(global_config, servers))
+    history.add_sink(engine)
+    engine.start()
+    return engine
@@ -126,6 +126,24 @@ class MonitorConfig(AppConfig):
                         )
                         raise  # Windows环境下没有配置文件就退出
 
+                # 历史数据持久化存储（global.enable_history），失败不影响实时监控
+                try:
+                    from .storage import start_history_storage
+
+                    if start_history_storage(config_loader.get_global_config()):
+                        logger.info("监控历史数据持久化存储已启用")
+                except Exception as e:
+                    logger.error(f"启动监控历史数据存储失败: {e}")
+
+                # 阈值告警（global.enable_alerts），失败不影响实时监控
+                try:
+                    from .alerts import configure_alerting
+
+                    if configure_alerting(config_loader.get_global_config(), config_loader.get_servers(enabled_only=True)):
+                        logger.info("监控告警已启用")
+                except Exception as e:
+                    logger.error(f"启动监控告警失败: {e}")
+
                 # 启动云监控任务
                 cloud_task = get_cloud_monitor_task()
                 cloud_task.start()
@@ -0,0 +1,378 @@
+"""
+云服务器监控后台任务（asyncssh 异步后端）
+
+在 cloud_servers.yaml 中设置 global.collector_backend: asyncssh 启用。
+整个后端只占用一个线程：线程内运行独立的事件循环，所有服务器的 SSH 连接、采集和推送都是协程，
+推送直接 await channel_layer.group_send，不再经过 async_to_sync。
+
+- 每台服务器保持一条长连接，系统指标和 Docker 容器在该连接的不同通道上并行执行；
+- 并发采集数由 global.max_workers 限制（信号量，默认 min(256, 服务器数量)）；
+- 单台服务器采集超过 server_timeout 直接取消（协程可取消，不会像线程那样残留）；
+- 本机服务器仍使用本地采集器，在默认线程池中执行，不阻塞事件循环；
+- collect_mode 为 agent 的服务器由事件循环中的读取协程逐条推送 Agent 样本（见 agent.py）。
+"""
+
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .agent import AgentDecoder, AsyncAgentStream
+from .alerts import configure_alerting
+from .cloud_collectors import AsyncCloudServerCollector
+from .cloud_tasks import CloudMonitorTask, server_group_name
+
+# AsyncSSHClientManager延迟导入（仅在启用asyncssh后端时需要）
+# from .utils.async_ssh_client import AsyncSSHClientManager
+
+logger = logging.getLogger(__name__)
+
+# 异步后端的默认并发采集数上限（协程开销很小，可远大于线程数）
+DEFAULT_MAX_CONCURRENCY = 256
+
+
+class AsyncCloudMonitorTask(CloudMonitorTask):
+    """云服务器监控后台任务（asyncssh 后端，接口与 CloudMonitorTask 相同）"""
+
+    def __init__(self):
+        super().__init__()
+        self.loop = None
+        self._wakeup = None
+
+    def start(self):
+        """启动事件循环线程"""
+        if not self.running:
+            self.running = True
+            self.thread = threading.Thread(target=self._run, name="cloud-monitor-async", daemon=True)
+            self.thread.start()
+            logger.info("云服务器监控后台任务已启动（asyncssh 后端）")
+
+    def stop(self):
+        """停止事件循环（连接在事件循环内关闭）"""
+        self.running = False
+        if self.loop and self._wakeup:
+            try:
+                self.loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+        if self.thread:
+            self.thread.join(timeout=5)
+        super().stop()
+
+    def _run(self):
+        """后台线程运行方法：在本线程的事件循环中执行 _main"""
+        try:
+            asyncio.run(self._main())
+        except Exception as e:
+            logger.error(f"云监控事件循环异常退出: {e}")
+
+    async def _main(self):
+        self.loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        try:
+            while self.running:
+                try:
+                    global_config = self.config_loader.get_global_config()
+                    interval = global_config.get("collect_interval", 10)
+                    servers = self.config_loader.get_servers(enabled_only=True)
+
+                    started = self.loop.time()
+                    if servers:
+                        await self.collect_round_async(servers, global_config)
+                    else:
+                        logger.debug("没有启用的云服务器配置")
+
+                    # 等待下一次采集（stop() 时立即唤醒）
+                    await self._sleep(interval - (self.loop.time() - started))
+
+                except Exception as e:
+                    logger.error(f"云监控任务异常: {e}")
+                    await self._sleep(10)
+        finally:
+            for task, _ in list(self.in_flight.values()):
+                task.cancel()
+            self.in_flight.clear()
+            self._stop_agent_streams()
+            self._close_connections()
+
+    async def _sleep(self, seconds: float):
+        if seconds <= 0:
+            return
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    def collect_round(self, servers: List[Dict], global_config: Optional[Dict] = None) -> Dict[str, int]:
+        """同步入口（脚本 / 测试用）：在新事件循环中执行一轮采集"""
+        return asyncio.run(self._collect_round_once(servers, global_config))
+
+    async def _collect_round_once(self, servers: List[Dict], global_config: Optional[Dict] = None) -> Dict[str, int]:
+        try:
+            stats = await self.collect_round_async(servers, global_config)
+            # 等待本轮剩余的采集结束，避免事件循环关闭时取消它们
+            await asyncio.gather(*(task for task, _ in self.in_flight.values()), return_exceptions=True)
+            return stats
+        finally:
+            self.in_flight.clear()
+            self._stop_agent_streams()
+            self._close_connections()
+
+    async def collect_round_async(self, servers: List[Dict], global_config: Optional[Dict] = None) -> Dict[str, int]:
+        """
+        并发采集一轮：每台服务器一个协程，采集完成立即推送
+
+        Returns:
+            本轮统计 {"submitted", "skipped", "completed", "failed", "timeout"}
+        """
+        global_config = global_config or {}
+        self.global_config = global_config
+        interval = global_config.get("collect_interval", 10)
+        server_timeout = global_config.get("server_timeout", interval)
+        max_concurrency = global_config.get("max_workers") or min(DEFAULT_MAX_CONCURRENCY, len(servers))
+        semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+        loop = asyncio.get_running_loop()
+
+        tasks = {}
+        skipped = 0
+        for server_config in servers:
+            server_name = server_config["name"]
+            previous = self.in_flight.get(server_name)
+            if previous and not previous[0].done():
+                skipped += 1
+                logger.warning(f"上一轮采集尚未完成，跳过: {server_name} (已耗时 {loop.time() - previous[1]:.1f}s)")
+                continue
+            action = self._collect_action(server_config, global_config)
+            if action is None:
+                continue
+            if action == "poll":
+                job = self._collect_and_publish_async(server_config, server_timeout, semaphore)
+            else:
+                agent_job = self._start_agent_stream_async if action == "agent_start" else self._refresh_agent_extra_async
+                job = self._run_limited(agent_job(server_config, server_timeout), server_name, server_timeout, semaphore)
+            task = asyncio.create_task(job)
+            self.in_flight[server_name] = (task, loop.time())
+            tasks[task] = server_name
+
+        if not tasks:
+            return {"submitted": 0, "skipped": skipped, "completed": 0, "failed": 0, "timeout": 0}
+
+        done, pending = await asyncio.wait(tasks, timeout=server_timeout)
+        for task in pending:
+            logger.warning(f"采集超时（{server_timeout}秒）: {tasks[task]}")
+        failed = sum(1 for task in done if not task.result())
+        return {
+            "submitted": len(tasks),
+            "skipped": skipped,
+            "completed": len(done) - failed,
+            "failed": failed,
+            "timeout": len(pending),
+        }
+
+    async def _collect_and_publish_async(self, server_config: Dict, server_timeout: float, semaphore) -> bool:
+        """采集单台服务器并推送到 WebSocket"""
+        server_name = server_config.get("name", "Unknown")
+        async with semaphore:
+            try:
+                data = await asyncio.wait_for(self._collect_server_data_async(server_config, server_timeout), server_timeout)
+                await self.publish_async(server_name, data)
+                logger.debug(f"数据采集并推送成功: {server_name}")
+                return True
+            except asyncio.TimeoutError:
+                logger.error(f"采集失败: {server_name} - 采集超时（{server_timeout}秒）")
+                return False
+            except Exception as e:
+                logger.error(f"采集失败: {server_name} - {e}")
+                return False
+
+    async def _run_limited(self, coro, server_name: str, server_timeout: float, semaphore) -> bool:
+        """在并发上限和超时限制内执行 Agent 相关操作"""
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(coro, server_timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"Agent 操作超时（{server_timeout}秒）: {server_name}")
+                return False
+            except Exception as e:
+                logger.error(f"采集失败: {server_name} - {e}")
+                return False
+
+    async def _start_agent_stream_async(self, server_config: Dict, server_timeout: float = 30) -> bool:
+        """启动（或重启）服务器的常驻 Agent 流；目标机没有 python3 时回退到轮询采集"""
+        server_name = server_config["name"]
+        monitoring = server_config.get("monitoring", {})
+
+        previous = self.agent_streams.pop(server_name, None)
+        if previous:
+            previous.stop()
+            if previous.unsupported:
+                logger.warning(f"目标机没有 python3，回退到轮询采集: {server_name}")
+                self.agent_unsupported.add(server_name)
+                data = await self._collect_server_data_async(server_config, server_timeout)
+                await self.publish_snapshot_async(server_name, data)
+                return True
+            logger.warning(f"Agent 流已中断，重新启动: {server_name}")
+
+        try:
+            ssh = await self._get_async_ssh_connection(server_name, server_config["connection"])
+            stream = AsyncAgentStream(
+                server_name,
+                ssh,
+                self._agent_command(server_config),
+                AgentDecoder(monitoring.get("services", [])),
+                self.publish_snapshot_async,
+            )
+            await stream.start()
+        except Exception as e:
+            logger.error(f"Agent 启动失败: {server_name} - {e}")
+            return False
+
+        self.agent_streams[server_name] = stream
+        if monitoring.get("enable_docker", False):
+            await self._refresh_agent_extra_async(server_config, server_timeout)
+        return True
+
+    async def _refresh_agent_extra_async(self, server_config: Dict, server_timeout: float = 30) -> bool:
+        """Agent 不采集 Docker 容器，按采集周期单独刷新并合并到之后的每个样本"""
+        stream = self.agent_streams.get(server_config["name"])
+        if stream is None:
+            return False
+        collector = AsyncCloudServerCollector(stream.ssh, command_timeout=server_timeout)
+        stream.extra["containers"] = await collector.collect_docker_containers()
+        return True
+
+    async def publish_snapshot_async(self, server_name: str, data: Dict):
+        """Agent 流回调：补充时间戳和服务器名称后推送"""
+        data["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        data["server_name"] = server_name
+        try:
+            await self.publish_async(server_name, data)
+        except Exception as e:
+            logger.error(f"推送失败: {server_name} - {e}")
+
+    async def publish_async(self, server_name: str, data: Dict):
+        """写入内存历史并推送单台服务器的数据到对应频道组"""
+        self.history.record(server_name, data)
+        await self.channel_layer.group_send(
+            server_group_name(server_name),
+            {"type": "cloud_status_update", "data": data},
+        )
+
+    async def _collect_server_data_async(self, server_config: Dict, server_timeout: float = 30) -> Dict:
+        """
+        采集单个服务器数据
+
+        Args:
+            server_config: 服务器配置字典
+            server_timeout: 单台服务器采集超时（秒）
+
+        Returns:
+            采集的数据字典
+        """
+        server_name = server_config["name"]
+        connection = server_config["connection"]
+        monitoring = server_config.get("monitoring", {})
+        host = connection["host"]
+
+        due = self._due_groups(server_name, monitoring)
+
+        if self._is_local_cached(host):
+            # 本地采集器和 Docker SDK 都是阻塞调用，放到线程池执行
+            data = await asyncio.to_thread(self._collect_local_data, server_name, monitoring, due)
+        else:
+            logger.debug(f"使用asyncssh远程采集: {server_name} ({host})")
+            ssh = await self._get_async_ssh_connection(server_name, connection)
+            collector = AsyncCloudServerCollector(ssh, command_timeout=server_timeout)
+
+            # 系统指标（含服务状态）与 Docker 容器在同一连接的两个通道上并行采集
+            jobs = [
+                collector.collect_all(
+                    services=monitoring.get("services", []), cpu_sample=self._cpu_sample(server_name), groups=due
+                )
+            ]
+            if monitoring.get("enable_docker", False) and "containers" in due:
+                jobs.append(collector.collect_docker_containers())
+            results = await asyncio.gather(*jobs)
+            data = results[0]
+            self._apply_counters(server_name, data)
+            if len(results) > 1:
+                data["containers"] = results[1]
+
+        # 未到刷新时间的指标组用缓存补齐
+        self.scheduler.merge(server_name, data, due)
+
+        # 添加时间戳和服务器名称
+        data["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        data["server_name"] = server_name
+
+        return data
+
+    async def _get_async_ssh_connection(self, server_name: str, connection: Dict):
+        """
+        获取或创建异步SSH连接（每台服务器一条长连接）
+
+        Returns:
+            AsyncSSHClientManager实例
+        """
+        # 延迟导入（避免未安装asyncssh时影响默认的thread后端）
+        try:
+            from .utils.async_ssh_client import AsyncSSHClientManager
+        except ImportError as e:
+            logger.error(f"异步SSH客户端模块导入失败（可能缺少asyncssh）: {e}")
+            raise ImportError("asyncssh 采集后端需要安装asyncssh库。请运行: pip install asyncssh") from e
+
+        ssh = self.ssh_connections.get(server_name)
+        if ssh is not None:
+            if ssh.is_alive():
+                return ssh
+            logger.warning(f"SSH连接失效，重新连接: {server_name}")
+            ssh.close()
+            del self.ssh_connections[server_name]
+
+        ssh = AsyncSSHClientManager(
+            host=connection["host"],
+            port=connection["port"],
+            username=connection["username"],
+            password=connection.get("password"),
+            key_path=connection.get("private_key_path"),
+            passphrase=connection.get("passphrase"),
+            timeout=connection.get("timeout", 10),
+        )
+        await ssh.connect()
+        self.ssh_connections[server_name] = ssh
+        return ssh
+
+    def _close_connections(self):
+        for server_name, ssh in list(self.ssh_connections.items()):
+            try:
+                ssh.close()
+            except Exception as e:
+                logger.error(f"关闭SSH连接失败 {server_name}: {e}")
+        self.ssh_connections.clear()
+
+    def reload_config(self):
+        """重新加载配置；不再启用的服务器连接在下一轮采集时由事件循环关闭"""
+        try:
+            logger.info("重新加载云服务器配置")
+            self.config_loader.reload()
+            self.local_hosts.clear()
+            if self.loop and self.loop.is_running():
+                self.loop.call_soon_threadsafe(self._drop_removed_connections)
+            configure_alerting(self.config_loader.get_global_config(), self.config_loader.get_servers(enabled_only=True))
+        except Exception as e:
+            logger.error(f"重新加载配置失败: {e}")
+
+    def _drop_removed_connections(self):
+        current_servers = {s["name"] for s in self.config_loader.get_servers(enabled_only=True)}
+        self._stop_agent_streams([name for name in self.agent_streams if name not in current_servers])
+        self.agent_unsupported.clear()
+        self.scheduler.clear()
+        for server_name in [name for name in self.rates.keys() if name not in current_servers]:
+            self.rates.forget(server_name)
+        for server_name in [name for name in self.history.servers() if name not in current_servers]:
+            self.history.forget(server_name)
+        for server_name in [name for name in self.ssh_connections if name not in current_servers]:
+            self.ssh_connections.pop(server_name).close()
+            logger.info(f"移除SSH连接: {server_name}")
@@ -1,32 +1,506 @@
 """
 云服务器数据采集器
 通过SSH远程执行命令采集Linux服务器的系统数据
+
+默认使用批量采集：一次 exec 执行 COLLECT_SCRIPT，脚本直接读取 /proc/stat、/proc/meminfo、
+/proc/loadavg、/proc/net/dev 和 df 等，输出以 "@@段名" 分隔的文本，一个周期只需一次网络往返。
+脚本输出不可解析（如目标机没有 /proc）时回退到逐条命令采集（collect_all_legacy）。
+主机信息、df、进程列表等分层指标组只在到达刷新时间时追加到脚本中（见 tiers.py）。
+
+CPU 使用率、磁盘 IO 和网卡速率由调用方用 rates.RateEngine 对相邻两次采集的原始计数器（data["counters"]）求差得到；
+还没有上一次计数器时，脚本在末尾间隔 CPU_SAMPLE_SECONDS 再读一次 /proc/stat，当次即可给出 CPU 使用率。
 """
 
 import logging
+import math
 import re
-from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
 
+from .rates import cpu_percent
 from .utils.ssh_client import SSHClientManager
 
 logger = logging.getLogger(__name__)
 
+# 段落分隔标记：脚本输出中以它开头的行表示新段落开始
+SECTION_MARKER = "@@"
+
+# 首次采集（没有上一次计数器）时两次读取 /proc/stat 的间隔（秒）
+CPU_SAMPLE_SECONDS = 0.2
+
+# 批量采集脚本（POSIX sh，只依赖 coreutils / procps）：每周期都采集的实时指标
+COLLECT_SCRIPT = """LC_ALL=C; export LC_ALL
+echo @@stat; grep '^cpu' /proc/stat
+echo @@uptime; cat /proc/uptime
+echo @@nproc; nproc 2>/dev/null || grep -c '^processor' /proc/cpuinfo
+echo @@loadavg; cat /proc/loadavg
+echo @@meminfo; cat /proc/meminfo
+echo @@net; cat /proc/net/dev
+echo @@diskstats; cat /proc/diskstats
+"""
+
+# 指标组 system：主机名、内核、启动时间（默认只采集一次，见 tiers.py）
+SYSTEM_SCRIPT = """echo @@hostname; hostname 2>/dev/null || cat /proc/sys/kernel/hostname
+echo @@uname; uname -a
+echo @@boot_time; uptime -s 2>/dev/null
+"""
+
+# 指标组 disk：分区容量
+DISK_SCRIPT = """echo @@df; df -P -B1 2>/dev/null
+"""
+
+# 配置了服务检查时追加：进程列表和监听端口（在 Python 侧按 process_pattern / port 匹配）
+SERVICES_SCRIPT = """echo @@ps; ps -eo pcpu=,pmem=,args= 2>/dev/null
+echo @@listen; ss -tlnH 2>/dev/null || netstat -tln 2>/dev/null
+"""
+
+# 首次采集时追加：间隔 cpu_sample 秒再读一次 /proc/stat
+CPU_SAMPLE_SCRIPT = """sleep {cpu_sample}
+echo @@stat_end; grep '^cpu' /proc/stat
+"""
+
+
+def build_collect_script(with_services: bool = False, cpu_sample: float = 0, groups: Optional[Set[str]] = None) -> str:
+    """
+    生成批量采集脚本
+
+    Args:
+        with_services: 是否采集进程列表和监听端口
+        cpu_sample: 大于 0 时在脚本内做一次短间隔 CPU 采样
+        groups: 本周期需要采集的分层指标组（system / disk / services），None 表示全部采集
+    """
+    script = COLLECT_SCRIPT
+    if groups is None or "system" in groups:
+        script += SYSTEM_SCRIPT
+    if groups is None or "disk" in groups:
+        script += DISK_SCRIPT
+    if with_services and (groups is None or "services" in groups):
+        script += SERVICES_SCRIPT
+    if cpu_sample > 0:
+        script += CPU_SAMPLE_SCRIPT.format(cpu_sample=cpu_sample)
+    return script
+
+
+def parse_sections(output: str) -> Dict[str, List[str]]:
+    """
+    把脚本输出拆分为 {段名: [行, ...]}
+
+    Raises:
+        ValueError: 输出中没有任何段落标记
+    """
+    sections = {}
+    current = None
+    for line in output.splitlines():
+        if line.startswith(SECTION_MARKER):
+            current = line[len(SECTION_MARKER) :].strip()
+            sections[current] = []
+        elif current is not None:
+            sections[current].append(line)
+    if not sections:
+        raise ValueError("采集脚本输出格式错误")
+    return sections
+
+
+def _first(lines: List[str], default: str = "") -> str:
+    return lines[0].strip() if lines else default
+
+
+def _human_size(num_bytes: int) -> str:
+    """与 df -h 相同的容量格式（1024 进制，小于 10 时保留 1 位小数）"""
+    value = float(num_bytes)
+    for unit in ("", "K", "M", "G", "T", "P"):
+        if value < 1024 or unit == "P":
+            break
+        value /= 1024
+    if not unit:
+        return str(int(value))
+    return f"{math.ceil(value * 10) / 10:.1f}{unit}" if value < 10 else f"{math.ceil(value):.0f}{unit}"
+
+
+def _df_percent(used: int, available: int) -> int:
+    """与 df 相同的使用率算法：used / (used + available) 向上取整"""
+    total = used + available
+    return math.ceil(used * 100 / total) if total else 0
+
+
+def _format_uptime(seconds: float) -> str:
+    """与 uptime -p 相同的格式，如 up 3 days, 2 hours, 5 minutes"""
+    minutes = int(seconds // 60)
+    days, minutes = divmod(minutes, 1440)
+    hours, minutes = divmod(minutes, 60)
+    parts = []
+    for value, unit in ((days, "day"), (hours, "hour"), (minutes, "minute")):
+        if value:
+            parts.append(f"{value} {unit}{'s' if value > 1 else ''}")
+    return "up " + ", ".join(parts or ["0 minutes"])
+
+
+def parse_cpu_times(lines: List[str]) -> Dict[str, List[int]]:
+    """解析 /proc/stat 的 cpu 行：{"cpu": [user, nice, system, idle, iowait, ...], "cpu0": [...]}"""
+    result = {}
+    for line in lines:
+        parts = line.split()
+        if parts and parts[0].startswith("cpu"):
+            # 只取前 8 列（guest 已计入 user）
+            result[parts[0]] = [int(x) for x in parts[1:9]]
+    return result
+
+
+def parse_diskstats(lines: List[str]) -> Dict[str, List[int]]:
+    """/proc/diskstats -> {设备: [读完成次数, 读扇区数, 写完成次数, 写扇区数, IO 耗时(ms)]}"""
+    result = {}
+    for line in lines:
+        values = line.split()
+        if len(values) >= 13:
+            result[values[2]] = [int(values[3]), int(values[5]), int(values[7]), int(values[9]), int(values[12])]
+    return result
+
+
+def build_system(hostname: str, kernel: str, uptime_seconds: float, boot_time: str = "") -> Dict:
+    if not boot_time:
+        boot_time = (datetime.now() - timedelta(seconds=uptime_seconds)).strftime("%Y-%m-%d %H:%M:%S")
+    return {
+        "platform": "Linux",
+        "hostname": hostname or "Unknown",
+        "kernel": kernel or "Unknown",
+        "uptime": _format_uptime(uptime_seconds),
+        "boot_time": boot_time,
+    }
+
+
+def parse_system(sections: Dict[str, List[str]]) -> Dict:
+    if "hostname" not in sections:
+        # 本周期未采集 system 组：只更新运行时长，其余字段由调用方用缓存补齐
+        return {"uptime": _format_uptime(float(_first(sections.get("uptime", []), "0").split()[0]))}
+    return build_system(
+        _first(sections.get("hostname", [])),
+        _first(sections.get("uname", [])),
+        float(_first(sections.get("uptime", []), "0").split()[0]),
+        _first(sections.get("boot_time", [])),
+    )
+
+
+def parse_cpu(sections: Dict[str, List[str]]) -> Dict:
+    start = parse_cpu_times(sections.get("stat", []))
+    end = parse_cpu_times(sections.get("stat_end", []))
+    load = (_first(sections.get("loadavg", []), "0 0 0").split() + ["0", "0", "0"])[:3]
+    nproc = _first(sections.get("nproc", []))
+    cores = int(nproc) if nproc.isdigit() else len([key for key in start if key != "cpu"])
+    return {
+        # 没有 stat_end 时为 0，由调用方按两次采集的计数器差值填充
+        "usage_percent": cpu_percent(start.get("cpu"), end.get("cpu")) or 0.0,
+        "cores": cores,
+        "load_avg_1": round(float(load[0]), 2),
+        "load_avg_5": round(float(load[1]), 2),
+        "load_avg_15": round(float(load[2]), 2),
+    }
+
+
+def parse_meminfo(lines: List[str]) -> Dict[str, int]:
+    """/proc/meminfo -> {字段: 字节数}"""
+    result = {}
+    for line in lines:
+        key, _, value = line.partition(":")
+        parts = value.split()
+        if parts and parts[0].isdigit():
+            result[key.strip()] = int(parts[0]) * (1024 if len(parts) > 1 and parts[1] == "kB" else 1)
+    return result
+
+
+def parse_memory(sections: Dict[str, List[str]]) -> Dict:
+    return build_memory(parse_meminfo(sections.get("meminfo", [])))
+
+
+def build_memory(mem: Dict[str, int]) -> Dict:
+    """由 /proc/meminfo 字段（字节）计算内存使用情况"""
+    total = mem.get("MemTotal", 0)
+    free = mem.get("MemFree", 0)
+    available = mem.get("MemAvailable", free)
+    # 与新版 free 命令一致：used = total - available（旧内核没有 MemAvailable 时扣除 buff/cache）
+    if "MemAvailable" in mem:
+        used = max(0, total - available)
+    else:
+        used = max(0, total - free - mem.get("Buffers", 0) - mem.get("Cached", 0) - mem.get("SReclaimable", 0))
+    swap_total = mem.get("SwapTotal", 0)
+    swap_free = mem.get("SwapFree", 0)
+    swap_used = swap_total - swap_free
+    return {
+        "total": total,
+        "used": used,
+        "free": free,
+        "available": available,
+        "usage_percent": round(used / total * 100, 2) if total else 0.0,
+        "swap_total": swap_total,
+        "swap_used": swap_used,
+        "swap_free": swap_free,
+        "swap_percent": round(swap_used / swap_total * 100, 2) if swap_total else 0.0,
+    }
+
+
+def parse_disk(sections: Dict[str, List[str]]) -> Dict:
+    rows = []
+    for line in sections.get("df", []):
+        parts = line.split()
+        if len(parts) < 6 or not parts[1].isdigit():
+            continue
+        rows.append((parts[0], int(parts[1]), int(parts[2]), int(parts[3]), parts[5]))
+    return build_disk(rows)
+
+
+def build_disk(rows: List) -> Dict:
+    """由 df 行 (设备, 总量, 已用, 可用, 挂载点)（字节）计算磁盘使用情况"""
+    root = None
+    partitions = []
+    for device, total, used, free, mountpoint in rows:
+        if mountpoint == "/":
+            root = (total, used, free)
+        if device.startswith("/dev/"):
+            partitions.append(
+                {
+                    "device": device,
+                    "total": _human_size(total),
+                    "used": _human_size(used),
+                    "free": _human_size(free),
+                    "usage_percent": f"{_df_percent(used, free)}%",
+                }
+            )
+    total, used, free = root or (0, 0, 0)
+    return {
+        "total": total,
+        "used": used,
+        "free": free,
+        "usage_percent": float(_df_percent(used, free)),
+        "partitions": partitions,
+    }
+
+
+def parse_net_dev(lines: List[str]) -> Dict[str, Dict[str, int]]:
+    """/proc/net/dev -> {网卡: {"bytes_recv", "packets_recv", "bytes_sent", "packets_sent"}}"""
+    result = {}
+    for line in lines:
+        name, sep, counters = line.partition(":")
+        values = counters.split()
+        if not sep or len(values) < 16:
+            continue
+        result[name.strip()] = {
+            "bytes_recv": int(values[0]),
+            "packets_recv": int(values[1]),
+            "bytes_sent": int(values[8]),
+            "packets_sent": int(values[9]),
+        }
+    return result
+
+
+def parse_network(sections: Dict[str, List[str]]) -> Dict:
+    return build_network(parse_net_dev(sections.get("net", [])))
+
+
+def build_network(interfaces: Dict[str, Dict[str, int]]) -> Dict:
+    # 与原逐条命令采集一致：取第一个 eth0 / ens* / enp* 网卡
+    primary = next((name for name in interfaces if re.match(r"(eth0|ens|enp)", name)), None)
+    counters = interfaces.get(primary, {})
+    return {
+        "bytes_recv": counters.get("bytes_recv", 0),
+        "bytes_sent": counters.get("bytes_sent", 0),
+        "interface": primary,
+    }
+
+
+def parse_services(sections: Dict[str, List[str]], services: List[Dict]) -> List[Dict]:
+    """按 process_pattern（正则）匹配进程列表、按端口匹配监听列表"""
+    processes = [
+        line.strip() for line in sections.get("ps", []) if line.strip() and SECTION_MARKER not in line and "args=" not in line
+    ]
+    listening = set()
+    for line in sections.get("listen", []):
+        for field in line.split():
+            port = field.rsplit(":", 1)[-1]
+            if ":" in field and port.isdigit():
+                listening.add(int(port))
+    return build_services(processes, listening, services)
+
+
+def build_services(processes: List[str], listening: Set[int], services: List[Dict]) -> List[Dict]:
+    """
+    Args:
+        processes: "pcpu pmem args" 格式的进程行
+        listening: 正在监听的 TCP 端口
+        services: 服务配置列表
+    """
+    results = []
+    for service_config in services:
+        service_name = service_config["name"]
+        port = service_config.get("port")
+        try:
+            pattern = re.compile(service_config.get("process_pattern", service_name))
+        except re.error:
+            pattern = re.compile(re.escape(service_config.get("process_pattern", service_name)))
+        process_info = next((line for line in processes if pattern.search(line.split(None, 2)[-1])), None)
+
+        cpu_usage = memory_usage = None
+        if process_info:
+            try:
+                cpu_usage, memory_usage = (float(x) for x in process_info.split()[:2])
+            except ValueError:
+                pass
+        results.append(
+            {
+                "name": service_name,
+                "type": service_config.get("type", "other"),
+                "status": "running" if process_info else "stopped",
+                "port": port,
+                "port_listening": (int(port) in listening) if port else None,
+                "cpu_usage": cpu_usage,
+                "memory_usage": memory_usage,
+                "process_info": process_info[:200] if process_info else None,
+            }
+        )
+    return results
+
+
+# 容器列表，格式：id|name|status|image|created
+DOCKER_PS_COMMAND = "docker ps -a --format '{{.ID}}|{{.Names}}|{{.Status}}|{{.Image}}|{{.CreatedAt}}'"
+
+# 容器资源使用，格式：name|cpu|mem
+DOCKER_STATS_COMMAND = "docker stats --no-stream --format '{{.Name}}|{{.CPUPerc}}|{{.MemUsage}}'"
+
+
+def parse_docker_ps(output: str) -> List[Dict]:
+    """解析 DOCKER_PS_COMMAND 的输出"""
+    containers = []
+    for line in output.split("\n"):
+        if line.strip():
+            parts = line.split("|")
+            if len(parts) >= 4:
+                # 解析状态（Up 2 hours 或 Exited (0) 2 hours ago）
+                status_str = parts[2]
+                is_running = status_str.startswith("Up")
+
+                containers.append(
+                    {
+                        "container_id": parts[0],  # Docker容器ID
+                        "name": parts[1],  # 容器名称
+                        "status": "running" if is_running else "stopped",
+                        "status_detail": status_str,
+                        "image": parts[3],
+                        "created": parts[4] if len(parts) > 4 else None,
+                    }
+                )
+    return containers
+
+
+def merge_docker_stats(containers: List[Dict], output: str):
+    """把 DOCKER_STATS_COMMAND 的输出合并到容器信息中"""
+    stats_dict = {}
+    for line in output.split("\n"):
+        if line.strip():
+            parts = line.split("|")
+            if len(parts) >= 3:
+                stats_dict[parts[0]] = {
+                    "cpu_percent": parts[1],
+                    "memory_usage": parts[2],
+                }
+
+    for container in containers:
+        if container["name"] in stats_dict:
+            container.update(stats_dict[container["name"]])
+
+
+def parse_collect_output(output: str, services: Optional[List[Dict]] = None) -> Dict:
+    """
+    把批量采集脚本的输出解析为与 collect_all_legacy() 相同结构的数据
+
+    本周期未采集的分层指标组（脚本中没有对应段落）不出现在结果中，system 只包含运行时长。
+    """
+    sections = parse_sections(output)
+    missing = {"stat", "meminfo", "net"} - set(sections)
+    if missing or not sections.get("meminfo"):
+        raise ValueError(f"采集脚本输出缺少段落: {sorted(missing) or ['meminfo']}")
+    data = {
+        "system": parse_system(sections),
+        "cpu": parse_cpu(sections),
+        "memory": parse_memory(sections),
+        "network": parse_network(sections),
+        "containers": [],  # Docker容器由外部调用collect_docker_containers添加
+        "counters": parse_counters(sections),  # 原始计数器，由调用方交给 RateEngine 后移除
+    }
+    if "df" in sections:
+        data["disk"] = parse_disk(sections)
+    if not services:
+        data["services"] = []
+    elif "ps" in sections:
+        data["services"] = parse_services(sections, services)
+    return data
+
+
+def parse_counters(sections: Dict[str, List[str]]) -> Dict:
+    """提取 RateEngine 需要的原始计数器（时间取远端 /proc/uptime，不受网络延迟影响）"""
+    return {
+        "t": float(_first(sections.get("uptime", []), "0").split()[0]),
+        "cpu": parse_cpu_times(sections.get("stat", [])),
+        "disk": parse_diskstats(sections.get("diskstats", [])),
+        "net": {
+            name: [v["bytes_recv"], v["packets_recv"], v["bytes_sent"], v["packets_sent"]]
+            for name, v in parse_net_dev(sections.get("net", [])).items()
+        },
+    }
+
 
 class CloudServerCollector:
     """云服务器数据采集器"""
 
-    def __init__(self, ssh_client: SSHClientManager):
+    def __init__(self, ssh_client: SSHClientManager, command_timeout: float = 30):
         """
         初始化数据采集器
 
         Args:
             ssh_client: SSH客户端管理器实例
+            command_timeout: 批量采集脚本的执行超时（秒）
         """
         self.ssh = ssh_client
+        self.command_timeout = command_timeout
 
-    def collect_all(self) -> Dict:
+    def collect_all(
+        self, services: Optional[List[Dict]] = None, cpu_sample: float = CPU_SAMPLE_SECONDS, groups: Optional[Set[str]] = None
+    ) -> Dict:
         """
-        采集所有数据
+        采集所有数据（批量模式：一次网络往返）
+
+        Args:
+            services: 要检查的服务配置列表（与系统指标在同一次往返中采集）
+            cpu_sample: 脚本内 CPU 采样间隔（秒），已有上一次计数器时传 0
+            groups: 本周期需要采集的分层指标组，None 表示全部采集（逐条命令回退时总是全部采集）
+
+        Returns:
+            包含所有监控数据的字典
+        """
+        try:
+            return self.collect_batched(services, cpu_sample, groups)
+        except ValueError as e:
+            # 只有脚本输出不可解析时才回退；超时 / 连接错误直接抛出，避免再发十几条命令
+            logger.warning(f"批量采集失败，回退到逐条命令采集: {e}")
+
+        data = self.collect_all_legacy()
+        if services:
+            data["services"] = [self.check_service(service_config) for service_config in services]
+        return data
+
+    def collect_batched(
+        self, services: Optional[List[Dict]] = None, cpu_sample: float = CPU_SAMPLE_SECONDS, groups: Optional[Set[str]] = None
+    ) -> Dict:
+        """
+        执行批量采集脚本并解析
+
+        Raises:
+            Exception: 命令执行失败或输出不完整
+        """
+        script = build_collect_script(with_services=bool(services), cpu_sample=cpu_sample, groups=groups)
+        result = self.ssh.execute_command(script, timeout=self.command_timeout)
+        return parse_collect_output(result["stdout"], services)
+
+    def collect_all_legacy(self) -> Dict:
+        """
+        逐条命令采集所有数据（每项指标一次网络往返，批量采集不可用时使用）
 
         Returns:
             包含所有监控数据的字典
@@ -358,51 +832,14 @@ class CloudServerCollector:
                 return []
 
             # 获取容器列表
-            # 格式：id|name|status|image|created
-            docker_cmd = "docker ps -a --format '{{.ID}}|{{.Names}}|{{.Status}}|{{.Image}}|{{.CreatedAt}}'"
-            docker_result = self.ssh.execute_command(docker_cmd)
-
-            containers = []
-            for line in docker_result["stdout"].split("\n"):
-                if line.strip():
-                    parts = line.split("|")
-                    if len(parts) >= 4:
-                        # 解析状态（Up 2 hours 或 Exited (0) 2 hours ago）
-                        status_str = parts[2]
-                        is_running = status_str.startswith("Up")
-
-                        containers.append(
-                            {
-                                "container_id": parts[0],  # Docker容器ID
-                                "name": parts[1],  # 容器名称
-                                "status": "running" if is_running else "stopped",
-                                "status_detail": status_str,
-                                "image": parts[3],
-                                "created": parts[4] if len(parts) > 4 else None,
-                            }
-                        )
+            docker_result = self.ssh.execute_command(DOCKER_PS_COMMAND)
+            containers = parse_docker_ps(docker_result["stdout"])
 
             # 如果有运行中的容器，获取资源使用情况
             if containers:
                 try:
-                    stats_cmd = "docker stats --no-stream --format '{{.Name}}|{{.CPUPerc}}|{{.MemUsage}}'"
-                    stats_result = self.ssh.execute_command(stats_cmd, timeout=10)
-
-                    # 将资源使用情况添加到容器信息中
-                    stats_dict = {}
-                    for line in stats_result["stdout"].split("\n"):
-                        if line.strip():
-                            parts = line.split("|")
-                            if len(parts) >= 3:
-                                stats_dict[parts[0]] = {
-                                    "cpu_percent": parts[1],
-                                    "memory_usage": parts[2],
-                                }
-
-                    # 合并资源使用信息
-                    for container in containers:
-                        if container["name"] in stats_dict:
-                            container.update(stats_dict[container["name"]])
+                    stats_result = self.ssh.execute_command(DOCKER_STATS_COMMAND, timeout=10)
+                    merge_docker_stats(containers, stats_result["stdout"])
                 except Exception as e:
                     logger.debug("获取Docker容器资源使用失败")
 
@@ -424,3 +861,46 @@ class CloudServerCollector:
             return result["exit_code"] == 0
         except Exception as e:
             return False
+
+
+class AsyncCloudServerCollector:
+    """
+    异步云服务器数据采集器（asyncssh 后端）
+
+    与 CloudServerCollector 输出结构相同。ssh_client 为 AsyncSSHClientManager，
+    系统指标和 Docker 容器在同一连接的不同通道上并行采集。
+    """
+
+    def __init__(self, ssh_client, command_timeout: float = 30):
+        self.ssh = ssh_client
+        self.command_timeout = command_timeout
+
+    async def collect_all(
+        self, services: Optional[List[Dict]] = None, cpu_sample: float = CPU_SAMPLE_SECONDS, groups: Optional[Set[str]] = None
+    ) -> Dict:
+        """执行批量采集脚本并解析（异步后端不做逐条命令回退）"""
+        script = build_collect_script(with_services=bool(services), cpu_sample=cpu_sample, groups=groups)
+        result = await self.ssh.execute_command(script, timeout=self.command_timeout)
+        return parse_collect_output(result["stdout"], services)
+
+    async def collect_docker_containers(self) -> List[Dict]:
+        """采集Docker容器信息（docker 不存在时命令返回非 0，直接返回空列表）"""
+        try:
+            docker_result = await self.ssh.execute_command(DOCKER_PS_COMMAND, timeout=self.command_timeout)
+            if docker_result["exit_code"] != 0:
+                logger.debug("Docker未安装或不可用")
+                return []
+            containers = parse_docker_ps(docker_result["stdout"])
+
+            if containers:
+                try:
+                    stats_result = await self.ssh.execute_command(DOCKER_STATS_COMMAND, timeout=10)
+                    merge_docker_stats(containers, stats_result["stdout"])
+                except Exception:
+                    logger.debug("获取Docker容器资源使用失败")
+
+            return containers
+
+        except Exception as e:
+            logger.error(f"采集Docker容器失败: {e}")
+            return []
@@ -1,6 +1,13 @@
 """
 云服务器监控后台任务
 定期采集云服务器数据并通过 WebSocket 推送给前端
+
+各服务器的采集在线程池中并发执行（采集耗时主要是 SSH 网络等待），每台服务器采集完成立即推送，
+不等待其他服务器。单台服务器采集超过 server_timeout 视为超时；上一轮仍未结束的服务器本轮跳过，
+慢服务器不会拖慢其他服务器，也不会在线程池里堆积。
+
+collect_mode 为 agent 的服务器不参与轮询：每轮只检查其常驻 Agent 流（见 agent.py）是否在运行，
+未运行则（重新）启动；样本由 Agent 流的读取线程逐条推送。
 """
 
 import hashlib
@@ -8,21 +15,35 @@ import logging
 import socket
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Dict
+from typing import Dict, List, Optional, Set
 
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 
-from .cloud_collectors import CloudServerCollector
+from .agent import AgentDecoder, AgentStream, build_agent_command
+from .alerts import configure_alerting
+from .cloud_collectors import CPU_SAMPLE_SECONDS, CloudServerCollector
 from .config.config_loader import get_config_loader
+from .history import get_metric_history
 from .local_collectors import get_local_collector
+from .rates import RateEngine, apply_rates
+from .tiers import MetricScheduler, resolve_tiers
 
 # SSHClientManager延迟导入（仅在需要SSH连接时导入，避免paramiko缺失导致模块加载失败）
 # from .utils.ssh_client import SSHClientManager
 
 logger = logging.getLogger(__name__)
 
+# 并发采集线程数上限（global.max_workers 未配置时使用）
+DEFAULT_MAX_WORKERS = 32
+
+
+def server_group_name(server_name: str) -> str:
+    """服务器对应的 WebSocket 频道组名（中文名转为 ASCII）"""
+    return f"cloud_monitor_{hashlib.md5(server_name.encode()).hexdigest()}"
+
 
 class CloudMonitorTask:
     """云服务器监控后台任务（类似SystemMonitorTask）"""
@@ -33,6 +54,16 @@ class CloudMonitorTask:
         self.channel_layer = get_channel_layer()
         self.config_loader = get_config_loader()
         self.ssh_connections = {}  # 缓存SSH连接 {server_name: SSHClientManager}
+        self.executor = None
+        self.max_workers = 0
+        self.in_flight = {}  # 正在采集的服务器 {server_name: (Future, 开始时间)}
+        self.local_hosts = {}  # 本机检测结果缓存 {host: bool}
+        self.agent_streams = {}  # 常驻 Agent 流 {server_name: AgentStream}
+        self.agent_unsupported = set()  # 没有 python3、已回退轮询的服务器
+        self.rates = RateEngine()  # 轮询模式各服务器上一次的原始计数器
+        self.scheduler = MetricScheduler()  # 分层指标组的刷新时间和缓存
+        self.history = get_metric_history()
+        self.global_config = {}  # 当前轮次的全局配置
 
     def start(self):
         """启动后台监控线程"""
@@ -46,8 +77,14 @@ class CloudMonitorTask:
         """停止后台监控线程"""
         self.running = False
 
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.in_flight.clear()
+        self._stop_agent_streams()
+
         # 关闭所有SSH连接
-        for server_name, ssh in self.ssh_connections.items():
+        for server_name, ssh in list(self.ssh_connections.items()):
             try:
                 ssh.close()
                 logger.info(f"关闭SSH连接: {server_name}")
@@ -104,6 +141,13 @@ class CloudMonitorTask:
             logger.warning(f"检测本机失败: {e}")
             return False
 
+    def _is_local_cached(self, host: str) -> bool:
+        """检测是否为本机（结果按主机缓存，避免每轮都做 DNS 解析）"""
+        is_local = self.local_hosts.get(host)
+        if is_local is None:
+            is_local = self.local_hosts[host] = self._is_localhost(host)
+        return is_local
+
     def _run(self):
         """后台线程运行方法"""
         while self.running:
@@ -120,40 +164,198 @@ class CloudMonitorTask:
                     time.sleep(interval)
                     continue
 
-                # 遍历所有服务器进行采集
-                for server_config in servers:
-                    try:
-                        # 采集单个服务器数据
-                        data = self._collect_server_data(server_config)
+                started = time.monotonic()
+                self.collect_round(servers, global_config)
 
-                        # 推送到WebSocket
-                        server_name = server_config["name"]
-                        group_name = f"cloud_monitor_{hashlib.md5(server_name.encode()).hexdigest()}"
+                # 等待下一次采集（按开始时间对齐，采集耗时不累加到周期上）
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
 
-                        async_to_sync(self.channel_layer.group_send)(
-                            group_name,
-                            {"type": "cloud_status_update", "data": data},
-                        )
+            except Exception as e:
+                logger.error(f"云监控任务异常: {e}")
+                time.sleep(10)
 
-                        logger.debug(f"数据采集并推送成功: {server_name}")
+    def collect_round(self, servers: List[Dict], global_config: Optional[Dict] = None) -> Dict[str, int]:
+        """
+        并发采集一轮：每台服务器提交到线程池，采集完成立即推送
 
-                    except Exception as e:
-                        server_name = server_config.get("name", "Unknown")
-                        logger.error(f"采集失败: {server_name} - {e}")
+        最多等待 server_timeout 秒；超时的采集不会被强行中断（SSH 命令本身也带同样的超时），
+        但会从本轮统计中记为超时，下一轮在它结束前跳过该服务器。
 
-                # 等待下一次采集
-                time.sleep(interval)
+        Returns:
+            本轮统计 {"submitted", "skipped", "completed", "failed", "timeout"}
+        """
+        global_config = global_config or {}
+        self.global_config = global_config
+        interval = global_config.get("collect_interval", 10)
+        server_timeout = global_config.get("server_timeout", interval)
+        executor = self._get_executor(global_config.get("max_workers") or min(DEFAULT_MAX_WORKERS, len(servers)))
+
+        jobs = {
+            "poll": self._collect_and_publish,
+            "agent_start": self._start_agent_stream,
+            "agent_refresh": self._refresh_agent_extra,
+        }
+        futures = {}
+        skipped = 0
+        for server_config in servers:
+            server_name = server_config["name"]
+            previous = self.in_flight.get(server_name)
+            if previous and not previous[0].done():
+                skipped += 1
+                logger.warning(f"上一轮采集尚未完成，跳过: {server_name} (已耗时 {time.monotonic() - previous[1]:.1f}s)")
+                continue
+            action = self._collect_action(server_config, global_config)
+            if action is None:
+                continue
+            future = executor.submit(jobs[action], server_config, server_timeout)
+            self.in_flight[server_name] = (future, time.monotonic())
+            futures[future] = server_name
+
+        done, not_done = wait(futures, timeout=server_timeout)
+        for future in not_done:
+            logger.warning(f"采集超时（{server_timeout}秒）: {futures[future]}")
+        failed = sum(1 for future in done if not future.result())
+        return {
+            "submitted": len(futures),
+            "skipped": skipped,
+            "completed": len(done) - failed,
+            "failed": failed,
+            "timeout": len(not_done),
+        }
+
+    def _collect_action(self, server_config: Dict, global_config: Dict) -> Optional[str]:
+        """
+        本轮对该服务器要做的事：
+        poll（轮询采集）/ agent_start（启动 Agent 流）/ agent_refresh（Agent 运行中，刷新 Docker 容器）/ None（无需处理）
+        """
+        server_name = server_config["name"]
+        monitoring = server_config.get("monitoring", {})
+        mode = monitoring.get("collect_mode", global_config.get("collect_mode", "poll"))
+        use_agent = (
+            mode == "agent"
+            and server_name not in self.agent_unsupported
+            and not self._is_local_cached(server_config["connection"]["host"])
+        )
 
-            except Exception as e:
-                logger.error(f"云监控任务异常: {e}")
-                time.sleep(10)
+        stream = self.agent_streams.get(server_name)
+        if not use_agent:
+            if stream:
+                # 配置改回轮询
+                self.agent_streams.pop(server_name).stop()
+            return "poll"
+        if stream is None or not stream.is_alive():
+            return "agent_start"
+        return "agent_refresh" if monitoring.get("enable_docker", False) else None
+
+    def _agent_command(self, server_config: Dict) -> str:
+        global_config = self.config_loader.get_global_config()
+        monitoring = server_config.get("monitoring", {})
+        interval = monitoring.get("agent_interval", global_config.get("agent_interval", 1))
+        # 慢变化数据（主机信息、df、进程列表）按采集周期刷新
+        slow_interval = global_config.get("collect_interval", 10)
+        return build_agent_command(interval, slow_interval, with_services=bool(monitoring.get("services")))
+
+    def _start_agent_stream(self, server_config: Dict, server_timeout: float = 30) -> bool:
+        """启动（或重启）服务器的常驻 Agent 流；目标机没有 python3 时回退到轮询采集"""
+        server_name = server_config["name"]
+        monitoring = server_config.get("monitoring", {})
+
+        previous = self.agent_streams.pop(server_name, None)
+        if previous:
+            previous.stop()
+            if previous.unsupported:
+                logger.warning(f"目标机没有 python3，回退到轮询采集: {server_name}")
+                self.agent_unsupported.add(server_name)
+                return self._collect_and_publish(server_config, server_timeout)
+            logger.warning(f"Agent 流已中断，重新启动: {server_name}")
 
-    def _collect_server_data(self, server_config: Dict) -> Dict:
+        try:
+            ssh = self._get_ssh_connection(server_name, server_config["connection"])
+            stream = AgentStream(
+                server_name,
+                ssh,
+                self._agent_command(server_config),
+                AgentDecoder(monitoring.get("services", [])),
+                self.publish_snapshot,
+            )
+            stream.start()
+        except Exception as e:
+            logger.error(f"Agent 启动失败: {server_name} - {e}")
+            return False
+
+        self.agent_streams[server_name] = stream
+        if monitoring.get("enable_docker", False):
+            self._refresh_agent_extra(server_config, server_timeout)
+        return True
+
+    def _refresh_agent_extra(self, server_config: Dict, server_timeout: float = 30) -> bool:
+        """Agent 不采集 Docker 容器，按采集周期单独刷新并合并到之后的每个样本"""
+        server_name = server_config["name"]
+        stream = self.agent_streams.get(server_name)
+        if stream is None:
+            return False
+        try:
+            collector = CloudServerCollector(stream.ssh, command_timeout=server_timeout)
+            stream.extra["containers"] = collector.collect_docker_containers()
+            return True
+        except Exception as e:
+            logger.error(f"采集Docker容器失败: {server_name} - {e}")
+            return False
+
+    def publish_snapshot(self, server_name: str, data: Dict):
+        """Agent 流回调：补充时间戳和服务器名称后推送"""
+        data["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        data["server_name"] = server_name
+        try:
+            self.publish(server_name, data)
+        except Exception as e:
+            logger.error(f"推送失败: {server_name} - {e}")
+
+    def _stop_agent_streams(self, server_names=None):
+        for server_name in list(server_names if server_names is not None else self.agent_streams):
+            stream = self.agent_streams.pop(server_name, None)
+            if stream:
+                stream.stop()
+
+    def _get_executor(self, max_workers: int) -> ThreadPoolExecutor:
+        """线程池在任务生命周期内复用，服务器数量变化导致并发数变化时重建"""
+        max_workers = max(1, int(max_workers))
+        if self.executor is None or max_workers != self.max_workers:
+            if self.executor:
+                # 旧线程池中仍在执行的采集继续完成，不等待
+                self.executor.shutdown(wait=False)
+            self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cloud-monitor")
+            self.max_workers = max_workers
+        return self.executor
+
+    def _collect_and_publish(self, server_config: Dict, server_timeout: float = 30) -> bool:
+        """采集单台服务器并推送到 WebSocket（在线程池中执行）"""
+        server_name = server_config.get("name", "Unknown")
+        try:
+            # 采集单个服务器数据
+            data = self._collect_server_data(server_config, server_timeout)
+            self.publish(server_name, data)
+            logger.debug(f"数据采集并推送成功: {server_name}")
+            return True
+        except Exception as e:
+            logger.error(f"采集失败: {server_name} - {e}")
+            return False
+
+    def publish(self, server_name: str, data: Dict):
+        """写入内存历史并推送单台服务器的数据到对应频道组"""
+        self.history.record(server_name, data)
+        async_to_sync(self.channel_layer.group_send)(
+            server_group_name(server_name),
+            {"type": "cloud_status_update", "data": data},
+        )
+
+    def _collect_server_data(self, server_config: Dict, server_timeout: float = 30) -> Dict:
         """
         采集单个服务器数据
 
         Args:
             server_config: 服务器配置字典
+            server_timeout: 单台服务器采集超时（秒）
 
         Returns:
             采集的数据字典
@@ -164,101 +366,125 @@ class CloudMonitorTask:
         host = connection["host"]
 
         logger.debug(f"开始采集: {server_name}")
+        due = self._due_groups(server_name, monitoring)
 
-        # 检测是否为本机
-        is_local = self._is_localhost(host)
-
-        if is_local:
-            # 使用本地采集器（无需SSH）
-            logger.info(f"检测到本机监控，使用本地采集器: {server_name}")
-
-            collector = get_local_collector()
-            data = collector.collect_all()
-
-            # Docker容器采集需要单独处理
-            if monitoring.get("enable_docker", False):
-                try:
-                    # 本地Docker采集使用Docker SDK（不需要docker CLI）
-                    import docker
-
-                    # 连接到本地Docker守护进程（通过socket）
-                    client = docker.from_env()
-
-                    # 获取所有容器（包括停止的）
-                    containers_list = client.containers.list(all=True)
-
-                    containers = []
-                    for container in containers_list:
-                        # 获取容器状态
-                        status = container.status  # running, exited, paused, etc.
-                        is_running = status == "running"
-
-                        # 获取创建时间
-                        created_time = container.attrs.get("Created", "")
-                        if created_time:
-                            # 转换ISO时间格式为可读格式
-                            try:
-                                dt = datetime.fromisoformat(created_time.replace("Z", "+00:00"))
-                                created = dt.strftime("%Y-%m-%d %H:%M:%S")
-                            except Exception:
-                                created = created_time[:19]  # 截取前19个字符
-                        else:
-                            created = ""
-
-                        # 获取镜像名称
-                        image_name = container.image.tags[0] if container.image.tags else container.image.short_id
-
-                        containers.append(
-                            {
-                                "container_id": container.short_id,  # 短ID（12位）
-                                "name": container.name,
-                                "status": "running" if is_running else "stopped",
-                                "status_detail": container.status,
-                                "image": image_name,
-                                "created": created,
-                            }
-                        )
-
-                    data["containers"] = containers
-
-                    # 关闭客户端连接
-                    client.close()
-
-                except Exception as e:
-                    logger.error(f"本地采集Docker容器失败: {e}")
-                    data["containers"] = []
+        if self._is_local_cached(host):
+            data = self._collect_local_data(server_name, monitoring, due)
         else:
             # 使用SSH远程采集器
-            logger.info(f"使用SSH远程采集: {server_name} ({host})")
+            logger.debug(f"使用SSH远程采集: {server_name} ({host})")
             ssh = self._get_ssh_connection(server_name, connection)
-            collector = CloudServerCollector(ssh)
-            data = collector.collect_all()
-
-            # 采集服务状态
-            services = monitoring.get("services", [])
-            if services:
-                data["services"] = []
-                for service_config in services:
-                    try:
-                        service_data = collector.check_service(service_config)
-                        data["services"].append(service_data)
-                    except Exception as e:
-                        logger.error(f"采集服务状态失败 {service_config.get('name')}: {e}")
+            collector = CloudServerCollector(ssh, command_timeout=server_timeout)
+            # 系统指标和服务状态在同一次 SSH 往返中采集
+            data = collector.collect_all(
+                services=monitoring.get("services", []), cpu_sample=self._cpu_sample(server_name), groups=due
+            )
+            self._apply_counters(server_name, data)
 
             # 采集Docker容器
-            if monitoring.get("enable_docker", False):
+            if monitoring.get("enable_docker", False) and "containers" in due:
                 try:
                     data["containers"] = collector.collect_docker_containers()
                 except Exception as e:
                     logger.error(f"采集Docker容器失败: {e}")
                     data["containers"] = []
 
+        # 未到刷新时间的指标组用缓存补齐
+        self.scheduler.merge(server_name, data, due)
+
         # 添加时间戳和服务器名称
         data["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         data["server_name"] = server_name
 
         return data
 
+    def _due_groups(self, server_name: str, monitoring: Dict):
+        """本周期需要采集的分层指标组（global / monitoring 中的 metric_tiers、slow_interval）"""
+        tiers, slow_interval = resolve_tiers(self.global_config, monitoring)
+        return self.scheduler.due(server_name, tiers, slow_interval)
+
+    def _cpu_sample(self, server_name: str) -> float:
+        """已有上一次计数器时 CPU 使用率按两次采集求差，脚本内不必再等待采样"""
+        return 0 if self.rates.has_baseline(server_name) else CPU_SAMPLE_SECONDS
+
+    def _apply_counters(self, server_name: str, data: Dict):
+        """用原始计数器计算 CPU / 磁盘 IO / 网卡速率并合并到快照（逐条命令回退采集时没有计数器）"""
+        counters = data.pop("counters", None)
+        if counters:
+            apply_rates(data, self.rates.update(server_name, counters))
+
+    def _collect_local_data(self, server_name: str, monitoring: Dict, due: Optional[Set[str]] = None) -> Dict:
+        """
+        本机采集（无需SSH）：系统指标用本地采集器，Docker容器用Docker SDK
+
+        Args:
+            server_name: 服务器名称
+            monitoring: 监控配置
+
+        Returns:
+            采集的数据字典
+        """
+        # 使用本地采集器（无需SSH）
+        logger.debug(f"检测到本机监控，使用本地采集器: {server_name}")
+
+        collector = get_local_collector()
+        data = collector.collect_all(services=monitoring.get("services", []), groups=due)
+
+        # Docker容器采集需要单独处理
+        if monitoring.get("enable_docker", False) and (due is None or "containers" in due):
+            try:
+                # 本地Docker采集使用Docker SDK（不需要docker CLI）
+                import docker
+
+                # 连接到本地Docker守护进程（通过socket）
+                client = docker.from_env()
+
+                # 获取所有容器（包括停止的）
+                containers_list = client.containers.list(all=True)
+
+                containers = []
+                for container in containers_list:
+                    # 获取容器状态
+                    status = container.status  # running, exited, paused, etc.
+                    is_running = status == "running"
+
+                    # 获取创建时间
+                    created_time = container.attrs.get("Created", "")
+                    if created_time:
+                        # 转换ISO时间格式为可读格式
+                        try:
+                            dt = datetime.fromisoformat(created_time.replace("Z", "+00:00"))
+                            created = dt.strftime("%Y-%m-%d %H:%M:%S")
+                        except Exception:
+                            created = created_time[:19]  # 截取前19个字符
+                    else:
+                        created = ""
+
+                    # 获取镜像名称
+                    image_name = container.image.tags[0] if container.image.tags else container.image.short_id
+
+                    containers.append(
+                        {
+                            "container_id": container.short_id,  # 短ID（12位）
+                            "name": container.name,
+                            "status": "running" if is_running else "stopped",
+                            "status_detail": container.status,
+                            "image": image_name,
+                            "created": created,
+                        }
+                    )
+
+                data["containers"] = containers
+
+                # 关闭客户端连接
+                client.close()
+
+            except Exception as e:
+                logger.error(f"本地采集Docker容器失败: {e}")
+                data["containers"] = []
+
+        return data
+
     def _get_ssh_connection(self, server_name: str, connection: Dict):
         """
         获取或创建SSH连接（支持连接池）
@@ -322,21 +548,34 @@ class CloudMonitorTask:
         try:
             logger.info("重新加载云服务器配置")
             self.config_loader.reload()
+            self.local_hosts.clear()
 
             # 关闭不再存在或被禁用的服务器连接
             current_servers = {s["name"] for s in self.config_loader.get_servers(enabled_only=True)}
             to_remove = []
 
-            for server_name in self.ssh_connections.keys():
+            for server_name in list(self.ssh_connections.keys()):
                 if server_name not in current_servers:
                     to_remove.append(server_name)
 
+            self._stop_agent_streams([name for name in self.agent_streams if name not in current_servers])
+            self.agent_unsupported.clear()
+            self.scheduler.clear()
+            for server_name in list(self.rates.keys()):
+                if server_name not in current_servers:
+                    self.rates.forget(server_name)
+            for server_name in self.history.servers():
+                if server_name not in current_servers:
+                    self.history.forget(server_name)
+
             for server_name in to_remove:
                 ssh = self.ssh_connections[server_name]
                 ssh.close()
                 del self.ssh_connections[server_name]
                 logger.info(f"移除SSH连接: {server_name}")
 
+            configure_alerting(self.config_loader.get_global_config(), self.config_loader.get_servers(enabled_only=True))
+
         except Exception as e:
             logger.error(f"重新加载配置失败: {e}")
 
@@ -349,12 +588,28 @@ def get_cloud_monitor_task() -> CloudMonitorTask:
     """
     获取云监控任务单例
 
+    按 cloud_servers.yaml 的 global.collector_backend 选择实现：
+    - thread（默认）：paramiko + 线程池
+    - asyncssh：asyncssh + 单线程事件循环
+
     Returns:
         CloudMonitorTask实例
     """
     global _cloud_monitor_task
     if _cloud_monitor_task is None:
-        _cloud_monitor_task = CloudMonitorTask()
+        try:
+            backend = get_config_loader().get_global_config().get("collector_backend", "thread")
+        except Exception:
+            backend = "thread"
+
+        if backend == "asyncssh":
+            from .async_cloud_tasks import AsyncCloudMonitorTask
+
+            _cloud_monitor_task = AsyncCloudMonitorTask()
+        else:
+            if backend != "thread":
+                logger.warning(f"未知的采集后端 {backend}，使用默认的 thread 后端")
+            _cloud_monitor_task = CloudMonitorTask()
     return _cloud_monitor_task
 
 
@@ -7,6 +7,10 @@ import json
 
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+# asgi.py 以 SkillSpace.myapps.monitor.routing 加载本模块，相对导入会得到另一份 alerts 模块（和另一个引擎单例），
+# 这里必须与 apps.py / views.py 一样按 monitor.alerts 导入
+from monitor.alerts import ALERT_GROUP_NAME, get_alert_engine
+
 
 class SystemMonitorConsumer(AsyncWebsocketConsumer):
     """
@@ -51,3 +55,27 @@ class SystemMonitorConsumer(AsyncWebsocketConsumer):
         """
         # 发送系统状态数据到 WebSocket
         await self.send(text_data=json.dumps({"type": "system_status", "data": event["data"]}))
+
+
+class AlertConsumer(AsyncWebsocketConsumer):
+    """
+    监控告警 WebSocket Consumer
+    连接时发送正在触发的告警，之后推送告警触发 / 恢复事件
+    """
+
+    async def connect(self):
+        """客户端连接时调用"""
+        await self.channel_layer.group_add(ALERT_GROUP_NAME, self.channel_name)
+        await self.accept()
+        await self.send(text_data=json.dumps({"type": "alerts_firing", "data": get_alert_engine().firing_alerts()}))
+
+    async def disconnect(self, close_code):
+        """客户端断开连接时调用"""
+        await self.channel_layer.group_discard(ALERT_GROUP_NAME, self.channel_name)
+
+    async def alert_event(self, event):
+        """
+        接收来自告警线程的告警事件
+        通过 channel_layer.group_send() 调用此方法
+        """
+        await self.send(text_data=json.dumps({"type": "alert", "data": event["data"]}))
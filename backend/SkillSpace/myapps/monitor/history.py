@@ -0,0 +1,166 @@
+"""
+监控指标内存历史（环形缓冲区）
+
+每台服务器一个固定容量的环形缓冲区：一列采样时间 + 每个指标一列数值（numpy float64），
+内存占用只与容量和指标数量有关（默认 3600 点 × 12 列 ≈ 340KB / 台），不随运行时间增长。
+本机监控任务和云服务器采集（轮询 / Agent）在推送快照的同时写入；页面加载时通过
+MetricHistoryView 取最近 N 分钟的数据直接填充图表，不必等待实时推送。
+每个采样点同时交给已注册的接收者（sinks）：启用持久化存储（global.enable_history）时为 storage.MetricStore，
+启用告警（global.enable_alerts）时为 alerts.AlertEngine。
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# 本机监控任务（system_monitor 频道组）使用的服务器名
+LOCAL_SERVER_NAME = "local"
+
+# 每台服务器保留的采样点数（collect_interval 为 1 秒时约 1 小时）
+DEFAULT_HISTORY_CAPACITY = 3600
+
+# 记录的指标：指标名 -> 快照中的路径
+HISTORY_METRICS = {
+    "cpu_usage": ("cpu", "usage_percent"),
+    "load_avg_1": ("cpu", "load_avg_1"),
+    "memory_usage": ("memory", "usage_percent"),
+    "swap_usage": ("memory", "swap_percent"),
+    "disk_usage": ("disk", "usage_percent"),
+    "disk_read_iops": ("disk_io", "read_iops"),
+    "disk_write_iops": ("disk_io", "write_iops"),
+    "disk_read_bytes": ("disk_io", "read_bytes_per_sec"),
+    "disk_write_bytes": ("disk_io", "write_bytes_per_sec"),
+    "net_recv_bytes": ("network_io", "recv_bytes_per_sec"),
+    "net_sent_bytes": ("network_io", "sent_bytes_per_sec"),
+}
+METRIC_NAMES = tuple(HISTORY_METRICS)
+
+
+def extract_metrics(data: Dict) -> List[float]:
+    """按 HISTORY_METRICS 的顺序取出快照中的指标值（缺失或非数值记为 NaN）"""
+    row = []
+    for path in HISTORY_METRICS.values():
+        value = data
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        row.append(float(value) if isinstance(value, (int, float)) else np.nan)
+    return row
+
+
+class MetricRing:
+    """单台服务器的环形缓冲区（线程安全）"""
+
+    def __init__(self, capacity: int, width: int):
+        self.capacity = capacity
+        self.times = np.zeros(capacity)
+        self.values = np.full((capacity, width), np.nan)
+        self.next = 0  # 下一个写入位置
+        self.size = 0
+        self._lock = threading.Lock()
+
+    def append(self, timestamp: float, row: Sequence[float]):
+        with self._lock:
+            self.times[self.next] = timestamp
+            self.values[self.next] = row
+            self.next = (self.next + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+
+    def since(self, start: float):
+        """
+        采样时间不早于 start 的数据（按时间顺序）
+
+        Returns:
+            (times, values)：一维时间数组和 (点数, 指标数) 的数值数组（副本）
+        """
+        with self._lock:
+            if self.size < self.capacity:
+                times, values = self.times[: self.size], self.values[: self.size]
+            else:
+                # 已写满：从最旧的位置展开
+                order = np.r_[self.next : self.capacity, 0 : self.next]
+                times, values = self.times[order], self.values[order]
+            first = int(np.searchsorted(times, start, side="left"))
+            return times[first:].copy(), values[first:].copy()
+
+
+class MetricHistory:
+    """所有服务器的内存历史"""
+
+    def __init__(self, capacity: int = DEFAULT_HISTORY_CAPACITY):
+        self.capacity = capacity
+        self.sinks = []  # 采样点接收者，需提供 add(server_name, timestamp, row)
+        self._rings = {}
+        self._lock = threading.Lock()
+
+    def record(self, server_name: str, data: Dict, timestamp: Optional[float] = None):
+        """写入一个快照（timestamp 为 Unix 时间戳，默认当前时间）"""
+        ring = self._rings.get(server_name)
+        if ring is None:
+            with self._lock:
+                ring = self._rings.setdefault(server_name, MetricRing(self.capacity, len(METRIC_NAMES)))
+        timestamp = time.time() if timestamp is None else timestamp
+        row = extract_metrics(data)
+        ring.append(timestamp, row)
+        for sink in self.sinks:
+            sink.add(server_name, timestamp, row)
+
+    def query(self, server_name: str, minutes: float, metrics: Optional[Sequence[str]] = None) -> Optional[Dict]:
+        """
+        最近 minutes 分钟的历史数据
+
+        Args:
+            server_name: 服务器名称（本机监控为 LOCAL_SERVER_NAME）
+            minutes: 时间范围（分钟）
+            metrics: 指标名列表，None 表示全部
+
+        Returns:
+            {"server_name", "timestamps": [Unix 时间戳], "series": {指标名: [数值或 None]}}，没有该服务器的数据时返回 None
+        """
+        ring = self._rings.get(server_name)
+        if ring is None:
+            return None
+        times, values = ring.since(time.time() - minutes * 60)
+        names = list(metrics) if metrics else METRIC_NAMES
+        series = {}
+        for name in names:
+            column = values[:, METRIC_NAMES.index(name)]
+            # NaN 转为 None（JSON null），图表中显示为断点
+            series[name] = [None if np.isnan(v) else round(float(v), 2) for v in column]
+        return {
+            "server_name": server_name,
+            "timestamps": [round(float(t), 3) for t in times],
+            "series": series,
+        }
+
+    def add_sink(self, sink):
+        if sink not in self.sinks:
+            self.sinks = self.sinks + [sink]
+
+    def remove_sink(self, sink):
+        self.sinks = [s for s in self.sinks if s is not sink]
+
+    def servers(self) -> List[str]:
+        return list(self._rings)
+
+    def forget(self, server_name: str):
+        with self._lock:
+            self._rings.pop(server_name, None)
+
+
+# 全局单例
+_metric_history = None
+
+
+def get_metric_history() -> MetricHistory:
+    """
+    获取内存历史单例
+
+    Returns:
+        MetricHistory实例
+    """
+    global _metric_history
+    if _metric_history is None:
+        _metric_history = MetricHistory()
+    return _metric_history
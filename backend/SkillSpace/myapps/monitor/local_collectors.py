@@ -7,25 +7,46 @@ Linux本地系统监控数据采集器
 import logging
 import platform
 import socket
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 
 from django.db import connection
 
 import psutil
 
+from .cloud_collectors import build_services
+from .rates import SECTOR_SIZE, RateEngine
+
 logger = logging.getLogger(__name__)
 
+# 两次 CPU 采样的最小间隔（秒）：间隔过短时返回上一次的结果，避免多个调用方互相缩短采样窗口
+MIN_CPU_SAMPLE_INTERVAL = 0.5
+
 
 class LocalLinuxCollector:
     """
     Linux本地系统数据采集器
     使用psutil直接读取本地系统信息，无需SSH连接
+
+    CPU 使用率不阻塞等待：初始化时预热 psutil 的计数器，之后每次采集以 interval=None
+    计算与上一次采集之间的使用率。
+
+    主机信息、分区、数据库、服务等分层指标组只在调用方指定时采集（见 tiers.py），
+    合并缓存由调用方的 MetricScheduler 完成。
     """
 
     def __init__(self):
         """初始化采集器"""
         self.hostname = socket.gethostname()
+        self.rates = RateEngine()
+        self._cpu_lock = threading.Lock()
+        # 预热：第一次 interval=None 调用只建立基准（返回 0.0）
+        psutil.cpu_percent(interval=None)
+        psutil.cpu_percent(interval=None, percpu=True)
+        self._cpu_sampled_at = time.monotonic()
+        self._cpu_sample = (0.0, [])
         logger.info(f"初始化本地Linux监控: {self.hostname}")
 
     def _bytes_to_gb(self, bytes_value):
@@ -40,25 +61,43 @@ class LocalLinuxCollector:
         """
         return round(bytes_value / (1024**3), 2)
 
-    def collect_all(self) -> Dict:
+    def collect_all(self, services: Optional[List[Dict]] = None, groups: Optional[Set[str]] = None) -> Dict:
         """
         采集所有系统数据
 
+        Args:
+            services: 服务配置列表（与云服务器 monitoring.services 相同），为空时不检查服务
+            groups: 本次需要采集的分层指标组（system / disk / database / services），None 表示全部采集；
+                未采集的指标组不出现在结果中，system 只包含运行时长
+
         Returns:
             包含所有监控数据的字典
         """
+
+        def due(group):
+            return groups is None or group in groups
+
         try:
-            return {
+            rates = self.rates.update("local", self.collect_counters())
+            data = {
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "system": self.collect_system_info(),
+                "system": self.collect_system_info() if due("system") else self.collect_uptime(),
                 "cpu": self.collect_cpu_info(),
                 "memory": self.collect_memory_info(),
-                "disk": self.collect_disk_info(),
                 "network": self.collect_network_info(),
-                "database": self.collect_database_info(),  # 添加数据库信息
-                "services": [],  # 可选：如果需要监控服务
+                "disk_io": rates.get("disk_io", {}),
+                "network_io": rates.get("network_io", {}),
                 "containers": [],  # 可选：如果需要监控Docker
             }
+            if due("disk"):
+                data["disk"] = self.collect_disk_info()
+            if due("database"):
+                data["database"] = self.collect_database_info()
+            if not services:
+                data["services"] = []
+            elif due("services"):
+                data["services"] = self.collect_services(services)
+            return data
         except Exception as e:
             logger.error(f"数据采集失败: {e}")
             raise
@@ -72,19 +111,6 @@ class LocalLinuxCollector:
         """
         try:
             boot_time = datetime.fromtimestamp(psutil.boot_time())
-            uptime_seconds = (datetime.now() - boot_time).total_seconds()
-
-            # 计算运行时间
-            days = int(uptime_seconds // 86400)
-            hours = int((uptime_seconds % 86400) // 3600)
-            minutes = int((uptime_seconds % 3600) // 60)
-
-            if days > 0:
-                uptime_str = f"{days}天 {hours}小时 {minutes}分钟"
-            elif hours > 0:
-                uptime_str = f"{hours}小时 {minutes}分钟"
-            else:
-                uptime_str = f"{minutes}分钟"
 
             return {
                 "hostname": self.hostname,
@@ -93,13 +119,41 @@ class LocalLinuxCollector:
                 "platform_version": platform.version(),
                 "architecture": platform.machine(),
                 "processor": platform.processor() or "Unknown",
-                "uptime": uptime_str,
+                "uptime": self._format_uptime(boot_time),
                 "boot_time": boot_time.strftime("%Y-%m-%d %H:%M:%S"),
             }
         except Exception as e:
             logger.error(f"采集系统信息失败: {e}")
             return {"hostname": self.hostname, "uptime": "Unknown"}
 
+    def collect_uptime(self) -> Dict:
+        """
+        只采集运行时长（系统信息使用缓存时每周期更新）
+
+        Returns:
+            {"uptime": 运行时长}
+        """
+        try:
+            return {"uptime": self._format_uptime(datetime.fromtimestamp(psutil.boot_time()))}
+        except Exception as e:
+            logger.error(f"采集运行时长失败: {e}")
+            return {"uptime": "Unknown"}
+
+    def _format_uptime(self, boot_time: datetime) -> str:
+        """运行时长，如 3天 2小时 5分钟"""
+        uptime_seconds = (datetime.now() - boot_time).total_seconds()
+
+        # 计算运行时间
+        days = int(uptime_seconds // 86400)
+        hours = int((uptime_seconds % 86400) // 3600)
+        minutes = int((uptime_seconds % 3600) // 60)
+
+        if days > 0:
+            return f"{days}天 {hours}小时 {minutes}分钟"
+        elif hours > 0:
+            return f"{hours}小时 {minutes}分钟"
+        return f"{minutes}分钟"
+
     def collect_cpu_info(self) -> Dict:
         """
         采集CPU信息
@@ -108,8 +162,8 @@ class LocalLinuxCollector:
             CPU信息字典
         """
         try:
-            # CPU使用率（等待1秒获取准确值）
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # CPU使用率（与上一次采样之间的平均值，不阻塞）
+            cpu_percent, per_core_usage = self.sample_cpu()
 
             # CPU核心数
             physical_cores = psutil.cpu_count(logical=False)
@@ -137,7 +191,7 @@ class LocalLinuxCollector:
                 "load_avg_1": load_avg_1,
                 "load_avg_5": load_avg_5,
                 "load_avg_15": load_avg_15,
-                "per_core_usage": [round(x, 2) for x in psutil.cpu_percent(percpu=True)],
+                "per_core_usage": per_core_usage,
             }
         except Exception as e:
             logger.error(f"采集CPU信息失败: {e}")
@@ -149,6 +203,23 @@ class LocalLinuxCollector:
                 "load_avg_15": 0,
             }
 
+    def sample_cpu(self):
+        """
+        CPU使用率（非阻塞）
+
+        Returns:
+            (总体使用率, 每核使用率列表)：自上一次采样以来的平均值；
+            距上一次采样不足 MIN_CPU_SAMPLE_INTERVAL 时返回上一次的结果
+        """
+        with self._cpu_lock:
+            now = time.monotonic()
+            if now - self._cpu_sampled_at >= MIN_CPU_SAMPLE_INTERVAL:
+                total = psutil.cpu_percent(interval=None)
+                per_core = [round(x, 2) for x in psutil.cpu_percent(interval=None, percpu=True)]
+                self._cpu_sample = (total, per_core)
+                self._cpu_sampled_at = now
+            return self._cpu_sample
+
     def collect_memory_info(self) -> Dict:
         """
         采集内存信息
@@ -264,6 +335,61 @@ class LocalLinuxCollector:
                 "packets_recv": 0,
             }
 
+    def collect_counters(self) -> Dict:
+        """
+        采集磁盘 / 网卡原始累计计数器，由 RateEngine 与上一次采集求差得到 IOPS、吞吐量和网卡速率
+
+        Returns:
+            RateEngine 计数器格式的字典（disk 的字节数换算为 512 字节扇区）
+        """
+        counters = {"t": time.monotonic(), "disk": {}, "net": {}}
+        try:
+            for name, io in (psutil.disk_io_counters(perdisk=True) or {}).items():
+                counters["disk"][name] = [
+                    io.read_count,
+                    io.read_bytes // SECTOR_SIZE,
+                    io.write_count,
+                    io.write_bytes // SECTOR_SIZE,
+                    getattr(io, "busy_time", 0),
+                ]
+            for name, io in (psutil.net_io_counters(pernic=True) or {}).items():
+                counters["net"][name] = [io.bytes_recv, io.packets_recv, io.bytes_sent, io.packets_sent]
+        except Exception as e:
+            logger.error(f"采集IO计数器失败: {e}")
+        return counters
+
+    def collect_services(self, services: List[Dict]) -> List[Dict]:
+        """
+        按配置检查本机服务（进程名正则 + 监听端口），结果格式与云服务器采集一致
+
+        进程 CPU 使用率为与上一次采集之间的平均值（process_iter() 会缓存 Process 对象，interval=None 不阻塞）；
+        每个进程的多个属性在 oneshot() 中一次读取。
+
+        Args:
+            services: 服务配置列表
+
+        Returns:
+            服务状态列表
+        """
+        processes = []
+        for proc in psutil.process_iter():
+            try:
+                with proc.oneshot():
+                    args = " ".join(proc.cmdline()) or proc.name()
+                    cpu_usage = proc.cpu_percent(interval=None)
+                    memory_usage = proc.memory_percent()
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+            processes.append(f"{cpu_usage:.1f} {memory_usage:.1f} {args}")
+
+        try:
+            listening = {conn.laddr.port for conn in psutil.net_connections(kind="tcp") if conn.status == psutil.CONN_LISTEN}
+        except (psutil.AccessDenied, OSError) as e:
+            logger.warning(f"读取监听端口失败: {e}")
+            listening = set()
+
+        return build_services(processes, listening, services)
+
     def check_service(self, service_name: str) -> Dict:
         """
         检查服务状态（可选功能）
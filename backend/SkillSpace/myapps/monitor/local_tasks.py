@@ -11,10 +11,15 @@ from datetime import datetime
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 
+from .history import LOCAL_SERVER_NAME, get_metric_history
 from .local_collectors import get_local_collector
+from .tiers import MetricScheduler, resolve_tiers
 
 logger = logging.getLogger(__name__)
 
+# 采集周期（秒）
+COLLECT_INTERVAL = 1
+
 
 class LocalMonitorTask:
     """Linux本地系统监控后台任务"""
@@ -24,6 +29,9 @@ class LocalMonitorTask:
         self.thread = None
         self.channel_layer = get_channel_layer()
         self.collector = get_local_collector()
+        self.scheduler = MetricScheduler()
+        self.history = get_metric_history()
+        self.tiers, self.slow_interval = resolve_tiers()
 
     def start(self):
         """启动后台监控线程"""
@@ -41,11 +49,15 @@ class LocalMonitorTask:
         logger.info("Linux本地系统监控后台任务已停止")
 
     def _run(self):
-        """后台线程运行方法"""
+        """后台线程运行方法（按固定节拍调度，采集耗时不累积）"""
+        next_tick = time.monotonic()
         while self.running:
             try:
                 # 采集系统数据
-                system_data = self.collector.collect_all()
+                # 主机信息、分区、数据库信息按分层频率刷新，其余每周期采集
+                due = self.scheduler.due("local", self.tiers, self.slow_interval)
+                system_data = self.scheduler.merge("local", self.collector.collect_all(groups=due), due)
+                self.history.record(LOCAL_SERVER_NAME, system_data)
 
                 # 通过 Channel Layer 发送数据到 WebSocket
                 # 使用与Windows监控相同的group名称,实现无缝切换
@@ -56,12 +68,16 @@ class LocalMonitorTask:
 
                 logger.debug("Linux本地监控数据推送成功")
 
-                # 等待1秒后继续下一次采集
-                time.sleep(1)
-
             except Exception as e:
                 logger.error(f"Linux本地监控任务出错: {e}")
-                time.sleep(1)
+
+            next_tick += COLLECT_INTERVAL
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # 采集耗时超过一个周期：跳过错过的节拍，从当前时间重新计时
+                next_tick = time.monotonic()
 
 
 # 全局单例
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.27 on 2026-10-19 03:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="MetricRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("server_name", models.CharField(help_text="服务器名称（本机监控为 local）", max_length=100)),
+                (
+                    "resolution",
+                    models.PositiveIntegerField(choices=[(60, "1分钟"), (3600, "1小时")], help_text="时间桶长度（秒）"),
+                ),
+                ("metric", models.CharField(help_text="指标名", max_length=32)),
+                ("bucket", models.BigIntegerField(help_text="时间桶起始时间（Unix 秒）")),
+                ("count", models.PositiveIntegerField(default=0, help_text="桶内采样数")),
+                ("min", models.FloatField(help_text="最小值")),
+                ("max", models.FloatField(help_text="最大值")),
+                ("avg", models.FloatField(help_text="平均值")),
+                ("p95", models.FloatField(help_text="95分位值")),
+            ],
+            options={
+                "verbose_name": "监控汇总",
+                "verbose_name_plural": "监控汇总",
+            },
+        ),
+        migrations.CreateModel(
+            name="MetricSample",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("server_name", models.CharField(help_text="服务器名称（本机监控为 local）", max_length=100)),
+                ("timestamp", models.BigIntegerField(help_text="采样时间（Unix 秒）")),
+                ("cpu_usage", models.FloatField(help_text="CPU使用率（%）", null=True)),
+                ("load_avg_1", models.FloatField(help_text="1分钟平均负载", null=True)),
+                ("memory_usage", models.FloatField(help_text="内存使用率（%）", null=True)),
+                ("swap_usage", models.FloatField(help_text="Swap使用率（%）", null=True)),
+                ("disk_usage", models.FloatField(help_text="磁盘使用率（%）", null=True)),
+                ("disk_read_iops", models.FloatField(help_text="磁盘读IOPS", null=True)),
+                ("disk_write_iops", models.FloatField(help_text="磁盘写IOPS", null=True)),
+                ("disk_read_bytes", models.FloatField(help_text="磁盘读吞吐量（字节/秒）", null=True)),
+                ("disk_write_bytes", models.FloatField(help_text="磁盘写吞吐量（字节/秒）", null=True)),
+                ("net_recv_bytes", models.FloatField(help_text="网络接收速率（字节/秒）", null=True)),
+                ("net_sent_bytes", models.FloatField(help_text="网络发送速率（字节/秒）", null=True)),
+            ],
+            options={
+                "verbose_name": "监控采样",
+                "verbose_name_plural": "监控采样",
+                "indexes": [models.Index(fields=["timestamp"], name="monitor_met_timesta_ae6dcd_idx")],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="metricsample",
+            constraint=models.UniqueConstraint(fields=("server_name", "timestamp"), name="uniq_metric_sample"),
+        ),
+        migrations.AddIndex(
+            model_name="metricrollup",
+            index=models.Index(fields=["resolution", "bucket"], name="monitor_met_resolut_7ac2ae_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="metricrollup",
+            constraint=models.UniqueConstraint(
+                fields=("server_name", "resolution", "metric", "bucket"), name="uniq_metric_rollup"
+            ),
+        ),
+    ]
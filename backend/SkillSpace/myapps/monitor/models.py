@@ -0,0 +1,73 @@
+# monitor/models.py
+from django.db import models
+
+
+class MetricSample(models.Model):
+    """
+    监控指标原始采样（每台服务器每秒最多一条）
+
+    宽表：每个指标一列（与 history.HISTORY_METRICS 对应），时间为 Unix 秒，一行即一个时间点。
+    """
+
+    server_name = models.CharField(max_length=100, help_text="服务器名称（本机监控为 local）")
+    timestamp = models.BigIntegerField(help_text="采样时间（Unix 秒）")
+    cpu_usage = models.FloatField(null=True, help_text="CPU使用率（%）")
+    load_avg_1 = models.FloatField(null=True, help_text="1分钟平均负载")
+    memory_usage = models.FloatField(null=True, help_text="内存使用率（%）")
+    swap_usage = models.FloatField(null=True, help_text="Swap使用率（%）")
+    disk_usage = models.FloatField(null=True, help_text="磁盘使用率（%）")
+    disk_read_iops = models.FloatField(null=True, help_text="磁盘读IOPS")
+    disk_write_iops = models.FloatField(null=True, help_text="磁盘写IOPS")
+    disk_read_bytes = models.FloatField(null=True, help_text="磁盘读吞吐量（字节/秒）")
+    disk_write_bytes = models.FloatField(null=True, help_text="磁盘写吞吐量（字节/秒）")
+    net_recv_bytes = models.FloatField(null=True, help_text="网络接收速率（字节/秒）")
+    net_sent_bytes = models.FloatField(null=True, help_text="网络发送速率（字节/秒）")
+
+    class Meta:
+        verbose_name = "监控采样"
+        verbose_name_plural = "监控采样"
+        constraints = [
+            models.UniqueConstraint(fields=["server_name", "timestamp"], name="uniq_metric_sample"),
+        ]
+        indexes = [
+            models.Index(fields=["timestamp"]),
+        ]
+
+    def __str__(self):
+        return f"{self.server_name} @ {self.timestamp}"
+
+
+class MetricRollup(models.Model):
+    """
+    监控指标降采样汇总（1 分钟 / 1 小时）
+
+    每台服务器、每个指标、每个时间桶一行，保存桶内的 min / max / avg / p95。
+    """
+
+    RESOLUTION_CHOICES = [
+        (60, "1分钟"),
+        (3600, "1小时"),
+    ]
+
+    server_name = models.CharField(max_length=100, help_text="服务器名称（本机监控为 local）")
+    resolution = models.PositiveIntegerField(choices=RESOLUTION_CHOICES, help_text="时间桶长度（秒）")
+    metric = models.CharField(max_length=32, help_text="指标名")
+    bucket = models.BigIntegerField(help_text="时间桶起始时间（Unix 秒）")
+    count = models.PositiveIntegerField(default=0, help_text="桶内采样数")
+    min = models.FloatField(help_text="最小值")
+    max = models.FloatField(help_text="最大值")
+    avg = models.FloatField(help_text="平均值")
+    p95 = models.FloatField(help_text="95分位值")
+
+    class Meta:
+        verbose_name = "监控汇总"
+        verbose_name_plural = "监控汇总"
+        constraints = [
+            models.UniqueConstraint(fields=["server_name", "resolution", "metric", "bucket"], name="uniq_metric_rollup"),
+        ]
+        indexes = [
+            models.Index(fields=["resolution", "bucket"]),
+        ]
+
+    def __str__(self):
+        return f"{self.server_name} {self.metric} {self.get_resolution_display()} @ {self.bucket}"
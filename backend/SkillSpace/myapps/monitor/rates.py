@@ -0,0 +1,191 @@
+"""
+基于差值的速率计算
+
+/proc/stat、/proc/diskstats、/proc/net/dev 都是单调递增的累计计数器。RateEngine 按服务器保存上一次的原始计数器，
+用相邻两次采样的差值除以时间间隔得到 CPU 使用率（总体 + 每核）、磁盘 IOPS / 吞吐量、每块网卡的收发速率。
+
+计数器回绕：当前值小于上一次时，上一次值在 32 位范围内按 2^32 回绕计算，否则按 2^64；
+回绕后算出的速率仍明显不合理（计数器被重置，如网卡重建、系统重启）时丢弃该项，以当前值作为新基准。
+
+输入的计数器格式（poll 模式由采集脚本输出解析，agent 模式由 Agent 直接给出，本机由 psutil 给出）：
+    {
+        "t": 采样时间（秒，单调时钟，如 /proc/uptime 或 time.monotonic()），
+        "cpu": {"cpu": [user, nice, system, idle, iowait, irq, softirq, steal], "cpu0": [...], ...},
+        "disk": {设备: [读完成次数, 读扇区数, 写完成次数, 写扇区数, IO 耗时(ms)]},
+        "net": {网卡: [接收字节, 接收包数, 发送字节, 发送包数]},
+    }
+"""
+
+import re
+import threading
+from typing import Dict, List, Optional
+
+# /proc/diskstats 的扇区固定为 512 字节（与设备实际扇区大小无关）
+SECTOR_SIZE = 512
+
+# 回绕后单项速率的合理上限（超过视为计数器重置）：400Gbit/s 网卡 / 磁盘
+MAX_BYTES_PER_SECOND = 50 * 1024**3
+MAX_OPS_PER_SECOND = 10**8
+
+# 分区名：sda1、vdb2、nvme0n1p1、mmcblk0p1（统计磁盘合计时跳过，避免与整盘重复计算）
+PARTITION_PATTERN = re.compile(r"^(?:[shv]d[a-z]+|xvd[a-z]+)\d+$|^(?:nvme\d+n\d+|mmcblk\d+)p\d+$")
+
+# 不统计的虚拟设备
+VIRTUAL_DISK_PREFIXES = ("loop", "ram", "zram", "fd", "sr")
+VIRTUAL_NIC_NAMES = ("lo",)
+
+
+def counter_delta(prev: int, cur: int) -> int:
+    """计数器差值（处理 32 / 64 位回绕）"""
+    if cur >= prev:
+        return cur - prev
+    wrap = 2**32 if prev < 2**32 else 2**64
+    return cur + wrap - prev
+
+
+def cpu_percent(prev: List[int], cur: List[int]) -> Optional[float]:
+    """两次 /proc/stat 采样之间的 CPU 使用率（idle + iowait 视为空闲）；计数器回退（重启）时返回 None"""
+    if not prev or not cur:
+        return None
+    prev, cur = prev[:8], cur[:8]
+    total = sum(cur) - sum(prev)
+    if total <= 0:
+        return None if total < 0 else 0.0
+    idle = sum(cur[3:5]) - sum(prev[3:5])
+    return round(max(0.0, min(100.0, (total - idle) * 100 / total)), 2)
+
+
+class RateEngine:
+    """按服务器保存上一次原始计数器并计算速率（线程安全）"""
+
+    def __init__(self):
+        self._previous = {}
+        self._lock = threading.Lock()
+
+    def has_baseline(self, key: str) -> bool:
+        return key in self._previous
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._previous)
+
+    def forget(self, key: str):
+        with self._lock:
+            self._previous.pop(key, None)
+
+    def update(self, key: str, counters: Dict) -> Dict:
+        """
+        记录本次计数器，返回与上一次相比的速率
+
+        Returns:
+            {
+                "interval": 两次采样间隔（秒），
+                "cpu": {"usage_percent", "per_core"}（无基准时为 None），
+                "disk_io": {"read_iops", "write_iops", "read_bytes_per_sec", "write_bytes_per_sec", "devices": {...}}，
+                "network_io": {"recv_bytes_per_sec", "sent_bytes_per_sec", "interfaces": {...}}，
+            }
+            第一次采样（或时间回退）只建立基准，返回 {}
+        """
+        with self._lock:
+            prev = self._previous.get(key)
+            self._previous[key] = counters
+        if prev is None:
+            return {}
+
+        interval = counters.get("t", 0) - prev.get("t", 0)
+        if interval <= 0:
+            # 时钟回退（远端重启后 uptime 归零）：以本次为新基准
+            return {}
+
+        return {
+            "interval": round(interval, 3),
+            "cpu": self._cpu_rates(prev.get("cpu", {}), counters.get("cpu", {})),
+            "disk_io": self._disk_rates(prev.get("disk", {}), counters.get("disk", {}), interval),
+            "network_io": self._net_rates(prev.get("net", {}), counters.get("net", {}), interval),
+        }
+
+    @staticmethod
+    def _cpu_rates(prev: Dict, cur: Dict) -> Optional[Dict]:
+        usage = cpu_percent(prev.get("cpu"), cur.get("cpu"))
+        if usage is None:
+            return None
+        cores = sorted((name for name in cur if name != "cpu"), key=lambda name: int(name[3:] or 0))
+        return {
+            "usage_percent": usage,
+            "per_core": [cpu_percent(prev.get(name), cur.get(name)) for name in cores],
+        }
+
+    @staticmethod
+    def _rate(prev: int, cur: int, interval: float, limit: float, scale: int = 1) -> Optional[float]:
+        # 回绕按原始计数器判断，之后再换算单位（如扇区 -> 字节）
+        value = counter_delta(prev, cur) * scale / interval
+        return None if value > limit else value
+
+    def _disk_rates(self, prev: Dict, cur: Dict, interval: float) -> Dict:
+        devices = {}
+        for name, values in cur.items():
+            old = prev.get(name)
+            if old is None or name.startswith(VIRTUAL_DISK_PREFIXES):
+                continue
+            reads = self._rate(old[0], values[0], interval, MAX_OPS_PER_SECOND)
+            read_bytes = self._rate(old[1], values[1], interval, MAX_BYTES_PER_SECOND, SECTOR_SIZE)
+            writes = self._rate(old[2], values[2], interval, MAX_OPS_PER_SECOND)
+            write_bytes = self._rate(old[3], values[3], interval, MAX_BYTES_PER_SECOND, SECTOR_SIZE)
+            if None in (reads, read_bytes, writes, write_bytes):
+                continue
+            busy_ms = counter_delta(old[4], values[4]) if len(values) > 4 and len(old) > 4 else 0
+            devices[name] = {
+                "read_iops": round(reads, 2),
+                "write_iops": round(writes, 2),
+                "read_bytes_per_sec": round(read_bytes),
+                "write_bytes_per_sec": round(write_bytes),
+                "util_percent": round(min(100.0, busy_ms / 10 / interval), 2),
+            }
+
+        whole_disks = [rates for name, rates in devices.items() if not PARTITION_PATTERN.match(name)]
+        return {
+            "read_iops": round(sum(d["read_iops"] for d in whole_disks), 2),
+            "write_iops": round(sum(d["write_iops"] for d in whole_disks), 2),
+            "read_bytes_per_sec": sum(d["read_bytes_per_sec"] for d in whole_disks),
+            "write_bytes_per_sec": sum(d["write_bytes_per_sec"] for d in whole_disks),
+            "devices": devices,
+        }
+
+    def _net_rates(self, prev: Dict, cur: Dict, interval: float) -> Dict:
+        interfaces = {}
+        for name, values in cur.items():
+            old = prev.get(name)
+            if old is None:
+                continue
+            recv = self._rate(old[0], values[0], interval, MAX_BYTES_PER_SECOND)
+            sent = self._rate(old[2], values[2], interval, MAX_BYTES_PER_SECOND)
+            recv_packets = self._rate(old[1], values[1], interval, MAX_OPS_PER_SECOND)
+            sent_packets = self._rate(old[3], values[3], interval, MAX_OPS_PER_SECOND)
+            if None in (recv, sent, recv_packets, sent_packets):
+                continue
+            interfaces[name] = {
+                "recv_bytes_per_sec": round(recv),
+                "sent_bytes_per_sec": round(sent),
+                "recv_packets_per_sec": round(recv_packets, 2),
+                "sent_packets_per_sec": round(sent_packets, 2),
+            }
+
+        physical = [rates for name, rates in interfaces.items() if name not in VIRTUAL_NIC_NAMES]
+        return {
+            "recv_bytes_per_sec": sum(i["recv_bytes_per_sec"] for i in physical),
+            "sent_bytes_per_sec": sum(i["sent_bytes_per_sec"] for i in physical),
+            "interfaces": interfaces,
+        }
+
+
+def apply_rates(data: Dict, rates: Dict):
+    """把 RateEngine.update() 的结果合并到快照（cpu.usage_percent / per_core_usage、disk_io、network_io）"""
+    if not rates:
+        return data
+    cpu = rates.get("cpu")
+    if cpu:
+        data.setdefault("cpu", {})["usage_percent"] = cpu["usage_percent"]
+        data["cpu"]["per_core_usage"] = cpu["per_core"]
+    data["disk_io"] = rates["disk_io"]
+    data["network_io"] = rates["network_io"]
+    return data
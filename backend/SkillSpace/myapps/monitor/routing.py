@@ -10,6 +10,8 @@ from . import consumers
 websocket_urlpatterns = [
     # Windows本地监控路由
     re_path(r"ws/monitor/system/$", consumers.SystemMonitorConsumer.as_asgi()),
+    # 告警事件路由（所有服务器）
+    re_path(r"ws/monitor/alerts/$", consumers.AlertConsumer.as_asgi()),
     # 云服务器监控路由（新增）
     # URL格式：ws://host/ws/monitor/cloud/<server_name>/
     # 例如：ws://localhost:8000/ws/monitor/cloud/生产服务器/
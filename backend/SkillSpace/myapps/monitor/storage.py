@@ -0,0 +1,296 @@
+"""
+监控指标持久化存储（降采样）
+
+global.enable_history 为 true 时，MetricHistory 收到的每个快照同时交给 MetricStore（sinks）：
+    原始层：每台服务器每秒最多一条（MetricSample，宽表），后台线程每 flush_interval 秒批量写入
+    1 分钟 / 1 小时层：采样到达时在内存中按时间桶累积，桶结束时用 numpy 计算 min / max / avg / p95（MetricRollup）
+各层按 retention_days 定期清理。
+
+查询时按时间范围选择分辨率：在保留期覆盖起始时间的前提下，选择点数不超过 max_points 的最细一层，
+例如 30 天的图表读取 1 小时层（720 个点），而不是数百万条原始采样。
+服务重启时尚未结束的时间桶会丢失。
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+from django.db import close_old_connections
+
+import numpy as np
+
+from .history import METRIC_NAMES
+from .models import MetricRollup, MetricSample
+
+logger = logging.getLogger(__name__)
+
+RAW_RESOLUTION = 1
+MINUTE_RESOLUTION = 60
+HOUR_RESOLUTION = 3600
+ROLLUP_RESOLUTIONS = (MINUTE_RESOLUTION, HOUR_RESOLUTION)
+
+# 配置中的层名 -> 分辨率（秒）
+TIER_RESOLUTIONS = {"raw": RAW_RESOLUTION, "minute": MINUTE_RESOLUTION, "hour": HOUR_RESOLUTION}
+
+# 各层默认保留天数
+DEFAULT_RETENTION_DAYS = {"raw": 1, "minute": 30, "hour": 365}
+
+# 批量写入间隔（秒）
+DEFAULT_FLUSH_INTERVAL = 10
+
+# 过期数据清理间隔（秒）
+PURGE_INTERVAL = 3600
+
+# 查询返回的最大点数（用于选择分辨率）
+DEFAULT_MAX_POINTS = 1500
+
+
+def summarize(rows: Sequence[Sequence[float]]) -> List[Optional[Dict]]:
+    """
+    计算一个时间桶内每个指标的统计值
+
+    Args:
+        rows: (采样数, 指标数) 的数值，缺失值为 NaN
+
+    Returns:
+        与 METRIC_NAMES 对应的列表：{"count", "min", "max", "avg", "p95"}，该指标在桶内没有数据时为 None
+    """
+    values = np.asarray(rows, dtype=float)
+    counts = np.count_nonzero(~np.isnan(values), axis=0)
+    result = [None] * values.shape[1]
+    present = counts > 0
+    if not present.any():
+        return result
+    data = values[:, present]
+    stats = zip(
+        np.flatnonzero(present),
+        counts[present],
+        np.nanmin(data, axis=0),
+        np.nanmax(data, axis=0),
+        np.nanmean(data, axis=0),
+        np.nanpercentile(data, 95, axis=0),
+    )
+    for index, count, low, high, mean, p95 in stats:
+        result[index] = {
+            "count": int(count),
+            "min": round(float(low), 4),
+            "max": round(float(high), 4),
+            "avg": round(float(mean), 4),
+            "p95": round(float(p95), 4),
+        }
+    return result
+
+
+class MetricStore:
+    """降采样持久化存储（add 可在任意线程调用，写库在后台线程中批量进行）"""
+
+    def __init__(self, retention_days: Optional[Dict] = None, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.retention_days = dict(DEFAULT_RETENTION_DAYS)
+        self.flush_interval = flush_interval
+        self.configure(retention_days=retention_days, flush_interval=flush_interval)
+        self._pending_samples = []
+        self._pending_rollups = []
+        self._buckets = {}  # (服务器, 分辨率) -> [桶起始时间, [采样行, ...]]
+        self._last_second = {}  # 服务器 -> 最近写入原始层的秒
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.thread = None
+        self.last_purge = 0.0
+
+    def configure(self, retention_days: Optional[Dict] = None, flush_interval: Optional[float] = None):
+        """更新保留天数 / 写入间隔（global.history）"""
+        for tier, days in (retention_days or {}).items():
+            if tier not in TIER_RESOLUTIONS:
+                logger.warning(f"忽略未知的历史数据层: {tier}")
+                continue
+            self.retention_days[tier] = float(days)
+        if flush_interval:
+            self.flush_interval = float(flush_interval)
+
+    def retention_seconds(self, resolution: int) -> float:
+        tier = next(name for name, value in TIER_RESOLUTIONS.items() if value == resolution)
+        return self.retention_days[tier] * 86400
+
+    def add(self, server_name: str, timestamp: float, row: Sequence[float]):
+        """记录一个采样点（row 与 METRIC_NAMES 对应）"""
+        second = int(timestamp)
+        with self._lock:
+            if self._last_second.get(server_name) != second:
+                self._last_second[server_name] = second
+                fields = {name: (None if np.isnan(value) else value) for name, value in zip(METRIC_NAMES, row)}
+                self._pending_samples.append(MetricSample(server_name=server_name, timestamp=second, **fields))
+
+            for resolution in ROLLUP_RESOLUTIONS:
+                bucket = second - second % resolution
+                current = self._buckets.get((server_name, resolution))
+                if current is None or current[0] != bucket:
+                    if current is not None:
+                        self._close_bucket(server_name, resolution, *current)
+                    current = self._buckets[(server_name, resolution)] = [bucket, []]
+                current[1].append(row)
+
+    def _close_bucket(self, server_name: str, resolution: int, bucket: int, rows: List):
+        """时间桶结束：计算统计值并加入待写入队列（调用方持有锁）"""
+        for metric, stats in zip(METRIC_NAMES, summarize(rows)):
+            if stats:
+                self._pending_rollups.append(
+                    MetricRollup(server_name=server_name, resolution=resolution, metric=metric, bucket=bucket, **stats)
+                )
+
+    def flush(self) -> int:
+        """把待写入的采样和汇总批量写入数据库，返回写入条数"""
+        with self._lock:
+            samples, self._pending_samples = self._pending_samples, []
+            rollups, self._pending_rollups = self._pending_rollups, []
+        if not samples and not rollups:
+            return 0
+        try:
+            # 同一时间点重复写入（如重启后同一秒）时忽略
+            MetricSample.objects.bulk_create(samples, batch_size=1000, ignore_conflicts=True)
+            MetricRollup.objects.bulk_create(rollups, batch_size=1000, ignore_conflicts=True)
+        finally:
+            close_old_connections()
+        return len(samples) + len(rollups)
+
+    def purge(self, now: Optional[float] = None) -> int:
+        """删除超过保留期的数据，返回删除条数"""
+        now = time.time() if now is None else now
+        try:
+            deleted, _ = MetricSample.objects.filter(timestamp__lt=now - self.retention_seconds(RAW_RESOLUTION)).delete()
+            for resolution in ROLLUP_RESOLUTIONS:
+                count, _ = MetricRollup.objects.filter(
+                    resolution=resolution, bucket__lt=now - self.retention_seconds(resolution)
+                ).delete()
+                deleted += count
+        finally:
+            close_old_connections()
+        return deleted
+
+    def start(self):
+        """启动后台写入线程"""
+        if self.thread is None or not self.thread.is_alive():
+            self._stop.clear()
+            self.thread = threading.Thread(target=self._run, name="metric-store", daemon=True)
+            self.thread.start()
+            logger.info("监控历史数据存储已启动")
+
+    def stop(self):
+        """停止后台线程并写入剩余数据（未结束的时间桶不写入）"""
+        self._stop.set()
+        if self.thread:
+            self.thread.join(timeout=10)
+        self.flush()
+        logger.info("监控历史数据存储已停止")
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                written = self.flush()
+                logger.debug(f"监控历史数据写入 {written} 条")
+                if time.time() - self.last_purge >= PURGE_INTERVAL:
+                    self.last_purge = time.time()
+                    logger.info(f"清理过期监控历史数据 {self.purge()} 条")
+            except Exception as e:
+                logger.error(f"监控历史数据写入失败: {e}")
+
+    def pick_resolution(
+        self, start: float, end: float, max_points: int = DEFAULT_MAX_POINTS, now: Optional[float] = None
+    ) -> int:
+        """选择保留期覆盖 start、点数不超过 max_points 的最细分辨率（都不满足时用 1 小时层）"""
+        now = time.time() if now is None else now
+        for resolution in (RAW_RESOLUTION,) + ROLLUP_RESOLUTIONS:
+            if (end - start) / resolution <= max_points and start >= now - self.retention_seconds(resolution):
+                return resolution
+        return HOUR_RESOLUTION
+
+    def query(
+        self,
+        server_name: str,
+        start: float,
+        end: float,
+        metrics: Optional[Sequence[str]] = None,
+        max_points: int = DEFAULT_MAX_POINTS,
+        resolution: Optional[int] = None,
+    ) -> Dict:
+        """
+        查询历史数据（自动选择分辨率）
+
+        Args:
+            server_name: 服务器名称
+            start / end: 时间范围（Unix 秒）
+            metrics: 指标名列表，None 表示全部
+            max_points: 返回的最大点数，用于选择分辨率
+            resolution: 指定分辨率（1 / 60 / 3600），不指定时自动选择
+
+        Returns:
+            {"server_name", "resolution", "timestamps": [Unix 秒], "series": {指标名: {"avg", "min", "max", "p95": [...]}}}
+            原始层只有 avg；某个时间点没有该指标时为 None
+        """
+        metrics = list(metrics) if metrics else list(METRIC_NAMES)
+        resolution = resolution or self.pick_resolution(start, end, max_points)
+        if resolution == RAW_RESOLUTION:
+            rows = list(
+                MetricSample.objects.filter(server_name=server_name, timestamp__gte=start, timestamp__lte=end)
+                .order_by("timestamp")
+                .values_list("timestamp", *metrics)
+            )
+            timestamps = [row[0] for row in rows]
+            series = {name: {"avg": [row[i + 1] for row in rows]} for i, name in enumerate(metrics)}
+        else:
+            rows = (
+                MetricRollup.objects.filter(
+                    server_name=server_name,
+                    resolution=resolution,
+                    metric__in=metrics,
+                    bucket__gte=start - start % resolution,
+                    bucket__lte=end,
+                )
+                .order_by("bucket")
+                .values_list("bucket", "metric", "min", "max", "avg", "p95")
+            )
+            timestamps = sorted({row[0] for row in rows})
+            index = {bucket: i for i, bucket in enumerate(timestamps)}
+            series = {name: {key: [None] * len(timestamps) for key in ("avg", "min", "max", "p95")} for name in metrics}
+            for bucket, metric, low, high, mean, p95 in rows:
+                column = series[metric]
+                i = index[bucket]
+                column["min"][i], column["max"][i], column["avg"][i], column["p95"][i] = low, high, mean, p95
+
+        return {"server_name": server_name, "resolution": resolution, "timestamps": timestamps, "series": series}
+
+
+# 全局单例
+_metric_store = None
+
+
+def get_metric_store() -> MetricStore:
+    """
+    获取持久化存储单例
+
+    Returns:
+        MetricStore实例
+    """
+    global _metric_store
+    if _metric_store is None:
+        _metric_store = MetricStore()
+    return _metric_store
+
+
+def start_history_storage(global_config: Dict) -> Optional[MetricStore]:
+    """
+    按全局配置启用持久化存储（global.enable_history、global.history）
+
+    Returns:
+        启用时返回 MetricStore，否则返回 None
+    """
+    from .history import get_metric_history
+
+    if not global_config.get("enable_history", False):
+        return None
+    options = global_config.get("history") or {}
+    store = get_metric_store()
+    store.configure(retention_days=options.get("retention_days"), flush_interval=options.get("flush_interval"))
+    store.start()
+    get_metric_history().add_sink(store)
+    return store
@@ -1,7 +1,7 @@
 # monitor/tasks.py
 """
 系统监控后台任务
-每秒采集一次系统数据并通过 WebSocket 推送给前端
+每秒采集一次系统数据并通过 WebSocket 推送给前端，同时写入监控指标历史（LOCAL_SERVER_NAME）
 """
 import logging
 import platform
@@ -15,6 +15,8 @@ import psutil
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 
+from .history import LOCAL_SERVER_NAME, get_metric_history
+
 logger = logging.getLogger(__name__)
 
 
@@ -25,6 +27,7 @@ class SystemMonitorTask:
         self.running = False
         self.thread = None
         self.channel_layer = get_channel_layer()
+        self.history = get_metric_history()
 
     def start(self):
         """启动后台监控线程"""
@@ -47,6 +50,7 @@ class SystemMonitorTask:
             try:
                 # 采集系统数据
                 system_data = self._collect_system_data()
+                self.history.record(LOCAL_SERVER_NAME, system_data)
 
                 # 通过 Channel Layer 发送数据到 WebSocket
                 async_to_sync(self.channel_layer.group_send)(
@@ -134,6 +138,7 @@ class SystemMonitorTask:
         """获取磁盘信息"""
         disk_partitions = psutil.disk_partitions()
         disk_list = []
+        total_size = total_used = 0
 
         for partition in disk_partitions:
             try:
@@ -149,6 +154,8 @@ class SystemMonitorTask:
                         "usage_percent": round(usage.percent, 2),
                     }
                 )
+                total_size += usage.total
+                total_used += usage.used
             except PermissionError:
                 continue
 
@@ -165,7 +172,9 @@ class SystemMonitorTask:
             else {}
         )
 
-        return {"partitions": disk_list, "io_stats": io_stats}
+        # 所有分区的总使用率（与 Linux 本地监控一致，写入历史和告警的 disk_usage）
+        usage_percent = round(total_used / total_size * 100, 2) if total_size > 0 else 0
+        return {"partitions": disk_list, "io_stats": io_stats, "usage_percent": usage_percent}
 
     def _get_network_info(self):
         """获取网络信息"""
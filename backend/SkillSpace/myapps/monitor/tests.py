@@ -0,0 +1,82 @@
+# monitor/tests.py
+"""
+系统监控回归测试
+
+运行：cd backend && python manage.py test monitor
+"""
+
+from django.test import SimpleTestCase, override_settings
+
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+
+from .alerts import AlertEngine, build_rules
+from .history import METRIC_NAMES
+from .rates import RateEngine
+
+IN_MEMORY_LAYER = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+
+def _row(cpu_usage):
+    row = [10.0] * len(METRIC_NAMES)
+    row[METRIC_NAMES.index("cpu_usage")] = cpu_usage
+    return row
+
+
+class AlertEngineTests(SimpleTestCase):
+    def setUp(self):
+        self.engine = AlertEngine()
+        self.engine.configure(build_rules({"alerts": {"cpu_warning": 80, "hysteresis": 5}}, [{"name": "s1"}]))
+
+    def test_spike_between_evaluations_fires(self):
+        """两次判断之间的短时尖峰也参与判断"""
+        for k in range(10):
+            self.engine.add("s1", 1000 + k * 0.1, _row(95 if k == 3 else 20))
+        events = self.engine.evaluate(now=1001)
+        self.assertEqual([(event["event"], event["alert"]["value"]) for event in events], [("firing", 95.0)])
+
+    def test_hysteresis_and_stale_resolve(self):
+        self.engine.add("s1", 1000, _row(90))
+        self.engine.evaluate(now=1000)
+        self.engine.add("s1", 1001, _row(77))  # 低于阈值但未低于 阈值 - hysteresis
+        self.assertEqual(self.engine.evaluate(now=1001), [])
+        # 停止上报超过 stale_seconds 后恢复
+        events = self.engine.evaluate(now=1001 + self.engine.stale_seconds + 1)
+        self.assertEqual([(event["event"], event["alert"]["reason"]) for event in events], [("resolved", "stale")])
+        self.assertEqual(self.engine.firing_alerts(), [])
+
+
+class RateEngineTests(SimpleTestCase):
+    def test_sector_counter_wrap(self):
+        """32 位扇区计数器回绕按扇区数判断，换算成字节后不会被当成异常值丢弃"""
+        engine = RateEngine()
+        engine.update("s1", {"t": 0, "disk": {"sda": [0, 2**32 - 10, 0, 0]}})
+        rates = engine.update("s1", {"t": 1, "disk": {"sda": [0, 5, 0, 0]}})
+        self.assertEqual(rates["disk_io"]["devices"]["sda"]["read_bytes_per_sec"], 15 * 512)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER)
+class AlertConsumerTests(SimpleTestCase):
+    def test_snapshot_uses_configured_engine(self):
+        """asgi.py 按 SkillSpace.myapps.monitor 加载 Consumer，连接时的快照仍来自 monitor.alerts 的引擎单例"""
+        from monitor.alerts import get_alert_engine
+
+        from SkillSpace.myapps.monitor.consumers import AlertConsumer
+
+        engine = get_alert_engine()
+        engine.configure(build_rules({"alerts": {"cpu_warning": 80}}, []))
+        self.addCleanup(engine.configure, [])
+        engine.add("local", 1000, _row(95))
+        engine.evaluate(now=1000)
+
+        async def receive_snapshot():
+            communicator = WebsocketCommunicator(AlertConsumer.as_asgi(), "/ws/monitor/alerts/")
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            message = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return message
+
+        message = async_to_sync(receive_snapshot)()
+        self.assertEqual(message["type"], "alerts_firing")
+        self.assertEqual([alert["name"] for alert in message["data"]], ["cpu_warning"])
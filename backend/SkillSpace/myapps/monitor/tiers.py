@@ -0,0 +1,112 @@
+"""
+分层采集频率
+
+每个指标组属于一个刷新层级：
+    static：只在第一次采集时获取（主机名、内核版本、启动时间等），之后一直使用缓存
+    slow：每 slow_interval 秒（默认 60）刷新一次（分区容量、数据库版本和大小等）
+    fast：每个采集周期都刷新
+
+未到刷新时间的指标组本周期不采集，由 MetricScheduler 把缓存值合并到快照中，快照结构保持不变。
+CPU、内存、网络流量、磁盘 IO 等实时指标始终每周期采集，不参与分层。
+
+层级可在 cloud_servers.yaml 的 global.metric_tiers 中统一配置，在服务器的 monitoring.metric_tiers 中单独覆盖：
+    metric_tiers:
+      system: static
+      disk: slow
+      containers: slow
+    slow_interval: 60
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+TIER_STATIC = "static"
+TIER_SLOW = "slow"
+TIER_FAST = "fast"
+TIERS = (TIER_STATIC, TIER_SLOW, TIER_FAST)
+
+# slow 层的默认刷新间隔（秒）
+DEFAULT_SLOW_INTERVAL = 60
+
+# 可分层的指标组及其默认层级
+DEFAULT_METRIC_TIERS = {
+    "system": TIER_STATIC,  # 主机名、内核、启动时间（运行时长每周期更新）
+    "disk": TIER_SLOW,  # 分区容量
+    "database": TIER_SLOW,  # 数据库版本和大小（仅本机）
+    "services": TIER_FAST,  # 进程和监听端口
+    "containers": TIER_FAST,  # Docker 容器
+}
+
+
+def resolve_tiers(global_config: Optional[Dict] = None, monitoring: Optional[Dict] = None) -> Tuple[Dict[str, str], float]:
+    """
+    合并默认值、全局配置和服务器配置中的分层设置
+
+    Returns:
+        ({指标组: 层级}, slow_interval)
+    """
+    tiers = dict(DEFAULT_METRIC_TIERS)
+    slow_interval = DEFAULT_SLOW_INTERVAL
+    for source in (global_config or {}, monitoring or {}):
+        for group, tier in (source.get("metric_tiers") or {}).items():
+            if group not in DEFAULT_METRIC_TIERS or tier not in TIERS:
+                logger.warning(f"忽略无效的分层配置: {group}: {tier}")
+                continue
+            tiers[group] = tier
+        slow_interval = float(source.get("slow_interval", slow_interval))
+    return tiers, slow_interval
+
+
+class MetricScheduler:
+    """按服务器记录各指标组的上次刷新时间和缓存值（线程安全）"""
+
+    def __init__(self):
+        self._refreshed = {}  # key -> {指标组: 刷新时间}
+        self._cache = {}  # key -> {指标组: 缓存值}
+        self._lock = threading.Lock()
+
+    def due(self, key: str, tiers: Dict[str, str], slow_interval: float, now: Optional[float] = None) -> Set[str]:
+        """本周期需要采集的指标组（从未成功采集过的指标组总是需要采集）"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            refreshed = dict(self._refreshed.get(key, {}))
+        due = set()
+        for group, tier in tiers.items():
+            last = refreshed.get(group)
+            if last is None or tier == TIER_FAST or (tier == TIER_SLOW and now - last >= slow_interval):
+                due.add(group)
+        return due
+
+    def merge(self, key: str, data: Dict, due: Set[str], now: Optional[float] = None) -> Dict:
+        """
+        记录本周期采集到的指标组，并用缓存补齐未到刷新时间的指标组
+
+        未到刷新时间的字典型指标组（如 system）若本周期带有部分字段（如运行时长），以本周期的字段覆盖缓存。
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            refreshed = self._refreshed.setdefault(key, {})
+            cache = self._cache.setdefault(key, {})
+            for group in due:
+                if group in data:
+                    cache[group] = data[group]
+                    refreshed[group] = now
+            for group, value in cache.items():
+                if group in due:
+                    continue
+                fresh = data.get(group)
+                if isinstance(fresh, dict) and isinstance(value, dict):
+                    data[group] = {**value, **fresh}
+                else:
+                    data[group] = value
+        return data
+
+    def clear(self):
+        """清空缓存（配置重新加载后所有指标组重新采集一次）"""
+        with self._lock:
+            self._refreshed.clear()
+            self._cache.clear()
@@ -1,8 +1,11 @@
 # monitor/urls.py
 from django.urls import path
 
-from .views import SystemStatusView
+from .views import AlertListView, MetricHistoryQueryView, MetricHistoryView, SystemStatusView
 
 urlpatterns = [
     path("system/status/", SystemStatusView.as_view(), name="system_status"),
+    path("history/", MetricHistoryView.as_view(), name="metric_history"),
+    path("history/query/", MetricHistoryQueryView.as_view(), name="metric_history_query"),
+    path("alerts/", AlertListView.as_view(), name="alert_list"),
 ]
@@ -0,0 +1,141 @@
+"""
+异步SSH客户端连接管理器（基于asyncssh）
+在事件循环中维护与云服务器的长连接，一个连接上可并行打开多个通道执行命令
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional
+
+import asyncssh
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSSHClientManager:
+    """异步SSH客户端连接管理器（接口与 SSHClientManager 对应，方法为协程）"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 22,
+        username: str = "root",
+        password: Optional[str] = None,
+        key_path: Optional[str] = None,
+        passphrase: Optional[str] = None,
+        timeout: int = 10,
+    ):
+        """
+        初始化异步SSH客户端管理器
+
+        Args:
+            host: 服务器地址
+            port: SSH端口，默认22
+            username: SSH用户名
+            password: SSH密码（密码认证时使用）
+            key_path: SSH私钥路径（密钥认证时使用）
+            passphrase: 私钥密码（如果私钥有密码）
+            timeout: 连接超时时间（秒）
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.key_path = key_path
+        self.passphrase = passphrase
+        self.timeout = timeout
+        self.conn = None
+        self.is_connected = False
+
+    async def connect(self) -> bool:
+        """
+        建立SSH连接
+
+        Raises:
+            Exception: 连接失败时抛出异常
+        """
+        try:
+            logger.info(f"建立异步SSH连接: {self.host}:{self.port}")
+            self.conn = await asyncio.wait_for(
+                asyncssh.connect(
+                    self.host,
+                    port=self.port,
+                    username=self.username,
+                    password=self.password or None,
+                    client_keys=[self.key_path] if self.key_path else None,
+                    passphrase=self.passphrase,
+                    # 与 SSHClientManager 的 AutoAddPolicy 一致：不校验主机密钥
+                    known_hosts=None,
+                    keepalive_interval=30,
+                ),
+                timeout=self.timeout,
+            )
+            self.is_connected = True
+            return True
+
+        except asyncio.TimeoutError as e:
+            self.is_connected = False
+            raise Exception(f"SSH连接超时（{self.timeout}秒）: {self.host}:{self.port}") from e
+        except (asyncssh.Error, OSError) as e:
+            logger.error(f"SSH连接失败 {self.host}:{self.port} - {e}")
+            self.is_connected = False
+            raise
+
+    async def execute_command(self, command: str, timeout: float = 30) -> Dict:
+        """
+        在新通道上执行远程命令（同一连接上的多个调用可并发）
+
+        Returns:
+            Dict: {'stdout', 'stderr', 'exit_code'}
+
+        Raises:
+            Exception: 如果SSH未连接、命令超时或连接已断开
+        """
+        if not self.conn or not self.is_connected:
+            raise Exception("SSH未连接，请先调用connect()")
+
+        try:
+            result = await asyncio.wait_for(self.conn.run(command, check=False), timeout=timeout)
+        except asyncio.TimeoutError:
+            raise Exception(f"命令执行超时（{timeout}秒）")
+        except (asyncssh.Error, OSError) as e:
+            # 通道 / 连接错误：标记断开，下一轮重新连接
+            self.is_connected = False
+            raise Exception(f"SSH命令执行失败: {e}") from e
+
+        return {
+            "stdout": str(result.stdout or "").strip(),
+            "stderr": str(result.stderr or "").strip(),
+            "exit_code": result.exit_status,
+        }
+
+    async def open_stream(self, command: str):
+        """
+        在新通道上启动长期运行的命令（如常驻采样 Agent），不等待其结束
+
+        Returns:
+            asyncssh.SSHClientProcess：调用方 async for 逐行读取 process.stdout
+        """
+        if not self.conn or not self.is_connected:
+            raise Exception("SSH未连接，请先调用connect()")
+        try:
+            return await self.conn.create_process(command)
+        except (asyncssh.Error, OSError) as e:
+            self.is_connected = False
+            raise Exception(f"SSH通道打开失败: {e}") from e
+
+    def is_alive(self) -> bool:
+        """连接是否可用（连接断开时 asyncssh 会让后续命令报错，此时 is_connected 置为 False）"""
+        return self.conn is not None and self.is_connected
+
+    def close(self):
+        """关闭SSH连接（需在连接所属的事件循环线程中调用）"""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+            self.is_connected = False
+            logger.info(f"异步SSH连接已关闭: {self.host}:{self.port}")
+
+    def __repr__(self):
+        status = "已连接" if self.is_connected else "未连接"
+        return f"<AsyncSSHClientManager {self.username}@{self.host}:{self.port} [{status}]>"
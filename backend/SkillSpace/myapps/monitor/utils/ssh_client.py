@@ -186,6 +186,23 @@ class SSHClientManager:
             logger.error(f"执行命令失败: {command} - {e}")
             raise
 
+    def open_stream(self, command: str):
+        """
+        在新通道上启动长期运行的命令（如常驻采样 Agent），不等待其结束
+
+        Returns:
+            paramiko.Channel：调用方逐行读取 channel.makefile("r")，关闭通道即结束远端进程
+
+        Raises:
+            Exception: 如果SSH未连接
+        """
+        if not self.client or not self.is_connected:
+            raise Exception("SSH未连接，请先调用connect()")
+
+        channel = self.client.get_transport().open_session()
+        channel.exec_command(command)
+        return channel
+
     def close(self):
         """关闭SSH连接"""
         if self.client:
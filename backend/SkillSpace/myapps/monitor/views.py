@@ -1,5 +1,7 @@
 # monitor/views.py
+import math
 import platform
+import time
 from datetime import datetime
 
 from django.db import connection
@@ -10,6 +12,11 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .alerts import SEVERITIES, get_alert_engine
+from .history import LOCAL_SERVER_NAME, METRIC_NAMES, get_metric_history
+from .local_collectors import get_local_collector
+from .storage import DEFAULT_MAX_POINTS, TIER_RESOLUTIONS, get_metric_store
+
 
 class SystemStatusView(APIView):
     """
@@ -82,7 +89,8 @@ class SystemStatusView(APIView):
 
     def get_cpu_info(self):
         """获取CPU信息"""
-        cpu_percent = psutil.cpu_percent(interval=1)
+        # 与后台采集共用预热过的计数器，不阻塞请求线程
+        cpu_percent, _ = get_local_collector().sample_cpu()
         cpu_count = psutil.cpu_count(logical=False)  # 物理核心数
         cpu_count_logical = psutil.cpu_count(logical=True)  # 逻辑核心数
         cpu_freq = psutil.cpu_freq()
@@ -197,3 +205,125 @@ class SystemStatusView(APIView):
     def _bytes_to_gb(self, bytes_value):
         """字节转GB"""
         return round(bytes_value / (1024**3), 2)
+
+
+class MetricHistoryView(APIView):
+    """
+    监控指标历史API（内存环形缓冲区）
+    返回最近 N 分钟的采样数据，页面加载时用于直接填充图表
+
+    查询参数：
+        server_name: 云服务器名称，不传时为本机监控
+        minutes: 时间范围（分钟），默认 10
+        metrics: 逗号分隔的指标名，不传时返回全部
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        server_name = request.query_params.get("server_name") or LOCAL_SERVER_NAME
+        try:
+            minutes = float(request.query_params.get("minutes", 10))
+            if not math.isfinite(minutes) or minutes <= 0:
+                raise ValueError
+        except ValueError:
+            return Response({"code": 400, "message": "minutes 必须是正数"}, status=status.HTTP_400_BAD_REQUEST)
+
+        metrics = [name for name in request.query_params.get("metrics", "").split(",") if name]
+        unknown = [name for name in metrics if name not in METRIC_NAMES]
+        if unknown:
+            return Response(
+                {"code": 400, "message": f"未知指标: {', '.join(unknown)}，可选: {', '.join(METRIC_NAMES)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        history = get_metric_history().query(server_name, minutes, metrics)
+        if history is None:
+            return Response(
+                {"code": 404, "message": f"没有该服务器的历史数据: {server_name}"}, status=status.HTTP_404_NOT_FOUND
+            )
+        return Response({"code": 200, "data": history})
+
+
+class MetricHistoryQueryView(APIView):
+    """
+    监控指标历史查询API（持久化存储，按时间范围自动选择分辨率）
+    在保留期内选择点数不超过 max_points 的最细一层：原始（1秒）、1分钟、1小时
+
+    查询参数：
+        server_name: 云服务器名称，不传时为本机监控
+        start / end: 时间范围（Unix 秒），默认最近 1 小时
+        metrics: 逗号分隔的指标名，不传时返回全部
+        max_points: 最大点数，默认 1500
+        resolution: 指定分辨率 raw / minute / hour（可选）
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        server_name = params.get("server_name") or LOCAL_SERVER_NAME
+        try:
+            end = float(params.get("end") or time.time())
+            start = float(params.get("start") or end - 3600)
+            max_points = int(params.get("max_points") or DEFAULT_MAX_POINTS)
+            if not (math.isfinite(start) and math.isfinite(end)) or start >= end or max_points <= 0:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"code": 400, "message": "start 必须小于 end，max_points 必须是正整数"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        resolution = params.get("resolution")
+        if resolution and resolution not in TIER_RESOLUTIONS:
+            return Response(
+                {"code": 400, "message": f"resolution 可选: {', '.join(TIER_RESOLUTIONS)}"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        metrics = [name for name in params.get("metrics", "").split(",") if name]
+        unknown = [name for name in metrics if name not in METRIC_NAMES]
+        if unknown:
+            return Response(
+                {"code": 400, "message": f"未知指标: {', '.join(unknown)}，可选: {', '.join(METRIC_NAMES)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            data = get_metric_store().query(
+                server_name,
+                start,
+                end,
+                metrics,
+                max_points=max_points,
+                resolution=TIER_RESOLUTIONS.get(resolution),
+            )
+        except Exception as e:
+            return Response(
+                {"code": 500, "message": f"查询历史数据失败: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        return Response({"code": 200, "data": data})
+
+
+class AlertListView(APIView):
+    """
+    监控告警API
+    返回正在触发的告警（按触发时间排序），未启用告警（global.enable_alerts）时为空列表
+
+    查询参数：
+        server_name: 服务器名称（本机监控为 local），不传时返回所有服务器
+        severity: 告警级别 warning / critical（可选）
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        severity = request.query_params.get("severity")
+        if severity and severity not in SEVERITIES:
+            return Response(
+                {"code": 400, "message": f"severity 可选: {', '.join(SEVERITIES)}"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        alerts = get_alert_engine().firing_alerts(request.query_params.get("server_name") or None)
+        if severity:
+            alerts = [alert for alert in alerts if alert["severity"] == severity]
+        return Response({"code": 200, "data": alerts})
@@ -0,0 +1,38 @@
+from django.contrib import admin
+
+from .models import Diagnosis, Resume
+
+
+@admin.register(Resume)
+class ResumeAdmin(admin.ModelAdmin):
+    """简历管理（列表页不加载压缩文本）"""
+
+    list_display = ["id", "file_name", "user", "file_size", "text_length", "created_at"]
+    list_filter = ["created_at"]
+    search_fields = ["file_name", "content_hash", "user__username"]
+    readonly_fields = ["content_hash", "file_size", "text_length", "text_preview", "created_at"]
+    exclude = ["text_compressed"]
+    ordering = ["-created_at"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("user").defer("text_compressed")
+
+    def text_preview(self, obj):
+        """简历文本（前 2000 字）"""
+        return obj.text[:2000]
+
+    text_preview.short_description = "简历文本"
+
+
+@admin.register(Diagnosis)
+class DiagnosisAdmin(admin.ModelAdmin):
+    """简历诊断管理"""
+
+    list_display = ["id", "resume", "user", "score", "stage_one_score", "source", "model_name", "updated_at"]
+    list_filter = ["source", "model_name", "created_at"]
+    search_fields = ["resume__file_name", "jd_hash", "batch_id", "user__username"]
+    readonly_fields = ["resume", "jd_hash", "created_at", "updated_at"]
+    ordering = ["-created_at"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("resume", "user").defer("resume__text_compressed")
@@ -0,0 +1,349 @@
+# 文件路径: backend/myapps/resume/batch.py
+"""
+简历批量筛选（一个 JD 对多份简历）
+
+- 上传：多个文件和 / 或 zip 压缩包，展开后逐个保存到批次暂存目录；
+- 初筛：简历数超过 top_k 时，先由 prerank_resume 逐份提取文本并做第一阶段打分（见 resume/embedding.py），
+  全部打完后只把前 top_k 份交给大模型，其余标记为 filtered；第一阶段分项得分随批次保存，可按新权重即时重排；
+  超过 RESUME_PRERANK_TIMEOUT 仍未打完（任务丢失）时由 finish_prerank 按已有得分继续，未打分的记为失败；
+- 调度：每份简历一个 Celery 任务（screen_resume），互不等待；调用大模型前先获取
+  分布式并发槽位（RESUME_BATCH_LLM_CONCURRENCY），拿不到就延迟重试，不阻塞 Worker；
+- 结果：每份简历完成即写入批次状态并推送到 WebSocket（group: resume_<batch_id>），
+  状态接口随时返回已完成部分的排名表，最后一份完成时推送最终排名。
+
+批次状态保存在 resume 缓存中（生产环境 Redis，Web 与 Worker 共享），有效期 RESUME_BATCH_TIMEOUT。
+"""
+
+import logging
+import os
+import time
+import uuid
+import zipfile
+
+from django.conf import settings
+
+from .cache import get_cache
+from .utils import get_job_dir
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "resume:batch"
+
+# 批量筛选支持的简历格式（zip 内的其他文件会被跳过）
+SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".md")
+
+# 写入暂存文件的块大小
+CHUNK_SIZE = 64 * 1024
+
+
+class BatchUploadError(ValueError):
+    """批量上传的文件数量 / 大小不合法"""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _timeout():
+    return _setting("RESUME_BATCH_TIMEOUT", 24 * 3600)
+
+
+def _zip_member_name(info):
+    """zip 内文件名：未设置 UTF-8 标志的（Windows 压缩软件）按 GBK 解码"""
+    name = info.filename
+    if not info.flag_bits & 0x800:
+        try:
+            name = name.encode("cp437").decode("gbk")
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            pass
+    return os.path.basename(name.rstrip("/"))
+
+
+def _iter_zip(uploaded_file, budget):
+    """
+    展开 zip 中的简历文件
+
+    Yields:
+        (文件名, 可迭代的字节块)；不支持的格式产出 (文件名, None)
+    """
+    try:
+        archive = zipfile.ZipFile(uploaded_file)
+    except zipfile.BadZipFile as e:
+        raise BatchUploadError(f"压缩包无法解析: {uploaded_file.name}") from e
+
+    with archive:
+        for info in archive.infolist():
+            name = _zip_member_name(info)
+            if info.is_dir() or not name or name.startswith(".") or "__MACOSX" in info.filename:
+                continue
+            if not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                yield name, None
+                continue
+            # 按声明的解压后大小预检，防止压缩炸弹
+            budget["bytes"] -= info.file_size
+            if info.file_size > _setting("RESUME_BATCH_MAX_FILE_BYTES", 10 * 1024 * 1024) or budget["bytes"] < 0:
+                raise BatchUploadError(f"压缩包内文件过大: {name}")
+            with archive.open(info) as member:
+                yield name, iter(lambda: member.read(CHUNK_SIZE), b"")
+
+
+def save_batch_files(uploaded_files, batch_id):
+    """
+    保存批量上传的简历（展开 zip）到批次暂存目录
+
+    Returns:
+        (files, skipped)：files 为 [(文件名, 暂存路径)]，skipped 为不支持的文件名
+
+    Raises:
+        BatchUploadError: 文件数量或大小超出限制、压缩包损坏
+    """
+    max_files = _setting("RESUME_BATCH_MAX_FILES", 100)
+    max_file_bytes = _setting("RESUME_BATCH_MAX_FILE_BYTES", 10 * 1024 * 1024)
+    budget = {"bytes": _setting("RESUME_BATCH_MAX_TOTAL_BYTES", 200 * 1024 * 1024)}
+
+    job_dir = get_job_dir(batch_id)
+    os.makedirs(job_dir, exist_ok=True)
+
+    files, skipped = [], []
+
+    def entries():
+        for uploaded_file in uploaded_files:
+            name = os.path.basename(uploaded_file.name)
+            if name.lower().endswith(".zip"):
+                yield from _iter_zip(uploaded_file, budget)
+            elif name.lower().endswith(SUPPORTED_EXTENSIONS):
+                budget["bytes"] -= uploaded_file.size
+                if uploaded_file.size > max_file_bytes or budget["bytes"] < 0:
+                    raise BatchUploadError(f"文件过大: {name}")
+                yield name, uploaded_file.chunks(CHUNK_SIZE)
+            else:
+                yield name, None
+
+    for name, chunks in entries():
+        if chunks is None:
+            skipped.append(name)
+            continue
+        if len(files) >= max_files:
+            raise BatchUploadError(f"单批最多 {max_files} 份简历")
+        ext = os.path.splitext(name)[1].lower()
+        file_path = os.path.join(job_dir, f"{len(files)}{ext}")
+        with open(file_path, "wb") as fp:
+            for chunk in chunks:
+                fp.write(chunk)
+        files.append((name, file_path))
+
+    return files, skipped
+
+
+def new_batch_id():
+    return str(uuid.uuid4())
+
+
+def create_batch(batch_id, jd_text, files, top_k=0, user_id=None):
+    """
+    登记批次元信息
+
+    Args:
+        files: save_batch_files() 返回的 [(文件名, 暂存路径)]
+        top_k: 初筛后送大模型的份数，0 表示不初筛（全部送大模型）
+        user_id: 提交批次的用户（用于保存诊断历史，进度查询接口只对该用户开放）
+    """
+    meta = {
+        "batch_id": batch_id,
+        "user_id": user_id,
+        "jd_text": jd_text,
+        "total": len(files),
+        "files": [name for name, _ in files],
+        "paths": [path for _, path in files],
+        "top_k": top_k,
+        "prerank": bool(top_k) and top_k < len(files),
+        "created_at": time.time(),
+    }
+    cache = get_cache()
+    cache.set(f"{KEY_PREFIX}:{batch_id}", meta, timeout=_timeout())
+    cache.set(f"{KEY_PREFIX}:{batch_id}:finished", 0, timeout=_timeout())
+    cache.set(f"{KEY_PREFIX}:{batch_id}:preranked", 0, timeout=_timeout())
+    return meta
+
+
+def get_batch(batch_id):
+    """批次元信息，不存在或已过期返回 None"""
+    return get_cache().get(f"{KEY_PREFIX}:{batch_id}")
+
+
+def _incr(key):
+    cache = get_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # 计数器已过期：重新登记，保证返回值单调
+        cache.add(key, 0, timeout=_timeout())
+        return cache.incr(key)
+
+
+def record_result(batch_id, index, item):
+    """
+    写入单份简历的结果
+
+    Returns:
+        当前已完成的份数（原子自增，用于判断是否为最后一份）
+    """
+    get_cache().set(f"{KEY_PREFIX}:{batch_id}:item:{index}", item, timeout=_timeout())
+    return _incr(f"{KEY_PREFIX}:{batch_id}:finished")
+
+
+def save_stage_one(batch_id, index, stage_one):
+    """保存单份简历的第一阶段得分"""
+    get_cache().set(f"{KEY_PREFIX}:{batch_id}:stage1:{index}", stage_one, timeout=_timeout())
+
+
+def mark_preranked(batch_id):
+    """
+    初筛完成一份（成功或失败都计入）
+
+    Returns:
+        当前已初筛的份数（原子自增，用于判断是否为最后一份）
+    """
+    return _incr(f"{KEY_PREFIX}:{batch_id}:preranked")
+
+
+def close_prerank(batch_id):
+    """
+    结束初筛阶段（最后一份初筛任务和 finish_prerank 兜底任务都会调用）
+
+    Returns:
+        只有第一次调用返回 True，保证前 top_k 份只投递一次
+    """
+    return get_cache().add(f"{KEY_PREFIX}:{batch_id}:prerank_closed", 1, timeout=_timeout())
+
+
+def is_prerank_closed(batch_id):
+    return get_cache().get(f"{KEY_PREFIX}:{batch_id}:prerank_closed") is not None
+
+
+def get_stage_one(batch_id, total):
+    """已有的第一阶段得分 {index: stage_one}"""
+    keys = {f"{KEY_PREFIX}:{batch_id}:stage1:{index}": index for index in range(total)}
+    found = get_cache().get_many(list(keys))
+    return {keys[key]: value for key, value in found.items()}
+
+
+def select_top_k(meta, stage_one):
+    """
+    按第一阶段得分选出送大模型的简历
+
+    Returns:
+        (selected, filtered)：两个序号列表，selected 按得分降序
+    """
+    ranked = sorted(stage_one, key=lambda index: (-stage_one[index]["score"], index))
+    return ranked[: meta["top_k"]], ranked[meta["top_k"] :]
+
+
+def rescore_stage_one(stage_one, weight):
+    """按新的相似度权重重算第一阶段总分（只用已保存的分项，不重新计算向量）"""
+    score = 100 * (weight * stage_one["similarity"] + (1 - weight) * stage_one["keyword_overlap"])
+    return {**stage_one, "score": round(score, 2)}
+
+
+def get_results(batch_id, total):
+    """已完成的各份结果 {index: item}"""
+    keys = {f"{KEY_PREFIX}:{batch_id}:item:{index}": index for index in range(total)}
+    found = get_cache().get_many(list(keys))
+    return {keys[key]: item for key, item in found.items()}
+
+
+def build_ranking(meta, results, stage_one=None):
+    """
+    排名表：大模型已打分的按分数降序，其次是初筛未入选的（按初筛分），再是失败的，未完成的排最后
+
+    Returns:
+        [{"rank", "index", "filename", "status", "score", "stage_one", "summary", "error", "result"}, ...]
+    """
+    stage_one = stage_one or {}
+    rows = []
+    for index, filename in enumerate(meta["files"]):
+        item = results.get(index) or {"status": "pending"}
+        result = item.get("result") or {}
+        rows.append(
+            {
+                "index": index,
+                "filename": filename,
+                "status": item["status"],
+                "score": result.get("score"),
+                "stage_one": stage_one.get(index),
+                "summary": result.get("summary"),
+                "error": item.get("error"),
+                "result": item.get("result"),
+            }
+        )
+
+    order = {"completed": 0, "filtered": 1, "failed": 2, "pending": 3}
+
+    def sort_key(row):
+        try:
+            score = float(row["score"])
+        except (TypeError, ValueError):
+            score = -1
+        first_stage = row["stage_one"]["score"] if row["stage_one"] else -1
+        return order[row["status"]], -score, -first_stage, row["index"]
+
+    rows.sort(key=sort_key)
+    for rank, row in enumerate(rows, start=1):
+        row["rank"] = rank if row["status"] in ("completed", "filtered") else None
+    return rows
+
+
+def get_batch_status(batch_id, similarity_weight=None):
+    """
+    批次进度与当前排名表（不等待未完成的简历）
+
+    Args:
+        similarity_weight: 指定时按该权重即时重算第一阶段得分后再排名
+
+    Returns:
+        dict，批次不存在时返回 None
+    """
+    meta = get_batch(batch_id)
+    if meta is None:
+        return None
+    results = get_results(batch_id, meta["total"])
+    stage_one = get_stage_one(batch_id, meta["total"])
+    if similarity_weight is not None:
+        stage_one = {index: rescore_stage_one(value, similarity_weight) for index, value in stage_one.items()}
+    finished = len(results)
+    return {
+        "batch_id": batch_id,
+        "total": meta["total"],
+        "top_k": meta.get("top_k", 0),
+        "finished": finished,
+        "failed": sum(1 for item in results.values() if item["status"] == "failed"),
+        "status": "completed" if finished >= meta["total"] else "processing",
+        "ranking": build_ranking(meta, results, stage_one),
+    }
+
+
+def acquire_llm_slot():
+    """
+    获取大模型调用并发槽位（跨 Worker 共享，最多 RESUME_BATCH_LLM_CONCURRENCY 个）
+
+    槽位带过期时间，Worker 异常退出未释放时自动回收。
+
+    Returns:
+        (槽位键, 令牌)，没有空闲槽位时返回 None
+    """
+    cache = get_cache()
+    token = uuid.uuid4().hex
+    ttl = _setting("RESUME_BATCH_ITEM_TIME_LIMIT", 180) + 30
+    for slot in range(_setting("RESUME_BATCH_LLM_CONCURRENCY", 4)):
+        key = f"{KEY_PREFIX}:llm_slot:{slot}"
+        if cache.add(key, token, timeout=ttl):
+            return key, token
+    return None
+
+
+def release_llm_slot(slot):
+    """释放槽位（只释放自己持有的，过期后被他人占用的不动）"""
+    key, token = slot
+    cache = get_cache()
+    if cache.get(key) == token:
+        cache.delete(key)
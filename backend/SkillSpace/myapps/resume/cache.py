@@ -0,0 +1,171 @@
+# 文件路径: backend/myapps/resume/cache.py
+"""
+简历诊断内容寻址缓存
+
+两级缓存，键都由内容哈希决定，与文件名、上传时间无关：
+- L1 (text):      sha256(文件字节)                 -> 提取出的简历文本
+- L2 (diagnosis): sha256(简历文本, 规范化JD, 模型名) -> 诊断结果 JSON
+- embedding:      sha256(向量化方式, 简历文本)     -> 批量初筛用的句向量矩阵（float16，见 embedding.py）
+
+使用 settings.CACHES["resume"]（生产环境 Redis，Web 与 Celery Worker 共享；开发环境本地内存）。
+条目过期时间由 RESUME_CACHE_TIMEOUT 控制，超过 RESUME_CACHE_MAX_ENTRY_BYTES 的条目不缓存
+（句向量矩阵使用单独的上限 RESUME_EMBEDDING_CACHE_MAX_BYTES）。
+命中 / 未命中次数计入缓存自身的计数器，可通过 /api/resume/cache/stats/ 查看。
+异步诊断任务的提交用户也登记在同一缓存中（set_job_owner），供状态查询接口校验。
+"""
+
+import hashlib
+import json
+import logging
+import re
+import unicodedata
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "resume"
+LEVELS = ("text", "diagnosis", "embedding")
+
+# 流式计算文件哈希的块大小
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def get_cache():
+    """简历缓存实例（未配置 resume 缓存时回退到 default）"""
+    try:
+        return caches["resume"]
+    except InvalidCacheBackendError:
+        return caches["default"]
+
+
+def _timeout():
+    return getattr(settings, "RESUME_CACHE_TIMEOUT", 7 * 24 * 3600)
+
+
+def _max_entry_bytes():
+    return getattr(settings, "RESUME_CACHE_MAX_ENTRY_BYTES", 512 * 1024)
+
+
+def file_digest(fileobj):
+    """
+    流式计算文件内容的 SHA-256，完成后把读指针恢复到开头
+
+    支持 Django UploadedFile（chunks()）和普通二进制文件对象。
+    """
+    sha = hashlib.sha256()
+    if hasattr(fileobj, "chunks"):
+        for chunk in fileobj.chunks(HASH_CHUNK_SIZE):
+            sha.update(chunk)
+    else:
+        for chunk in iter(lambda: fileobj.read(HASH_CHUNK_SIZE), b""):
+            sha.update(chunk)
+    fileobj.seek(0)
+    return sha.hexdigest()
+
+
+def normalize_jd(jd_text):
+    """JD 规范化：全半角统一、合并空白、英文小写，只改动空白或大小写的 JD 命中同一缓存"""
+    text = unicodedata.normalize("NFKC", jd_text or "")
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def diagnosis_digest(resume_text, jd_text, model_name):
+    """L2 缓存键：简历文本 + 规范化 JD + 模型名"""
+    sha = hashlib.sha256()
+    for part in (resume_text, normalize_jd(jd_text), model_name):
+        sha.update(part.encode("utf-8"))
+        sha.update(b"\x00")
+    return sha.hexdigest()
+
+
+def _record(level, hit):
+    """累加命中统计（计数器不过期）"""
+    cache = get_cache()
+    key = f"{KEY_PREFIX}:stats:{level}:{'hits' if hit else 'misses'}"
+    try:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+    except Exception as e:
+        logger.debug(f"缓存统计更新失败: {e}")
+
+
+def _get(level, digest):
+    value = get_cache().get(f"{KEY_PREFIX}:{level}:{digest}")
+    _record(level, value is not None)
+    return value
+
+
+def _set(level, digest, value, size, max_bytes=None):
+    if size > (max_bytes or _max_entry_bytes()):
+        return False
+    get_cache().set(f"{KEY_PREFIX}:{level}:{digest}", value, timeout=_timeout())
+    return True
+
+
+def get_text(file_hash):
+    """L1：按文件哈希取提取文本"""
+    return _get("text", file_hash)
+
+
+def set_text(file_hash, text):
+    """L1：缓存提取文本（空文本不缓存）"""
+    if not text:
+        return False
+    return _set("text", file_hash, text, len(text.encode("utf-8")))
+
+
+def get_diagnosis(resume_text, jd_text, model_name):
+    """L2：按 (文本, JD, 模型) 取诊断结果"""
+    return _get("diagnosis", diagnosis_digest(resume_text, jd_text, model_name))
+
+
+def set_diagnosis(resume_text, jd_text, model_name, result):
+    """L2：缓存诊断结果"""
+    payload = json.dumps(result, ensure_ascii=False)
+    return _set("diagnosis", diagnosis_digest(resume_text, jd_text, model_name), result, len(payload.encode("utf-8")))
+
+
+def get_embedding(digest):
+    """按 (向量化方式, 文本) 哈希取句向量矩阵"""
+    return _get("embedding", digest)
+
+
+def set_embedding(digest, matrix):
+    """缓存句向量矩阵（按数组字节数检查 RESUME_EMBEDDING_CACHE_MAX_BYTES）"""
+    max_bytes = getattr(settings, "RESUME_EMBEDDING_CACHE_MAX_BYTES", 2 * 1024 * 1024)
+    return _set("embedding", digest, matrix, matrix.nbytes, max_bytes=max_bytes)
+
+
+def set_job_owner(job_id, user_id):
+    """登记异步诊断任务的提交用户（匿名为 None），状态查询接口据此校验"""
+    get_cache().set(f"{KEY_PREFIX}:job:{job_id}", {"user_id": user_id}, timeout=_timeout())
+
+
+def is_job_owner(job_id, user_id):
+    """任务由该用户提交时返回 True；未登记或已过期的任务返回 False"""
+    owner = get_cache().get(f"{KEY_PREFIX}:job:{job_id}")
+    return owner is not None and owner["user_id"] == user_id
+
+
+def get_stats():
+    """
+    各级缓存的命中统计
+
+    Returns:
+        {"text": {"hits": 3, "misses": 1, "hit_rate": 0.75}, "diagnosis": {...}}
+    """
+    cache = get_cache()
+    stats = {}
+    for level in LEVELS:
+        hits = cache.get(f"{KEY_PREFIX}:stats:{level}:hits") or 0
+        misses = cache.get(f"{KEY_PREFIX}:stats:{level}:misses") or 0
+        total = hits + misses
+        stats[level] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+    return stats
@@ -0,0 +1,68 @@
+# resume/consumers.py
+"""
+WebSocket Consumer - 推送简历异步诊断进度
+"""
+
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+# asgi.py 以 SkillSpace.myapps.resume.routing 加载本模块，按 resume.* 导入，避免加载第二份模块
+from resume import batch, cache
+
+logger = logging.getLogger(__name__)
+
+
+class ResumeJobConsumer(AsyncWebsocketConsumer):
+    """
+    简历诊断进度 WebSocket Consumer
+
+    工作流程：
+    1. 前端提交诊断任务，拿到 job_id 后连接 ws://host/ws/resume/<job_id>/
+       （只有提交任务 / 批次的用户可以连接，其他人直接关闭）
+    2. Consumer 加入 Channel Group: resume_<job_id>
+    3. Celery Worker 推送进度（extracting / analyzing / completed / failed）
+    4. Consumer 转发给前端
+    """
+
+    async def connect(self):
+        self.job_id = self.scope["url_route"]["kwargs"]["job_id"]
+        self.group_name = f"resume_{self.job_id}"
+
+        if not await sync_to_async(self._is_owner)():
+            logger.warning(f"拒绝简历诊断 WebSocket 连接（非提交用户）: job_id={self.job_id}")
+            await self.close()
+            return
+
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+        logger.info(f"✅ 简历诊断 WebSocket 连接建立: job_id={self.job_id}")
+
+    def _is_owner(self):
+        """job_id 为单份诊断任务或批次 ID，与 HTTP 状态接口相同：只有提交者可以订阅"""
+        user = self.scope.get("user")
+        user_id = user.id if user is not None and user.is_authenticated else None
+        if cache.is_job_owner(self.job_id, user_id):
+            return True
+        meta = batch.get_batch(self.job_id)
+        return meta is not None and meta.get("user_id") == user_id
+
+    async def disconnect(self, close_code):
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive(self, text_data):
+        """仅处理心跳"""
+        try:
+            data = json.loads(text_data)
+            if data.get("type") == "ping":
+                await self.send(text_data=json.dumps({"type": "pong"}))
+        except Exception as e:
+            logger.error(f"接收消息错误: {e}")
+
+    async def resume_progress(self, event):
+        """转发 Worker 推送的进度事件"""
+        payload = {key: value for key, value in event.items() if key != "type"}
+        await self.send(text_data=json.dumps({"code": 200, "type": "progress", **payload}, ensure_ascii=False))
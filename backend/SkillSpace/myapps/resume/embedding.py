@@ -0,0 +1,207 @@
+# 文件路径: backend/myapps/resume/embedding.py
+"""
+简历初筛（第一阶段打分，纯 CPU，不调用大模型）
+
+score = 100 * (w * 语义相似度 + (1 - w) * 技能关键词覆盖率)，w = RESUME_PRERANK_SIMILARITY_WEIGHT
+
+- 语义相似度：简历和 JD 按句切分后分别向量化，对 JD 的每一句取简历中最相近句子的余弦相似度，再取平均；
+- 技能关键词覆盖率：JD 中出现的技能词（英文技术词 + 常见中文技能词）有多少出现在简历里。
+
+句向量默认使用字符 n-gram 哈希向量（无额外依赖，单份简历毫秒级）；
+配置 RESUME_EMBEDDING_MODEL（如 "BAAI/bge-small-zh-v1.5"）且安装了 transformers 时改用该模型在 CPU 上推理。
+简历句向量按文本哈希缓存在 resume 缓存中（以 float16 存储，体积减半，对余弦相似度的影响在千分之一量级）。
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import unicodedata
+import zlib
+from functools import lru_cache
+
+from django.conf import settings
+
+import numpy as np
+
+from . import cache
+
+# 条件导入 transformers（仅在配置了句向量模型时使用）
+try:
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    torch = None
+    AutoModel = None
+    AutoTokenizer = None
+    TRANSFORMERS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 哈希向量维度
+HASH_DIM = 1024
+
+# 单份文本最多参与计算的句子数
+MAX_SENTENCES = 200
+
+SENTENCE_SPLIT_RE = re.compile(r"[\n。！？；;!?]+|(?<=[a-z0-9])\.\s+", re.IGNORECASE)
+LATIN_TERM_RE = re.compile(r"[a-z][a-z0-9+#]*(?:[.\-][a-z0-9+#]+)*")
+CJK_RUN_RE = re.compile(r"[\u4e00-\u9fff]+")
+
+# 常见中文技能词（英文技术词直接从 JD 中按词提取）
+CJK_SKILLS = tuple(
+    "机器学习 深度学习 自然语言处理 计算机视觉 推荐系统 数据分析 数据挖掘 大数据 分布式 微服务 高并发 消息队列 "
+    "缓存 数据库 性能优化 架构设计 自动化测试 持续集成 容器化 云原生 前端 后端 全栈 算法 爬虫 运维 网络安全 项目管理".split()
+)
+
+# 不视为技能的英文常用词
+LATIN_STOPWORDS = set(
+    "a an and or the of to in on for with as at by is are be we you our your will can etc years year experience "
+    "ability skills good strong work team job responsibilities requirements plus preferred".split()
+)
+
+_model_lock = threading.Lock()
+_model = None
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def split_sentences(text):
+    """按中英文句末标点和换行切句，过滤过短片段"""
+    text = unicodedata.normalize("NFKC", text or "")
+    sentences = [s.strip() for s in SENTENCE_SPLIT_RE.split(text)]
+    return [s for s in sentences if len(s) >= 4][:MAX_SENTENCES]
+
+
+def _ngrams(sentence):
+    """英文按词（含相邻词对），中文按字符 2/3-gram"""
+    sentence = sentence.lower()
+    words = LATIN_TERM_RE.findall(sentence)
+    features = list(words)
+    features.extend(f"{a} {b}" for a, b in zip(words, words[1:]))
+    for run in CJK_RUN_RE.findall(sentence):
+        for n in (2, 3):
+            features.extend(run[i : i + n] for i in range(len(run) - n + 1))
+        if len(run) == 1:
+            features.append(run)
+    return features
+
+
+def _hash_embed(sentences):
+    """字符 n-gram 哈希向量（crc32 保证不同进程结果一致）"""
+    matrix = np.zeros((len(sentences), HASH_DIM), dtype=np.float32)
+    for row, sentence in enumerate(sentences):
+        for feature in _ngrams(sentence):
+            h = zlib.crc32(feature.encode("utf-8"))
+            # 最高位决定符号，降低哈希冲突带来的偏差
+            matrix[row, h % HASH_DIM] += 1.0 if h & 0x80000000 else -1.0
+    return matrix
+
+
+def _get_model():
+    global _model
+    with _model_lock:
+        if _model is None:
+            name = _setting("RESUME_EMBEDDING_MODEL", None)
+            tokenizer = AutoTokenizer.from_pretrained(name)
+            model = AutoModel.from_pretrained(name).eval()
+            _model = (tokenizer, model)
+            logger.info(f"简历句向量模型已加载: {name}")
+        return _model
+
+
+def _model_embed(sentences):
+    """transformers 句向量（CPU，mean pooling）"""
+    tokenizer, model = _get_model()
+    vectors = []
+    with torch.no_grad():
+        for start in range(0, len(sentences), 32):
+            inputs = tokenizer(
+                sentences[start : start + 32], padding=True, truncation=True, max_length=128, return_tensors="pt"
+            )
+            hidden = model(**inputs).last_hidden_state
+            mask = inputs["attention_mask"].unsqueeze(-1).float()
+            vectors.append(((hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)).numpy())
+    return np.vstack(vectors).astype(np.float32)
+
+
+def backend_name():
+    """当前使用的向量化方式（写入缓存键，切换模型后不会读到旧向量）"""
+    if _setting("RESUME_EMBEDDING_MODEL", None) and TRANSFORMERS_AVAILABLE:
+        return _setting("RESUME_EMBEDDING_MODEL", None)
+    return f"hash{HASH_DIM}"
+
+
+def embed_sentences(sentences):
+    """
+    句向量矩阵（每行 L2 归一化）
+
+    Returns:
+        shape 为 (len(sentences), dim) 的 float32 数组
+    """
+    if not sentences:
+        return np.zeros((0, HASH_DIM), dtype=np.float32)
+    if backend_name() != f"hash{HASH_DIM}":
+        matrix = _model_embed(sentences)
+    else:
+        matrix = _hash_embed(sentences)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-9)
+
+
+def embed_text(text):
+    """整份文本的句向量矩阵（简历按文本哈希缓存，超过 RESUME_EMBEDDING_CACHE_MAX_BYTES 的矩阵不缓存）"""
+    digest = hashlib.sha256(f"{backend_name()}\x00{text}".encode("utf-8")).hexdigest()
+    matrix = cache.get_embedding(digest)
+    if matrix is None:
+        matrix = embed_sentences(split_sentences(text))
+        cache.set_embedding(digest, matrix.astype(np.float16))
+    return matrix.astype(np.float32, copy=False)
+
+
+@lru_cache(maxsize=32)
+def _jd_profile(jd_text):
+    """JD 的句向量和技能词（同一批次内反复使用）"""
+    return embed_sentences(split_sentences(jd_text)), frozenset(extract_skills(jd_text))
+
+
+def extract_skills(text):
+    """提取技能词：英文技术词（去除常用词）+ 命中的中文技能词"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    terms = {term for term in LATIN_TERM_RE.findall(text) if len(term) > 1 and term not in LATIN_STOPWORDS}
+    terms.update(skill for skill in CJK_SKILLS if skill in text)
+    return terms
+
+
+def stage_one_score(resume_text, jd_text):
+    """
+    第一阶段打分
+
+    Returns:
+        {"score": 0-100, "similarity": 0-1, "keyword_overlap": 0-1, "matched_skills": [...], "missing_skills": [...]}
+    """
+    jd_matrix, jd_skills = _jd_profile(jd_text)
+    resume_matrix = embed_text(resume_text)
+
+    similarity = 0.0
+    if len(jd_matrix) and len(resume_matrix):
+        # (JD 句数, 简历句数) 相似度矩阵，每个 JD 句子取最相近的简历句子
+        best = (jd_matrix @ resume_matrix.T).max(axis=1)
+        similarity = float(np.clip(best, 0, 1).mean())
+
+    resume_skills = extract_skills(resume_text)
+    matched = sorted(jd_skills & resume_skills)
+    overlap = len(matched) / len(jd_skills) if jd_skills else 0.0
+
+    weight = _setting("RESUME_PRERANK_SIMILARITY_WEIGHT", 0.6)
+    return {
+        "score": round(100 * (weight * similarity + (1 - weight) * overlap), 2),
+        "similarity": round(similarity, 4),
+        "keyword_overlap": round(overlap, 4),
+        "matched_skills": matched,
+        "missing_skills": sorted(jd_skills - resume_skills),
+    }
@@ -0,0 +1,101 @@
+# 文件路径: backend/myapps/resume/history.py
+"""
+简历 / 诊断结果持久化
+
+各诊断入口（同步、流式、异步任务、批量筛选）拿到结果后调用 persist_diagnosis()：
+- Resume 按 (用户, 文件哈希) 去重，文本压缩存储；
+- Diagnosis 按 (简历, JD 哈希, 模型) 去重，重复诊断只更新结果。
+大模型调用失败返回的兜底结果不会落库；落库失败只记日志，不影响诊断接口本身。
+"""
+
+import hashlib
+import logging
+
+from django.db import IntegrityError, transaction
+
+from .cache import normalize_jd
+from .models import Diagnosis, Resume
+
+logger = logging.getLogger(__name__)
+
+# ai_analyze_resume 调用失败时兜底结果的 summary 前缀
+FALLBACK_SUMMARY_PREFIX = "服务暂时不可用"
+
+
+def jd_digest(jd_text):
+    """规范化 JD 的 SHA-256（与诊断缓存使用同一规范化规则）"""
+    return hashlib.sha256(normalize_jd(jd_text).encode("utf-8")).hexdigest()
+
+
+def is_fallback_result(result):
+    return not isinstance(result, dict) or str(result.get("summary", "")).startswith(FALLBACK_SUMMARY_PREFIX)
+
+
+def parse_score(value):
+    """模型返回的分数可能是字符串或小数，统一为 0-100 的整数"""
+    try:
+        return max(0, min(100, round(float(value))))
+    except (TypeError, ValueError):
+        return None
+
+
+def get_or_create_resume(user_id, file_name, file_hash, file_size, resume_text):
+    """按 (用户, 文件哈希) 取已有简历，没有则创建"""
+    queryset = Resume.objects.defer("text_compressed")
+    resume = queryset.filter(user_id=user_id, content_hash=file_hash).first()
+    if resume:
+        return resume
+
+    resume = Resume(user_id=user_id, file_name=file_name[:255], content_hash=file_hash, file_size=file_size or 0)
+    resume.text = resume_text
+    try:
+        with transaction.atomic():
+            resume.save()
+    except IntegrityError:
+        # 并发上传同一文件：唯一约束冲突，取已写入的那条
+        resume = queryset.get(user_id=user_id, content_hash=file_hash)
+    return resume
+
+
+def persist_diagnosis(
+    *,
+    user_id,
+    file_name,
+    file_hash,
+    file_size,
+    resume_text,
+    jd_text,
+    result,
+    model_name,
+    source="sync",
+    batch_id="",
+    stage_one_score=None,
+):
+    """
+    保存一次诊断
+
+    Returns:
+        Diagnosis 实例；兜底结果或保存失败时返回 None
+    """
+    if is_fallback_result(result):
+        return None
+    try:
+        resume = get_or_create_resume(user_id, file_name, file_hash, file_size, resume_text)
+        diagnosis, _ = Diagnosis.objects.update_or_create(
+            resume=resume,
+            jd_hash=jd_digest(jd_text),
+            model_name=model_name,
+            defaults={
+                "user_id": user_id,
+                "jd_text": jd_text,
+                "score": parse_score(result.get("score")),
+                "stage_one_score": stage_one_score,
+                "result": result,
+                "source": source,
+                "batch_id": batch_id or "",
+            },
+        )
+        return diagnosis
+    except Exception as e:
+        logger.warning(f"诊断结果保存失败: file={file_name}, {e}")
+        return None
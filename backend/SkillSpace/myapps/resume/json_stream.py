@@ -0,0 +1,176 @@
+# 文件路径: backend/myapps/resume/json_stream.py
+"""
+增量 JSON 解析（流式诊断用）
+
+大模型以 token 为单位流式返回一个 JSON 对象，这里逐字符跟踪嵌套层级和字符串状态，
+顶层字段的值一完整就产出事件，不必等整个对象结束：
+
+- 顶层数组的每个元素完整时：{"type": "item", "field": "pros", "index": 0, "value": "..."}
+- 顶层字段的值完整时：      {"type": "field", "field": "score", "value": 85}
+  （数组字段在所有元素之后再产出一次完整列表）
+
+数字 / 布尔这类标量要看到后面的 "," 或 "}" 才能确定结束；对象前的 ```json 之类的前缀会被跳过。
+"""
+
+import json
+
+
+class IncrementalJSONParser:
+    """
+    用法：
+        parser = IncrementalJSONParser()
+        for chunk in stream:
+            for event in parser.feed(chunk):
+                ...
+        result = parser.result()
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._pos = 0  # 已扫描到的字符位置
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self._finished = False
+
+        self._key = None  # 当前顶层字段名
+        self._expect = "key"  # 顶层对象中下一个期待的成分：key / colon / value
+        self._key_start = None
+        self._value_start = None
+        self._value_is_array = False
+        self._item_start = None
+        self._item_index = 0
+        self._items = []
+        self._result = {}
+
+    @property
+    def finished(self):
+        """顶层对象是否已闭合"""
+        return self._finished
+
+    def result(self):
+        """已解析出的顶层字段（对象未闭合时为部分结果）"""
+        return dict(self._result)
+
+    def _text(self, start, end):
+        return "".join(self._buffer)[start:end]
+
+    def _emit_field(self, end, events):
+        raw = self._text(self._value_start, end).strip()
+        value = self._items if self._value_is_array else json.loads(raw)
+        self._result[self._key] = value
+        events.append({"type": "field", "field": self._key, "value": value})
+        self._expect = "key"
+        self._key = None
+        self._value_start = None
+
+    def _emit_item(self, end, events):
+        raw = self._text(self._item_start, end).strip()
+        self._item_start = None
+        if not raw:
+            return
+        value = json.loads(raw)
+        self._items.append(value)
+        events.append({"type": "item", "field": self._key, "index": self._item_index, "value": value})
+        self._item_index += 1
+
+    def feed(self, chunk):
+        """
+        喂入一段文本，返回本段中完成的事件列表
+
+        Raises:
+            ValueError: 字段值不是合法 JSON
+        """
+        events = []
+        if self._finished or not chunk:
+            return events
+
+        self._buffer.append(chunk)
+        text = "".join(self._buffer)
+        self._buffer = [text]
+
+        while self._pos < len(text) and not self._finished:
+            i = self._pos
+            ch = text[i]
+            self._pos += 1
+
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect == "key" and self._key_start is not None:
+                        self._key = json.loads(text[self._key_start : i + 1])
+                        self._key_start = None
+                        self._expect = "colon"
+                    elif self._depth == 1 and self._expect == "value" and self._value_start is not None:
+                        # 字符串字段在右引号处即完整
+                        self._emit_field(i + 1, events)
+                continue
+
+            if self._depth == 1 and self._expect == "colon":
+                if ch == ":":
+                    self._expect = "value"
+                continue
+
+            if self._depth == 1 and self._expect == "value" and self._value_start is None:
+                if ch.isspace():
+                    continue
+                self._value_start = i
+                self._value_is_array = ch == "["
+                if self._value_is_array:
+                    self._items = []
+                    self._item_index = 0
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect == "key":
+                    self._key_start = i
+                elif self._depth == 2 and self._value_is_array and self._item_start is None:
+                    self._item_start = i
+                continue
+
+            if ch in "[{":
+                self._depth += 1
+                if self._depth == 3 and self._value_is_array and self._item_start is None:
+                    # 数组元素本身是对象 / 数组
+                    self._item_start = i
+                continue
+
+            if ch in "]}":
+                if self._depth == 2 and self._value_is_array and ch == "]":
+                    if self._item_start is not None:
+                        self._emit_item(i, events)
+                    self._depth -= 1
+                    self._emit_field(i + 1, events)
+                    continue
+                if self._depth == 1:
+                    # 顶层对象结束：最后一个标量字段在这里完成
+                    if self._value_start is not None:
+                        self._emit_field(i, events)
+                    self._finished = True
+                    continue
+                self._depth -= 1
+                continue
+
+            if ch == ",":
+                if self._depth == 1 and self._value_start is not None:
+                    self._emit_field(i, events)
+                elif self._depth == 2 and self._value_is_array and self._item_start is not None:
+                    self._emit_item(i, events)
+                continue
+
+            if self._depth == 2 and self._value_is_array and self._item_start is None and not ch.isspace():
+                # 数字 / 布尔 / null 元素
+                self._item_start = i
+
+        return events
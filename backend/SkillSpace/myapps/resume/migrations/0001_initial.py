@@ -0,0 +1,130 @@
+# Generated by Django 4.2.27 on 2026-10-19 02:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Resume",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("file_name", models.CharField(help_text="原始文件名", max_length=255)),
+                ("content_hash", models.CharField(help_text="文件内容 SHA-256", max_length=64)),
+                ("file_size", models.PositiveIntegerField(default=0, help_text="文件大小（字节）")),
+                ("text_length", models.PositiveIntegerField(default=0, help_text="提取文本长度（字符）")),
+                ("text_compressed", models.BinaryField(help_text="提取文本（zlib 压缩）")),
+                ("created_at", models.DateTimeField(auto_now_add=True, help_text="首次上传时间")),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="上传用户（可为空，支持匿名）",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="resumes",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "简历",
+                "verbose_name_plural": "简历",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="Diagnosis",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("jd_hash", models.CharField(help_text="规范化 JD 的 SHA-256", max_length=64)),
+                ("jd_text", models.TextField(help_text="岗位描述")),
+                ("model_name", models.CharField(help_text="诊断模型", max_length=50)),
+                ("score", models.SmallIntegerField(blank=True, help_text="大模型评分（0-100）", null=True)),
+                ("stage_one_score", models.FloatField(blank=True, help_text="初筛得分（0-100）", null=True)),
+                ("result", models.JSONField(default=dict, help_text="诊断结果 JSON")),
+                (
+                    "source",
+                    models.CharField(
+                        choices=[("sync", "同步诊断"), ("async", "异步诊断"), ("stream", "流式诊断"), ("batch", "批量筛选")],
+                        default="sync",
+                        help_text="诊断来源",
+                        max_length=10,
+                    ),
+                ),
+                ("batch_id", models.CharField(blank=True, default="", help_text="批量筛选批次ID", max_length=36)),
+                ("created_at", models.DateTimeField(auto_now_add=True, help_text="创建时间")),
+                ("updated_at", models.DateTimeField(auto_now=True, help_text="最近一次诊断时间")),
+                (
+                    "resume",
+                    models.ForeignKey(
+                        help_text="简历",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="diagnoses",
+                        to="resume.resume",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="发起诊断的用户（冗余字段，按用户查历史无需关联简历表）",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="resume_diagnoses",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "简历诊断",
+                "verbose_name_plural": "简历诊断",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="resume",
+            index=models.Index(fields=["user", "-created_at"], name="resume_resu_user_id_eb5bf4_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="resume",
+            index=models.Index(fields=["content_hash"], name="resume_resu_content_74a1e4_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="resume",
+            constraint=models.UniqueConstraint(fields=("user", "content_hash"), name="uniq_resume_user_content"),
+        ),
+        migrations.AddIndex(
+            model_name="diagnosis",
+            index=models.Index(fields=["user", "-created_at"], name="resume_diag_user_id_142b5b_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="diagnosis",
+            index=models.Index(fields=["user", "score"], name="resume_diag_user_id_f754e6_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="diagnosis",
+            index=models.Index(fields=["jd_hash", "-score"], name="resume_diag_jd_hash_fc6dbb_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="diagnosis",
+            index=models.Index(
+                condition=models.Q(("batch_id", ""), _negated=True), fields=["batch_id"], name="resume_diag_batch_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="diagnosis",
+            constraint=models.UniqueConstraint(
+                fields=("resume", "jd_hash", "model_name"), name="uniq_diagnosis_resume_jd_model"
+            ),
+        ),
+    ]
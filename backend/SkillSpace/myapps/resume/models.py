@@ -0,0 +1,106 @@
+# 文件路径: backend/myapps/resume/models.py
+import zlib
+
+from django.conf import settings
+from django.db import models
+
+
+class Resume(models.Model):
+    """
+    简历（按文件内容去重：同一用户上传相同文件只保存一份）
+
+    提取出的文本以 zlib 压缩后存储，列表查询应 defer("text_compressed")。
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="resumes",
+        help_text="上传用户（可为空，支持匿名）",
+    )
+    file_name = models.CharField(max_length=255, help_text="原始文件名")
+    content_hash = models.CharField(max_length=64, help_text="文件内容 SHA-256")
+    file_size = models.PositiveIntegerField(default=0, help_text="文件大小（字节）")
+    text_length = models.PositiveIntegerField(default=0, help_text="提取文本长度（字符）")
+    text_compressed = models.BinaryField(editable=False, help_text="提取文本（zlib 压缩）")
+    created_at = models.DateTimeField(auto_now_add=True, help_text="首次上传时间")
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "简历"
+        verbose_name_plural = "简历"
+        indexes = [
+            models.Index(fields=["user", "-created_at"]),
+            models.Index(fields=["content_hash"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "content_hash"], name="uniq_resume_user_content"),
+        ]
+
+    def __str__(self):
+        return f"{self.file_name} ({self.content_hash[:8]})"
+
+    @property
+    def text(self):
+        """解压后的简历文本"""
+        if not self.text_compressed:
+            return ""
+        return zlib.decompress(bytes(self.text_compressed)).decode("utf-8")
+
+    @text.setter
+    def text(self, value):
+        value = value or ""
+        self.text_compressed = zlib.compress(value.encode("utf-8"), 6)
+        self.text_length = len(value)
+
+
+class Diagnosis(models.Model):
+    """
+    简历诊断结果（同一简历 + 同一 JD + 同一模型只保留最新一次）
+    """
+
+    SOURCE_CHOICES = (
+        ("sync", "同步诊断"),
+        ("async", "异步诊断"),
+        ("stream", "流式诊断"),
+        ("batch", "批量筛选"),
+    )
+
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name="diagnoses", help_text="简历")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="resume_diagnoses",
+        help_text="发起诊断的用户（冗余字段，按用户查历史无需关联简历表）",
+    )
+    jd_hash = models.CharField(max_length=64, help_text="规范化 JD 的 SHA-256")
+    jd_text = models.TextField(help_text="岗位描述")
+    model_name = models.CharField(max_length=50, help_text="诊断模型")
+    score = models.SmallIntegerField(null=True, blank=True, help_text="大模型评分（0-100）")
+    stage_one_score = models.FloatField(null=True, blank=True, help_text="初筛得分（0-100）")
+    result = models.JSONField(default=dict, help_text="诊断结果 JSON")
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default="sync", help_text="诊断来源")
+    batch_id = models.CharField(max_length=36, blank=True, default="", help_text="批量筛选批次ID")
+    created_at = models.DateTimeField(auto_now_add=True, help_text="创建时间")
+    updated_at = models.DateTimeField(auto_now=True, help_text="最近一次诊断时间")
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "简历诊断"
+        verbose_name_plural = "简历诊断"
+        indexes = [
+            models.Index(fields=["user", "-created_at"]),
+            models.Index(fields=["user", "score"]),
+            models.Index(fields=["jd_hash", "-score"]),
+            models.Index(fields=["batch_id"], condition=~models.Q(batch_id=""), name="resume_diag_batch_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["resume", "jd_hash", "model_name"], name="uniq_diagnosis_resume_jd_model"),
+        ]
+
+    def __str__(self):
+        return f"{self.resume.file_name} - {self.score}"
@@ -0,0 +1,203 @@
+# 文件路径: backend/myapps/resume/pdf_extract.py
+"""
+PDF 文本提取（按页并行）
+
+- 快速路径：pypdfium2 直接读取文本层（比 pdfplumber 的版面分析快一个数量级）；
+  某页快速路径取不到文本时，该页回退到 pdfplumber；
+- 页数超过 RESUME_PDF_PARALLEL_MIN_PAGES 时，按页区间拆分到进程池并行提取；
+  在 Celery prefork 等守护进程内无法创建子进程，自动退化为顺序提取；
+- 进程池用 forkserver（不支持时用 spawn）启动子进程：Daphne / Celery 进程里有监控线程、
+  数据库和频道层连接，直接 fork 会把这些状态复制进子进程，可能死锁或与父进程共用 socket；
+- 提取超时时整个进程池被回收（终止卡住的子进程），下次使用时重建；
+- 页数超过 RESUME_PDF_MAX_PAGES 或总耗时超过 RESUME_PDF_TIMEOUT 时抛出 PDFExtractionError。
+
+source 参数可以是文件路径或 PDF 字节内容；各页文本以换页符（PAGE_BREAK）分隔，
+供 resume/preprocess.py 识别页眉页脚。
+"""
+
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+import pdfplumber
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # pragma: no cover - pypdfium2 随 pdfplumber 一起安装
+    pdfium = None
+
+logger = logging.getLogger(__name__)
+
+# 页间分隔符
+PAGE_BREAK = "\f"
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+class PDFExtractionError(ValueError):
+    """PDF 超出页数 / 时间限制或无法解析"""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _open_pdfplumber(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return pdfplumber.open(io.BytesIO(source))
+    return pdfplumber.open(source)
+
+
+def count_pages(source):
+    """获取 PDF 页数"""
+    if pdfium is not None:
+        doc = pdfium.PdfDocument(source)
+        try:
+            return len(doc)
+        finally:
+            doc.close()
+    with _open_pdfplumber(source) as pdf:
+        return len(pdf.pages)
+
+
+def extract_page_range(source, start, end):
+    """
+    提取 [start, end) 页的文本（进程池任务入口，必须是模块级函数）
+
+    Returns:
+        每页文本组成的列表
+    """
+    texts = [""] * (end - start)
+    if pdfium is not None:
+        doc = pdfium.PdfDocument(source)
+        try:
+            for offset, index in enumerate(range(start, end)):
+                page = doc[index]
+                textpage = page.get_textpage()
+                texts[offset] = textpage.get_text_range().replace("\r\n", "\n").strip()
+                textpage.close()
+                page.close()
+        finally:
+            doc.close()
+
+    # 快速路径没有取到文本的页，回退到 pdfplumber
+    missing = [offset for offset, text in enumerate(texts) if not text]
+    if missing:
+        with _open_pdfplumber(source) as pdf:
+            for offset in missing:
+                texts[offset] = (pdf.pages[start + offset].extract_text() or "").strip()
+    return texts
+
+
+def _get_pool():
+    """进程池按需创建，同一进程内复用"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None:
+            _pool_workers = _setting("RESUME_PDF_WORKERS", min(4, os.cpu_count() or 1))
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=_pool_workers, mp_context=multiprocessing.get_context(method))
+        return _pool, _pool_workers
+
+
+def _discard_pool(pool):
+    """不再复用该进程池（仍是当前进程池时才清除）"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+
+def _recycle_pool(pool):
+    """
+    回收进程池（提取超时时调用）
+
+    future.cancel() 停不下已在执行的任务，卡住的子进程会一直占用进程池，
+    这里终止所有子进程并丢弃进程池，下次 _get_pool() 时重建。
+    """
+    _discard_pool(pool)
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    logger.warning(f"PDF 解析超时，已回收进程池（{len(processes)} 个子进程）")
+
+
+def _can_fork():
+    """守护进程（如 Celery prefork 子进程）不允许再创建子进程"""
+    return not multiprocessing.current_process().daemon
+
+
+def extract_pdf_text(source, max_pages=None, timeout=None, parallel_min_pages=None):
+    """
+    提取 PDF 全文
+
+    Args:
+        source: 文件路径或 PDF 字节内容
+        max_pages: 最大页数（默认 settings.RESUME_PDF_MAX_PAGES）
+        timeout: 总耗时上限，秒（默认 settings.RESUME_PDF_TIMEOUT）
+        parallel_min_pages: 达到该页数才启用进程池（默认 settings.RESUME_PDF_PARALLEL_MIN_PAGES）
+
+    Returns:
+        按页顺序拼接的文本（页间以 PAGE_BREAK 分隔）
+
+    Raises:
+        PDFExtractionError: 超出页数或时间限制
+    """
+    max_pages = max_pages or _setting("RESUME_PDF_MAX_PAGES", 50)
+    timeout = timeout or _setting("RESUME_PDF_TIMEOUT", 20)
+    parallel_min_pages = parallel_min_pages or _setting("RESUME_PDF_PARALLEL_MIN_PAGES", 8)
+    deadline = time.monotonic() + timeout
+
+    if isinstance(source, (bytearray, memoryview)):
+        source = bytes(source)
+
+    page_count = count_pages(source)
+    if page_count > max_pages:
+        raise PDFExtractionError(f"PDF 共 {page_count} 页，超过上限 {max_pages} 页")
+
+    if page_count < parallel_min_pages or not _can_fork():
+        texts = _extract_sequential(source, page_count, parallel_min_pages, deadline, timeout)
+    else:
+        pool, workers = _get_pool()
+        # 每个进程分到大致相同的连续页区间
+        step = max(1, -(-page_count // workers))
+        texts = []
+        try:
+            futures = [
+                pool.submit(extract_page_range, source, start, min(start + step, page_count))
+                for start in range(0, page_count, step)
+            ]
+            for future in futures:
+                texts.extend(future.result(timeout=max(0, deadline - time.monotonic())))
+        except FutureTimeoutError as e:
+            _recycle_pool(pool)
+            raise PDFExtractionError(f"PDF 解析超时（>{timeout}s）") from e
+        except (BrokenProcessPool, RuntimeError):
+            # 进程池已被其他请求的超时回收（或子进程异常退出），本次改为顺序提取
+            logger.warning("PDF 解析进程池不可用，改为顺序提取")
+            _discard_pool(pool)
+            texts = _extract_sequential(source, page_count, parallel_min_pages, deadline, timeout)
+
+    return PAGE_BREAK.join(text for text in texts if text)
+
+
+def _extract_sequential(source, page_count, chunk_pages, deadline, timeout):
+    """在当前进程中按页区间顺序提取，每个区间前检查总耗时"""
+    texts = []
+    for start in range(0, page_count, chunk_pages):
+        if time.monotonic() > deadline:
+            raise PDFExtractionError(f"PDF 解析超时（>{timeout}s）")
+        texts.extend(extract_page_range(source, start, min(start + chunk_pages, page_count)))
+    return texts
@@ -0,0 +1,284 @@
+# 文件路径: backend/myapps/resume/preprocess.py
+"""
+简历 / JD 送入大模型前的预处理
+
+1. 规范化：全半角统一、合并空白、去掉页码行；
+2. 去页眉页脚：PDF 各页（extract_pdf_text 以换页符分隔）首尾重复出现的行；
+3. 分段：识别基本信息 / 个人简介 / 工作经历 / 项目经历 / 技能 / 教育背景等段落；
+4. 压缩：按 token 预算保留与 JD 最相关的段落，超出预算的段落按行截断（优先保留命中 JD 技能词的行）。
+
+token 数按中文 1 字 1 token、其他字符约 4 个 1 token 估算，不依赖具体分词器。
+"""
+
+import math
+import re
+import unicodedata
+from collections import Counter
+
+from django.conf import settings
+
+from .embedding import extract_skills
+from .pdf_extract import PAGE_BREAK
+
+CJK_RE = re.compile(r"[\u4e00-\u9fff]")
+PAGE_NUMBER_RE = re.compile(
+    r"^(?:-?\s*\d+\s*-?|page\s*\d+(?:\s*(?:of|/)\s*\d+)?|第\s*\d+\s*页(?:\s*[/，,]?\s*共\s*\d+\s*页)?|\d+\s*/\s*\d+)$",
+    re.IGNORECASE,
+)
+
+# 句子结尾（切分超长行用，切分点之后的空白留在下一句开头，拼接时原样还原）
+SENTENCE_END_RE = re.compile(r"(?<=[。！？；;!?])|(?<=\.)(?=\s)")
+
+# 段落标题关键词 -> 段落类型
+SECTION_PATTERNS = [
+    ("summary", r"个人简介|自我评价|个人优势|个人总结|summary|profile|about me"),
+    ("experience", r"工作经历|工作经验|实习经历|任职经历|work experience|experience|employment"),
+    ("projects", r"项目经历|项目经验|项目介绍|projects?"),
+    ("skills", r"专业技能|技能特长|技术栈|技能|skills|technical skills"),
+    ("education", r"教育背景|教育经历|学历|education"),
+    ("awards", r"获奖情况|荣誉奖项|证书|awards|certifications?"),
+]
+SECTION_RE = [
+    (name, re.compile(rf"^[\s#*【\[■●◆]*(?:{pattern})[\s】\]:：]*$", re.IGNORECASE)) for name, pattern in SECTION_PATTERNS
+]
+
+# 段落基础优先级（再叠加与 JD 技能词的重合度）
+SECTION_PRIORITY = {
+    "basic": 2,
+    "skills": 3,
+    "experience": 3,
+    "projects": 2.5,
+    "summary": 1.5,
+    "education": 1,
+    "awards": 0.5,
+    "other": 0.5,
+}
+
+SECTION_TITLES = {
+    "basic": "基本信息",
+    "summary": "个人简介",
+    "experience": "工作经历",
+    "projects": "项目经历",
+    "skills": "专业技能",
+    "education": "教育背景",
+    "awards": "获奖证书",
+    "other": "其他",
+}
+
+
+def estimate_tokens(text):
+    """粗略估算 token 数"""
+    cjk = len(CJK_RE.findall(text))
+    others = len(re.sub(r"\s", "", text)) - cjk
+    return cjk + math.ceil(others / 4)
+
+
+def normalize_text(text):
+    """全半角统一、行内空白合并、去掉空行堆叠（保留换页符）"""
+    text = unicodedata.normalize("NFKC", text or "").replace("\r\n", "\n").replace("\r", "\n")
+    pages = []
+    for page in text.split(PAGE_BREAK):
+        lines = [re.sub(r"[ \t\xa0]+", " ", line).strip() for line in page.split("\n")]
+        pages.append("\n".join(lines))
+    text = PAGE_BREAK.join(pages)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def _line_key(line):
+    # 页眉页脚常带页码 / 日期，数字统一后再比较
+    return re.sub(r"\d+", "#", line.lower())
+
+
+def strip_headers_footers(text, edge_lines=2):
+    """
+    去掉各页首尾重复出现的行（页眉、页脚、页码）
+
+    某行（数字归一后）出现在超过一半页面的首尾 edge_lines 行内即视为页眉页脚。
+    """
+    pages = [[line for line in page.split("\n") if line] for page in text.split(PAGE_BREAK)]
+    if len(pages) >= 2:
+        counter = Counter()
+        for lines in pages:
+            counter.update({_line_key(line) for line in lines[:edge_lines] + lines[-edge_lines:]})
+        threshold = max(2, len(pages) // 2 + 1)
+        repeated = {key for key, count in counter.items() if count >= threshold}
+        pages = [
+            [
+                line
+                for position, line in enumerate(lines)
+                if not ((position < edge_lines or position >= len(lines) - edge_lines) and _line_key(line) in repeated)
+            ]
+            for lines in pages
+        ]
+    lines = [line for page in pages for line in page if not PAGE_NUMBER_RE.match(line)]
+    return "\n".join(lines)
+
+
+def split_sections(text):
+    """
+    按段落标题分段
+
+    Returns:
+        [{"name": "experience", "title": "工作经历", "lines": [...]}, ...]，标题前的内容归入 basic
+    """
+    sections = [{"name": "basic", "title": SECTION_TITLES["basic"], "lines": []}]
+    for line in text.split("\n"):
+        if len(line) <= 20:
+            name = next((name for name, pattern in SECTION_RE if pattern.match(line)), None)
+            if name:
+                sections.append({"name": name, "title": line.strip(" #*:：【】[]■●◆"), "lines": []})
+                continue
+        sections[-1]["lines"].append(line)
+    return [section for section in sections if section["lines"]]
+
+
+def _relevance(section, jd_skills):
+    text = "\n".join(section["lines"]).lower()
+    hits = sum(1 for skill in jd_skills if skill in text)
+    overlap = hits / len(jd_skills) if jd_skills else 0
+    return SECTION_PRIORITY.get(section["name"], SECTION_PRIORITY["other"]) + 3 * overlap
+
+
+def _clip(text, budget):
+    """截取 text 开头不超过 budget 个 token 的部分（二分查找字符数）"""
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low].rstrip()
+
+
+def _truncate_lines(lines, budget, jd_skills):
+    """
+    在预算内保留行：优先命中 JD 技能词的行，其次按原顺序，输出保持原顺序
+
+    PDF 提取出的一整段经历常是一个超长行：超过预算的行先按句子切开再挑选；
+    挑选后仍有余量时，把得分最高的未入选片段截断到剩余预算，避免整段被丢弃。
+    """
+    pieces = []  # (原行号, 文本)
+    for index, line in enumerate(lines):
+        if estimate_tokens(line) + 1 > budget:
+            pieces.extend((index, sentence) for sentence in SENTENCE_END_RE.split(line) if sentence.strip())
+        else:
+            pieces.append((index, line))
+    scored = sorted(
+        range(len(pieces)),
+        key=lambda i: (-sum(1 for skill in jd_skills if skill in pieces[i][1].lower()), i),
+    )
+    kept, skipped, used = {}, [], 0
+    for i in scored:
+        cost = estimate_tokens(pieces[i][1]) + 1
+        if used + cost > budget:
+            skipped.append(i)
+            continue
+        kept[i] = pieces[i][1]
+        used += cost
+    if skipped and budget - used > 1:
+        clipped = _clip(pieces[skipped[0]][1], budget - used - 1)
+        if clipped:
+            kept[skipped[0]] = clipped
+
+    # 同一原行的片段重新拼回一行
+    merged = {}
+    for i in sorted(kept):
+        merged[pieces[i][0]] = merged.get(pieces[i][0], "") + kept[i]
+    return [merged[index] for index in sorted(merged)]
+
+
+def compress_resume(resume_text, jd_text, budget=None):
+    """
+    简历预处理并压缩到 token 预算内
+
+    Returns:
+        (处理后的文本, 统计信息 dict)
+    """
+    budget = budget or getattr(settings, "RESUME_PROMPT_TOKEN_BUDGET", 3000)
+    text = strip_headers_footers(normalize_text(resume_text))
+    sections = split_sections(text)
+    original_tokens = estimate_tokens(text)
+    stats = {"original_tokens": original_tokens, "sections": [s["name"] for s in sections], "omitted": [], "truncated": []}
+
+    if original_tokens <= budget:
+        stats["tokens"] = original_tokens
+        return text, stats
+
+    jd_skills = extract_skills(jd_text)
+    weights = [_relevance(section, jd_skills) for section in sections]
+    headers = [estimate_tokens(section["title"]) + 1 for section in sections]
+    costs = [estimate_tokens("\n".join(section["lines"])) + headers[i] for i, section in enumerate(sections)]
+
+    # 按相关度加权分配预算（注水法）：放得下的短段落整段保留，余量按权重分给其余段落
+    allocation = {}
+    pending = set(range(len(sections)))
+    remaining = budget
+    while pending:
+        total_weight = sum(weights[i] for i in pending)
+        fitted = [i for i in pending if costs[i] <= remaining * weights[i] / total_weight]
+        if not fitted:
+            for i in pending:
+                allocation[i] = int(remaining * weights[i] / total_weight)
+            break
+        for i in fitted:
+            allocation[i] = costs[i]
+            remaining -= costs[i]
+            pending.discard(i)
+
+    kept = {}
+    for index, section in enumerate(sections):
+        if allocation[index] >= costs[index]:
+            kept[index] = section["lines"]
+        elif allocation[index] - headers[index] > 10:
+            lines = _truncate_lines(section["lines"], allocation[index] - headers[index], jd_skills)
+            if lines:
+                kept[index] = lines
+                stats["truncated"].append(section["title"])
+        if index not in kept:
+            stats["omitted"].append(section["title"])
+
+    parts = []
+    for index, section in enumerate(sections):
+        if index in kept:
+            header = [] if section["name"] == "basic" else [section["title"]]
+            parts.append("\n".join(header + kept[index]))
+    if stats["omitted"]:
+        parts.append(f"（篇幅限制，已省略：{'、'.join(stats['omitted'])}）")
+
+    result = "\n\n".join(parts)
+    stats["tokens"] = estimate_tokens(result)
+    return result, stats
+
+
+def compress_jd(jd_text, budget=None):
+    """
+    JD 规范化并按行截断到 token 预算内（JD 通常较短，只保留开头部分）
+
+    放不下的那一行截断到剩余预算后保留，整段写成一行的超长 JD 不会变成空字符串。
+    """
+    budget = budget or getattr(settings, "RESUME_JD_TOKEN_BUDGET", 1000)
+    lines = normalize_text(jd_text).replace(PAGE_BREAK, "\n").split("\n")
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            clipped = _clip(line, budget - used - 1)
+            if clipped:
+                kept.append(clipped)
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept).strip()
+
+
+def prepare_prompt_inputs(resume_text, jd_text):
+    """
+    构造 Prompt 前的统一入口
+
+    Returns:
+        (简历文本, JD 文本, 简历统计信息)
+    """
+    jd = compress_jd(jd_text)
+    resume, stats = compress_resume(resume_text, jd)
+    return resume, jd, stats
@@ -0,0 +1,13 @@
+# resume/routing.py
+"""
+简历模块 WebSocket 路由配置
+"""
+
+from django.urls import path
+
+from . import consumers
+
+websocket_urlpatterns = [
+    # 简历诊断进度：ws://localhost:8000/ws/resume/<job_id>/
+    path("ws/resume/<str:job_id>/", consumers.ResumeJobConsumer.as_asgi()),
+]
@@ -8,3 +8,17 @@ class ResumeDiagnosisSerializer(serializers.Serializer):
 
     # ⚠️ 必须是 CharField，不要改成 FileField
     jd_text = serializers.CharField(required=True, error_messages={"required": "职位描述(JD)不能为空"})
+
+
+class ResumeBatchSerializer(serializers.Serializer):
+    # 多个文件用同一个字段名 resume_files 上传，可以混合 .pdf/.txt/.md 和 .zip
+    resume_files = serializers.ListField(
+        child=serializers.FileField(),
+        allow_empty=False,
+        error_messages={"required": "请上传简历文件或压缩包", "empty": "请上传简历文件或压缩包"},
+    )
+
+    jd_text = serializers.CharField(required=True, error_messages={"required": "职位描述(JD)不能为空"})
+
+    # 初筛后送大模型的份数（不传使用 settings.RESUME_PRERANK_TOP_K，0 表示全部送大模型）
+    top_k = serializers.IntegerField(required=False, min_value=0)
@@ -5,6 +5,10 @@ import os
 
 from openai import OpenAI
 
+from . import cache
+from .json_stream import IncrementalJSONParser
+from .preprocess import prepare_prompt_inputs
+
 # 推荐模型：
 # qwen-plus (性价比高，能力强)
 # qwen-max (能力最强，稍贵)
@@ -13,10 +17,15 @@ MODEL_NAME = "qwen-plus"
 # ===========================================
 
 
-def ai_analyze_resume(resume_text: str, jd_text: str) -> dict:
-    """
-    调用阿里云通义千问模型进行简历诊断
-    """
+def build_prompt(resume_text: str, jd_text: str) -> str:
+    """构造简历诊断 Prompt（同步 / 流式诊断共用）"""
+    # 规范化、去页眉页脚，并按 token 预算保留与 JD 最相关的段落（缓存仍以原文为键）
+    resume_text, jd_text, stats = prepare_prompt_inputs(resume_text, jd_text)
+    if stats["omitted"] or stats["truncated"]:
+        print(
+            f"简历已压缩: {stats['original_tokens']} -> {stats['tokens']} tokens, "
+            f"截断: {stats['truncated']}, 省略: {stats['omitted']}"
+        )
 
     # 构造 Prompt (提示词)
     # 这里的 Prompt 不需要变，通义千问完全听得懂
@@ -38,6 +47,23 @@ def ai_analyze_resume(resume_text: str, jd_text: str) -> dict:
     必须返回标准的 JSON 格式，包含以下字段：score, summary, pros(list), cons(list), suggestions。
     不要返回 Markdown 格式（如 ```json ... ```），直接返回 JSON 字符串。
     """
+    return prompt
+
+
+def ai_analyze_resume(resume_text: str, jd_text: str) -> dict:
+    """
+    调用阿里云通义千问模型进行简历诊断
+
+    相同简历文本 + 规范化 JD + 模型的结果直接从缓存返回（见 resume/cache.py），
+    调用失败返回的兜底数据不会写入缓存。
+    送入模型前经过 resume/preprocess.py 预处理，长简历按 RESUME_PROMPT_TOKEN_BUDGET 压缩。
+    """
+    cached = cache.get_diagnosis(resume_text, jd_text, MODEL_NAME)
+    if cached is not None:
+        return cached
+
+    prompt = build_prompt(resume_text, jd_text)
+
     # 获取密钥和地址
     ALIYUN_API_KEY = os.getenv("ALIYUN_API_KEY")
     ALIYUN_BASE_URL = os.getenv("ALIYUN_BASE_URL")
@@ -66,8 +92,10 @@ def ai_analyze_resume(resume_text: str, jd_text: str) -> dict:
         # 有时候模型还是会顽皮地加上 ```json 头，这里做个清洗保险
         if content.startswith("```json"):
             content = content.replace("```json", "").replace("```", "")
-        print(f"阿里云接口返回内容: {json.loads(content)}")
-        return json.loads(content)
+        result = json.loads(content)
+        print(f"阿里云接口返回内容: {result}")
+        cache.set_diagnosis(resume_text, jd_text, MODEL_NAME, result)
+        return result
 
     except Exception as e:
         print(f"阿里云接口调用失败: {e}")
@@ -79,3 +107,68 @@ def ai_analyze_resume(resume_text: str, jd_text: str) -> dict:
             "cons": [],
             "suggestions": "请检查后端 API Key 配置。",
         }
+
+
+# 流式诊断中需要逐条推送的列表字段
+STREAM_LIST_FIELDS = ("pros", "cons", "suggestions")
+
+
+def _replay_result(result):
+    """把完整结果拆成与流式解析相同的事件序列（缓存命中时使用）"""
+    for field, value in result.items():
+        if isinstance(value, list) and field in STREAM_LIST_FIELDS:
+            for index, item in enumerate(value):
+                yield {"type": "item", "field": field, "index": index, "value": item}
+        yield {"type": "field", "field": field, "value": value}
+
+
+def stream_analyze_resume(resume_text: str, jd_text: str):
+    """
+    流式简历诊断：以 stream=True 调用模型，增量解析 JSON，每个字段 / 列表元素完整时立即产出
+
+    Yields:
+        {"type": "item", "field": "pros", "index": 0, "value": "..."}
+        {"type": "field", "field": "score", "value": 85}
+        {"type": "done", "result": {...}, "cached": bool}
+        {"type": "error", "message": "..."}
+    """
+    cached = cache.get_diagnosis(resume_text, jd_text, MODEL_NAME)
+    if cached is not None:
+        yield from _replay_result(cached)
+        yield {"type": "done", "result": cached, "cached": True}
+        return
+
+    prompt = build_prompt(resume_text, jd_text)
+    parser = IncrementalJSONParser()
+    try:
+        client = OpenAI(api_key=os.getenv("ALIYUN_API_KEY"), base_url=os.getenv("ALIYUN_BASE_URL"))
+        response = client.chat.completions.create(
+            model=MODEL_NAME,
+            messages=[
+                {
+                    "role": "system",
+                    "content": "你是一个能够输出结构化 JSON 数据的助手。",
+                },
+                {"role": "user", "content": prompt},
+            ],
+            response_format={"type": "json_object"},
+            stream=True,
+        )
+
+        for chunk in response:
+            if not chunk.choices or chunk.choices[0].delta.content is None:
+                continue
+            yield from parser.feed(chunk.choices[0].delta.content)
+            if parser.finished:
+                break
+
+        if not parser.finished:
+            raise ValueError("模型返回的 JSON 不完整")
+
+        result = parser.result()
+        cache.set_diagnosis(resume_text, jd_text, MODEL_NAME, result)
+        yield {"type": "done", "result": result, "cached": False}
+
+    except Exception as e:
+        print(f"阿里云流式接口调用失败: {e}")
+        yield {"type": "error", "message": f"服务暂时不可用: {str(e)}"}
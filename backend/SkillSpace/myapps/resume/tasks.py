@@ -0,0 +1,277 @@
+# 文件路径: backend/myapps/resume/tasks.py
+"""
+简历诊断异步任务（celery_demo.py 中 myapps.resume.tasks.* 路由到 api_queue）
+
+Web 请求只负责保存上传文件并投递任务，文本提取和大模型调用都在 Worker 中完成，
+进度通过 Celery 任务状态（轮询接口）和 Channel Layer（WebSocket）两路推送。
+"""
+
+import logging
+import os
+import random
+import shutil
+
+from django.conf import settings
+
+from asgiref.sync import async_to_sync
+from celery import shared_task
+from celery.exceptions import Retry
+from channels.layers import get_channel_layer
+
+from . import batch, cache
+from .embedding import stage_one_score
+from .history import is_fallback_result, persist_diagnosis
+from .services import MODEL_NAME, ai_analyze_resume
+from .utils import extract_text_cached, get_job_dir
+
+logger = logging.getLogger(__name__)
+
+# 获取 Channel Layer 实例（用于向 WebSocket 推送进度）
+channel_layer = get_channel_layer()
+
+
+def publish_progress(job_id, stage, progress, **extra):
+    """
+    推送任务进度到 WebSocket（group: resume_<job_id>）
+
+    推送失败不影响任务本身，前端仍可通过状态接口轮询结果。
+    """
+    try:
+        async_to_sync(channel_layer.group_send)(
+            f"resume_{job_id}",
+            {"type": "resume_progress", "job_id": job_id, "stage": stage, "progress": progress, **extra},
+        )
+    except Exception as e:
+        logger.warning(f"推送简历诊断进度失败: job_id={job_id}, {e}")
+
+
+def _set_progress(task, stage, progress):
+    task.update_state(state="PROGRESS", meta={"stage": stage, "progress": progress})
+    publish_progress(task.request.id, stage, progress)
+
+
+@shared_task(name="myapps.resume.tasks.diagnose_resume", bind=True)
+def diagnose_resume(self, file_path, jd_text, user_id=None, file_name=None):
+    """
+    简历诊断任务
+
+    参数：
+        file_path: Web 端保存的上传文件路径（任务结束后删除所在目录）
+        jd_text: 岗位描述
+        user_id: 提交任务的用户（用于保存诊断历史）
+        file_name: 原始文件名
+
+    返回：
+        诊断结果 dict（score, summary, pros, cons, suggestions）
+    """
+    job_id = self.request.id
+    logger.info(f"📥 [Resume Task] 开始诊断: job_id={job_id}")
+
+    try:
+        _set_progress(self, "extracting", 10)
+        resume_content, file_hash = _read_resume(file_path)
+
+        _set_progress(self, "analyzing", 40)
+        result = ai_analyze_resume(resume_content, jd_text)
+        persist_diagnosis(
+            user_id=user_id,
+            file_name=file_name or os.path.basename(file_path),
+            file_hash=file_hash,
+            file_size=os.path.getsize(file_path),
+            resume_text=resume_content,
+            jd_text=jd_text,
+            result=result,
+            model_name=MODEL_NAME,
+            source="async",
+        )
+
+        publish_progress(job_id, "completed", 100, result=result)
+        logger.info(f"✅ [Resume Task] 诊断完成: job_id={job_id}, score={result.get('score')}")
+        return result
+
+    except Exception as e:
+        logger.error(f"❌ [Resume Task] 诊断失败: job_id={job_id}, {e}")
+        publish_progress(job_id, "failed", 100, error=str(e))
+        raise
+
+    finally:
+        shutil.rmtree(get_job_dir(job_id), ignore_errors=True)
+
+
+def _read_resume(file_path):
+    """提取暂存文件的文本，返回 (文本, 文件哈希)"""
+    with open(file_path, "rb") as fp:
+        resume_content, file_hash = extract_text_cached(fp)
+    if not resume_content or len(resume_content) < 10:
+        raise ValueError("文件解析为空")
+    return resume_content, file_hash
+
+
+def _failed_item(batch_id, index, filename, error):
+    logger.error(f"❌ [Resume Batch] 简历筛选失败: batch_id={batch_id}, file={filename}, {error}")
+    return {"index": index, "filename": filename, "status": "failed", "error": str(error) or error.__class__.__name__}
+
+
+def _finish_item(batch_id, meta, item, file_path):
+    """记录单份简历的最终结果并推送；最后一份完成时推送排名表并清理暂存目录"""
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+
+    finished = batch.record_result(batch_id, item["index"], item)
+    total = meta["total"]
+    publish_progress(
+        batch_id,
+        f"item_{item['status']}",
+        int(finished * 100 / total),
+        finished=finished,
+        total=total,
+        item=item,
+    )
+
+    if finished >= total:
+        status = batch.get_batch_status(batch_id)
+        publish_progress(batch_id, "completed", 100, finished=finished, total=total, ranking=status["ranking"])
+        shutil.rmtree(get_job_dir(batch_id), ignore_errors=True)
+        logger.info(f"✅ [Resume Batch] 批次完成: batch_id={batch_id}, total={total}")
+
+
+@shared_task(
+    name="myapps.resume.tasks.prerank_resume",
+    bind=True,
+    soft_time_limit=getattr(settings, "RESUME_BATCH_ITEM_TIME_LIMIT", 180),
+)
+def prerank_resume(self, batch_id, index, file_path):
+    """
+    批量筛选初筛：提取文本并计算第一阶段得分（不调用大模型）
+
+    最后一份初筛完成的任务负责选出前 top_k 份投递 screen_resume，其余直接记为 filtered；
+    有任务丢失时由 finish_prerank 在 RESUME_PRERANK_TIMEOUT 后兜底。
+    """
+    meta = batch.get_batch(batch_id)
+    if meta is None:
+        shutil.rmtree(get_job_dir(batch_id), ignore_errors=True)
+        return None
+    if batch.is_prerank_closed(batch_id):
+        # 已超时兜底，本份已记为失败
+        return None
+
+    filename = meta["files"][index]
+    try:
+        stage_one = stage_one_score(_read_resume(file_path)[0], meta["jd_text"])
+        batch.save_stage_one(batch_id, index, stage_one)
+        publish_progress(batch_id, "item_preranked", 0, item={"index": index, "filename": filename, "stage_one": stage_one})
+    except Exception as e:
+        _finish_item(batch_id, meta, _failed_item(batch_id, index, filename, e), file_path)
+
+    if batch.mark_preranked(batch_id) < meta["total"] or not batch.close_prerank(batch_id):
+        return None
+    _start_screening(batch_id, meta, batch.get_stage_one(batch_id, meta["total"]))
+    return None
+
+
+@shared_task(name="myapps.resume.tasks.finish_prerank")
+def finish_prerank(batch_id):
+    """
+    初筛超时兜底（提交批次时以 RESUME_PRERANK_TIMEOUT 延迟投递）
+
+    Worker 崩溃、硬超时等原因丢失的初筛任务永远不会计数，批次会一直停在 processing；
+    到期时初筛仍未结束，则把没有第一阶段得分的简历记为失败，按已有得分继续选出前 top_k 份。
+    """
+    meta = batch.get_batch(batch_id)
+    if meta is None or not batch.close_prerank(batch_id):
+        return None
+
+    stage_one = batch.get_stage_one(batch_id, meta["total"])
+    results = batch.get_results(batch_id, meta["total"])
+    missing = [index for index in range(meta["total"]) if index not in stage_one and index not in results]
+    logger.warning(f"⚠️ [Resume Batch] 初筛超时: batch_id={batch_id}, 未完成 {len(missing)} 份")
+    for index in missing:
+        item = _failed_item(batch_id, index, meta["files"][index], TimeoutError("初筛超时"))
+        _finish_item(batch_id, meta, item, meta["paths"][index])
+    _start_screening(batch_id, meta, stage_one)
+    return None
+
+
+def _start_screening(batch_id, meta, stage_one):
+    """初筛结束：前 top_k 份投递 screen_resume，其余记为 filtered"""
+    selected, filtered = batch.select_top_k(meta, stage_one)
+    logger.info(f"📊 [Resume Batch] 初筛完成: batch_id={batch_id}, 入选 {len(selected)} 份, 淘汰 {len(filtered)} 份")
+    for selected_index in selected:
+        screen_resume.delay(batch_id, selected_index, meta["paths"][selected_index])
+    for filtered_index in filtered:
+        item = {"index": filtered_index, "filename": meta["files"][filtered_index], "status": "filtered"}
+        _finish_item(batch_id, meta, item, meta["paths"][filtered_index])
+
+
+@shared_task(
+    name="myapps.resume.tasks.screen_resume",
+    bind=True,
+    soft_time_limit=getattr(settings, "RESUME_BATCH_ITEM_TIME_LIMIT", 180),
+)
+def screen_resume(self, batch_id, index, file_path):
+    """
+    批量筛选中的单份简历（见 resume/batch.py）
+
+    每份简历独立完成、独立推送，批次不等待最慢的一份；
+    需要调用大模型时先获取并发槽位，没有空闲槽位则延迟重试（文本提取结果已缓存，重试代价很小）。
+
+    参数：
+        batch_id: 批次 ID
+        index: 简历在批次中的序号
+        file_path: 暂存文件路径
+    """
+    meta = batch.get_batch(batch_id)
+    if meta is None:
+        logger.warning(f"⚠️ [Resume Batch] 批次不存在或已过期: batch_id={batch_id}")
+        shutil.rmtree(get_job_dir(batch_id), ignore_errors=True)
+        return None
+
+    filename = meta["files"][index]
+    try:
+        resume_content, file_hash = _read_resume(file_path)
+        if meta.get("prerank"):
+            stage_one = batch.get_stage_one(batch_id, meta["total"]).get(index)
+        else:
+            # 未初筛的批次也保存第一阶段得分，便于之后即时重排
+            stage_one = stage_one_score(resume_content, meta["jd_text"])
+            batch.save_stage_one(batch_id, index, stage_one)
+
+        result = cache.get_diagnosis(resume_content, meta["jd_text"], MODEL_NAME)
+        if result is None:
+            slot = batch.acquire_llm_slot()
+            if slot is None:
+                raise self.retry(
+                    countdown=random.uniform(1, 3),
+                    max_retries=getattr(settings, "RESUME_BATCH_SLOT_RETRIES", 300),
+                )
+            try:
+                result = ai_analyze_resume(resume_content, meta["jd_text"])
+            finally:
+                batch.release_llm_slot(slot)
+        if is_fallback_result(result):
+            # 大模型调用失败的兜底结果不参与排名（与 persist_diagnosis 一致，也不落库）
+            raise RuntimeError(result.get("summary") if isinstance(result, dict) else "大模型诊断失败")
+        item = {"index": index, "filename": filename, "status": "completed", "result": result}
+        persist_diagnosis(
+            user_id=meta.get("user_id"),
+            file_name=filename,
+            file_hash=file_hash,
+            file_size=os.path.getsize(file_path),
+            resume_text=resume_content,
+            jd_text=meta["jd_text"],
+            result=result,
+            model_name=MODEL_NAME,
+            source="batch",
+            batch_id=batch_id,
+            stage_one_score=stage_one["score"] if stage_one else None,
+        )
+
+    except Retry:
+        raise
+    except Exception as e:
+        item = _failed_item(batch_id, index, filename, e)
+
+    _finish_item(batch_id, meta, item, file_path)
+    return item
@@ -0,0 +1,149 @@
+# 文件路径: backend/myapps/resume/tests.py
+"""
+简历诊断回归测试
+
+运行：cd backend && python manage.py test resume
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+
+from . import batch, cache, embedding
+from .preprocess import compress_jd, estimate_tokens, normalize_text
+from .tasks import finish_prerank, screen_resume
+
+
+class CompressJDTests(SimpleTestCase):
+    def test_single_paragraph_over_budget_is_clipped(self):
+        """整段写成一行的超长 JD 截断到预算内，而不是返回空字符串"""
+        jd_text = "负责后端服务开发，熟悉 Python、Django、Redis 与消息队列。" * 55  # 约 1900 字
+        result = compress_jd(jd_text, budget=1000)
+        self.assertTrue(result)
+        self.assertTrue(normalize_text(jd_text).startswith(result))
+        self.assertLessEqual(estimate_tokens(result), 1000)
+
+    def test_lines_within_budget_are_kept(self):
+        self.assertEqual(compress_jd("岗位职责\n熟悉 Python", budget=100), "岗位职责\n熟悉 Python")
+
+
+def _stage_one(score):
+    return {"score": score, "similarity": score / 100, "keyword_overlap": score / 100}
+
+
+@mock.patch("resume.tasks.publish_progress")
+class BatchScreeningTests(SimpleTestCase):
+    def _create_batch(self, count, top_k=0):
+        batch_id = batch.new_batch_id()
+        job_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, job_dir, ignore_errors=True)
+        files = []
+        for index in range(count):
+            path = os.path.join(job_dir, f"{index}.txt")
+            with open(path, "w", encoding="utf-8") as fp:
+                fp.write("熟悉 Python 与 Django 的后端工程师")
+            files.append((f"{index}.txt", path))
+        return batch_id, batch.create_batch(batch_id, "Python 后端", files, top_k=top_k)
+
+    @mock.patch("resume.tasks.persist_diagnosis")
+    @mock.patch("resume.tasks.ai_analyze_resume", return_value={"score": 60, "summary": "服务暂时不可用，请稍后重试"})
+    def test_fallback_result_is_recorded_as_failed(self, analyze, persist, publish):
+        """大模型调用失败的兜底分数不参与排名"""
+        batch_id, meta = self._create_batch(1)
+        screen_resume.apply(args=[batch_id, 0, meta["paths"][0]])
+        (row,) = batch.get_batch_status(batch_id)["ranking"]
+        self.assertEqual(row["status"], "failed")
+        self.assertIsNone(row["rank"])
+        self.assertIn("服务暂时不可用", row["error"])
+
+    @mock.patch("resume.tasks.screen_resume.delay")
+    def test_finish_prerank_continues_with_available_scores(self, delay, publish):
+        """初筛任务丢失时按已有得分继续，只投递一次"""
+        batch_id, meta = self._create_batch(3, top_k=1)
+        batch.save_stage_one(batch_id, 0, _stage_one(40))
+        batch.save_stage_one(batch_id, 1, _stage_one(80))
+        batch.mark_preranked(batch_id)
+        batch.mark_preranked(batch_id)
+
+        finish_prerank(batch_id)
+        finish_prerank(batch_id)
+
+        delay.assert_called_once_with(batch_id, 1, meta["paths"][1])
+        statuses = {row["index"]: row["status"] for row in batch.get_batch_status(batch_id)["ranking"]}
+        self.assertEqual(statuses, {0: "filtered", 1: "pending", 2: "failed"})
+
+
+class DiagnosisStreamTests(TestCase):
+    @mock.patch("resume.views.persist_diagnosis", return_value=None)
+    async def test_first_event_arrives_before_body_completes(self, persist):
+        """ASGI 下第一个字段完整时立即推送，不等待整个模型响应"""
+        release = threading.Event()
+
+        def fake_stream(resume_text, jd_text):
+            yield {"type": "field", "field": "score", "value": 85}
+            release.wait(5)
+            yield {"type": "done", "result": {"score": 85}, "cached": False}
+
+        resume_file = SimpleUploadedFile("resume.txt", "熟悉 Python 与 Django 的后端工程师，五年经验".encode("utf-8"))
+        with mock.patch("resume.views.stream_analyze_resume", fake_stream):
+            response = await self.async_client.post(
+                "/api/resume/diagnose/stream/", {"resume_file": resume_file, "jd_text": "Python 后端"}
+            )
+            self.assertEqual(response.status_code, 200)
+            events = response.streaming_content.__aiter__()
+            first = await asyncio.wait_for(events.__anext__(), timeout=3)
+            self.assertFalse(release.is_set())
+            release.set()
+            rest = [chunk async for chunk in events]
+
+        self.assertEqual(json.loads(first.decode().removeprefix("data: "))["field"], "score")
+        self.assertEqual(json.loads(rest[-1].decode().removeprefix("data: "))["type"], "done")
+
+
+@override_settings(CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}})
+class ResumeJobConsumerTests(SimpleTestCase):
+    async def _connect(self, job_id, user):
+        from SkillSpace.myapps.resume.consumers import ResumeJobConsumer
+
+        communicator = WebsocketCommunicator(ResumeJobConsumer.as_asgi(), f"/ws/resume/{job_id}/")
+        communicator.scope["url_route"] = {"kwargs": {"job_id": job_id}}
+        communicator.scope["user"] = user
+        connected, _ = await communicator.connect()
+        await communicator.disconnect()
+        return connected
+
+    async def test_only_submitter_can_subscribe(self):
+        """进度推送包含完整诊断 / 排名，与状态接口一样只对提交者开放"""
+        owner = mock.Mock(id=1, is_authenticated=True)
+        other = mock.Mock(id=2, is_authenticated=True)
+        await sync_to_async(cache.set_job_owner)("job-ws-1", owner.id)
+        await sync_to_async(batch.create_batch)("batch-ws-1", "JD", [("a.txt", "/tmp/a.txt")], user_id=owner.id)
+
+        for job_id in ("job-ws-1", "batch-ws-1"):
+            self.assertTrue(await self._connect(job_id, owner))
+            self.assertFalse(await self._connect(job_id, other))
+            self.assertFalse(await self._connect(job_id, AnonymousUser()))
+
+
+class EmbeddingCacheTests(SimpleTestCase):
+    def test_large_matrix_is_cached(self):
+        """200 句 × 1024 维（float32 约 800KB）的简历句向量也能命中缓存"""
+        matrix = np.random.default_rng(0).random((200, 1024), dtype=np.float32)
+        with mock.patch("resume.embedding.embed_sentences", return_value=matrix) as embed:
+            first = embedding.embed_text("大型简历句向量缓存测试")
+            second = embedding.embed_text("大型简历句向量缓存测试")
+        embed.assert_called_once()
+        self.assertEqual(second.dtype, np.float32)
+        np.testing.assert_allclose(second, first, atol=1e-3)
@@ -0,0 +1,131 @@
+# 文件路径: backend/myapps/resume/upload.py
+"""
+简历上传处理（流式落盘 + 边收边校验）
+
+默认的 MultiPartParser 会把 2.5MB 以下的文件整个放在内存里，再整体交给解析器；
+并发上传多时内存峰值随文件大小线性增长。这里用自定义 upload handler 接管单文件诊断接口的上传：
+
+1. 按块（RESUME_UPLOAD_CHUNK_SIZE）写入临时文件，同时计算 SHA-256，内存占用与文件大小无关；
+2. 请求头 Content-Length 超限直接拒绝；收到的字节数一旦超过 RESUME_UPLOAD_MAX_BYTES 立即中止；
+3. 首块到达时校验扩展名和文件头（PDF 必须有 %PDF- 标记，文本文件不能含 NUL 字节）；
+4. 文件收完后先读 PDF 页数（只读交叉引用表，不解析页面），超过 RESUME_PDF_MAX_PAGES 直接拒绝。
+
+校验失败抛出 ResumeUploadError，由视图转为 4xx 响应，临时文件随即删除。
+"""
+
+import hashlib
+import mmap
+import os
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+from .pdf_extract import count_pages
+
+# 单文件诊断支持的格式
+ALLOWED_EXTENSIONS = (".pdf", ".txt", ".md")
+
+# 除文件外表单字段（jd_text 等）允许的额外字节数
+FORM_OVERHEAD_BYTES = 1024 * 1024
+
+
+class ResumeUploadError(ValueError):
+    """上传文件超出大小 / 类型 / 页数限制"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _format_size(num_bytes):
+    if num_bytes >= 1024 * 1024:
+        return f"{num_bytes / (1024 * 1024):g}MB"
+    return f"{num_bytes / 1024:g}KB"
+
+
+class ResumeUploadHandler(TemporaryFileUploadHandler):
+    """
+    流式写入临时文件并在接收过程中校验
+
+    返回的文件对象是 TemporaryUploadedFile，额外带有：
+        content_hash: 文件 SHA-256（后续缓存查询不再重新读文件）
+        page_count: PDF 页数（文本文件为 None）
+    """
+
+    def __init__(self, request=None, max_bytes=None):
+        super().__init__(request)
+        self.max_bytes = max_bytes or _setting("RESUME_UPLOAD_MAX_BYTES", 10 * 1024 * 1024)
+        self.chunk_size = _setting("RESUME_UPLOAD_CHUNK_SIZE", 64 * 1024)
+
+    def _reject(self, message, status_code=400):
+        self.upload_interrupted()
+        raise ResumeUploadError(message, status_code)
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length and content_length > self.max_bytes + FORM_OVERHEAD_BYTES:
+            raise ResumeUploadError(f"上传内容过大，简历文件不能超过 {_format_size(self.max_bytes)}", 413)
+        return None
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        self.extension = os.path.splitext(file_name or "")[1].lower()
+        if self.extension not in ALLOWED_EXTENSIONS:
+            raise ResumeUploadError(
+                f"不支持的文件格式: {self.extension or file_name}，仅支持 {'/'.join(ALLOWED_EXTENSIONS)}", 415
+            )
+        super().new_file(field_name, file_name, *args, **kwargs)
+        self.sha = hashlib.sha256()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0:
+            # PDF 规范允许文件头出现在前 1024 字节内
+            if self.extension == ".pdf" and b"%PDF-" not in raw_data[:1024]:
+                self._reject("文件内容不是有效的 PDF", 415)
+        if self.extension != ".pdf" and b"\x00" in raw_data:
+            self._reject("文本文件包含二进制内容", 415)
+
+        self.received += len(raw_data)
+        if self.received > self.max_bytes:
+            self._reject(f"简历文件不能超过 {_format_size(self.max_bytes)}", 413)
+
+        self.sha.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        uploaded.content_hash = self.sha.hexdigest()
+        uploaded.page_count = None
+
+        if self.extension == ".pdf" and file_size:
+            max_pages = _setting("RESUME_PDF_MAX_PAGES", 50)
+            try:
+                uploaded.page_count = count_pages(uploaded.temporary_file_path())
+            except Exception:
+                self._reject("PDF 文件已损坏或已加密，无法解析")
+            if uploaded.page_count > max_pages:
+                self._reject(f"PDF 共 {uploaded.page_count} 页，超过上限 {max_pages} 页")
+        return uploaded
+
+
+@contextmanager
+def open_mapped(uploaded_file):
+    """
+    以只读内存映射方式打开上传文件，供解析器直接读取（不把整个文件读进进程内存）
+
+    内存中的上传文件（未经 ResumeUploadHandler）退化为 memoryview。
+    """
+    if hasattr(uploaded_file, "temporary_file_path"):
+        with open(uploaded_file.temporary_file_path(), "rb") as fp:
+            if os.fstat(fp.fileno()).st_size == 0:
+                yield memoryview(b"")
+                return
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+    else:
+        uploaded_file.seek(0)
+        yield memoryview(uploaded_file.read())
@@ -1,9 +1,35 @@
 from django.urls import path
 
-from .views import ResumeDiagnosisView
+from .views import (
+    DiagnosisHistoryDetailView,
+    DiagnosisHistoryListView,
+    ResumeBatchDetailView,
+    ResumeBatchScreenView,
+    ResumeCacheStatsView,
+    ResumeDiagnosisAsyncView,
+    ResumeDiagnosisJobView,
+    ResumeDiagnosisStreamView,
+    ResumeDiagnosisView,
+    ResumeHistoryListView,
+)
 
 urlpatterns = [
     # path('resume/', ResumeListAPIView.as_view(), name='resume-list'),
     # 新增的 AI 诊断接口
     path("diagnose/", ResumeDiagnosisView.as_view(), name="resume-diagnose"),
+    # 流式诊断接口（SSE），每个字段生成完即推送
+    path("diagnose/stream/", ResumeDiagnosisStreamView.as_view(), name="resume-diagnose-stream"),
+    # 异步诊断接口（Celery api_queue），返回 job_id
+    path("diagnose/async/", ResumeDiagnosisAsyncView.as_view(), name="resume-diagnose-async"),
+    # 异步诊断任务状态 / 结果查询
+    path("diagnose/jobs/<str:job_id>/", ResumeDiagnosisJobView.as_view(), name="resume-diagnose-job"),
+    # 批量筛选：多份简历对同一 JD 打分排名
+    path("batch/", ResumeBatchScreenView.as_view(), name="resume-batch"),
+    path("batch/<str:batch_id>/", ResumeBatchDetailView.as_view(), name="resume-batch-detail"),
+    # 历史记录：简历列表、诊断列表（游标分页）、诊断详情
+    path("resumes/", ResumeHistoryListView.as_view(), name="resume-history"),
+    path("diagnoses/", DiagnosisHistoryListView.as_view(), name="resume-diagnosis-history"),
+    path("diagnoses/<int:pk>/", DiagnosisHistoryDetailView.as_view(), name="resume-diagnosis-detail"),
+    # 诊断缓存命中率统计
+    path("cache/stats/", ResumeCacheStatsView.as_view(), name="resume-cache-stats"),
 ]
@@ -1,5 +1,14 @@
 # backend/myapps/resume/utils.py
-import pdfplumber
+import os
+
+from django.conf import settings
+
+from . import cache
+from .pdf_extract import PDFExtractionError, extract_pdf_text
+from .upload import open_mapped
+
+# 异步诊断任务的上传文件暂存目录（Web 与 Celery Worker 共享）
+RESUME_JOB_DIR = os.path.join(settings.MEDIA_ROOT, "resume_jobs")
 
 
 def extract_text_from_file(uploaded_file):
@@ -12,18 +21,70 @@ def extract_text_from_file(uploaded_file):
 
     try:
         if filename.endswith(".pdf"):
-            # 处理PDF文件
-            with pdfplumber.open(uploaded_file) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
+            # 处理PDF文件（按页并行提取，超出页数 / 时间限制抛 PDFExtractionError）
+            text = extract_pdf_text(_pdf_source(uploaded_file))
         elif filename.endswith(".txt") or filename.endswith(".md"):
-            text = uploaded_file.read().decode("utf-8")
+            # 直接从内存映射解码，不先把整个文件读成 bytes
+            with open_mapped(uploaded_file) as data:
+                text = str(data, "utf-8")
         else:
             return None  # 暂不支持的格式
 
         return text.strip()
+    except PDFExtractionError:
+        raise
     except Exception as e:
         print(f"解析出错: {e}")
         return ""
+
+
+def _pdf_source(uploaded_file):
+    """
+    PDF 解析源：磁盘上已有的文件直接传路径（pdfium 按需读取页面，进程池各自打开，无需传输内容），
+    内存中的上传文件读出字节
+    """
+    if hasattr(uploaded_file, "temporary_file_path"):
+        return uploaded_file.temporary_file_path()
+    path = getattr(uploaded_file, "name", None)
+    if isinstance(path, str) and os.path.isabs(path) and os.path.isfile(path):
+        return path
+    uploaded_file.seek(0)
+    return uploaded_file.read()
+
+
+def extract_text_cached(uploaded_file):
+    """
+    带内容寻址缓存的文本提取（L1：文件 SHA-256 -> 文本）
+
+    Returns:
+        (text, file_hash)；格式不支持时 text 为 None
+    """
+    # ResumeUploadHandler 在接收时已算好哈希
+    file_hash = getattr(uploaded_file, "content_hash", None) or cache.file_digest(uploaded_file)
+    text = cache.get_text(file_hash)
+    if text is None:
+        text = extract_text_from_file(uploaded_file)
+        cache.set_text(file_hash, text)
+    return text, file_hash
+
+
+def get_job_dir(job_id):
+    """异步任务的文件暂存目录"""
+    return os.path.join(RESUME_JOB_DIR, job_id)
+
+
+def save_upload_for_job(uploaded_file, job_id):
+    """
+    将上传文件保存到任务暂存目录，供 Celery Worker 读取
+
+    Returns:
+        保存后的文件路径（保留原始扩展名，提取文本时据此判断格式）
+    """
+    job_dir = get_job_dir(job_id)
+    os.makedirs(job_dir, exist_ok=True)
+    ext = os.path.splitext(uploaded_file.name)[1].lower()
+    file_path = os.path.join(job_dir, f"resume{ext}")
+    with open(file_path, "wb") as fp:
+        for chunk in uploaded_file.chunks():
+            fp.write(chunk)
+    return file_path
@@ -1,15 +1,59 @@
 # 文件路径: backend/myapps/resume/views.py
+import json
+import logging
+import shutil
+import uuid
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+from ai_demo.export import aiter_chunks
+from ai_demo.pagination import InvalidCursor, estimate_count, keyset_filter, paginate_keyset, parse_page_size
+from celery import group
+from celery.result import AsyncResult
 from rest_framework import status
 from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .serializers import ResumeDiagnosisSerializer
-from .services import ai_analyze_resume
-from .utils import extract_text_from_file
+from . import batch, cache
+from .history import persist_diagnosis
+from .models import Diagnosis, Resume
+from .pdf_extract import PDFExtractionError
+from .serializers import ResumeBatchSerializer, ResumeDiagnosisSerializer
+from .services import MODEL_NAME, ai_analyze_resume, stream_analyze_resume
+from .tasks import diagnose_resume, finish_prerank, prerank_resume, screen_resume
+from .upload import ResumeUploadError, ResumeUploadHandler
+from .utils import extract_text_cached, get_job_dir, save_upload_for_job
+
+logger = logging.getLogger(__name__)
+
+
+def _user_id(request):
+    """当前登录用户 ID，匿名返回 None"""
+    return request.user.id if request.user.is_authenticated else None
+
+
+class ResumeUploadMixin:
+    """
+    单文件诊断接口的上传处理：用 ResumeUploadHandler 流式落盘并校验大小 / 类型 / 页数
 
+    upload handler 必须在读取 request.data 之前替换，因此放在 initialize_request 中。
+    """
 
-class ResumeDiagnosisView(APIView):
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [ResumeUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, ResumeUploadError):
+            return Response({"code": exc.status_code, "message": str(exc)}, status=exc.status_code)
+        return super().handle_exception(exc)
+
+
+class ResumeDiagnosisView(ResumeUploadMixin, APIView):
     parser_classes = [MultiPartParser, FormParser]
 
     def post(self, request, *args, **kwargs):
@@ -24,13 +68,26 @@ class ResumeDiagnosisView(APIView):
                 resume_file = serializer.validated_data["resume_file"]
                 jd_text = serializer.validated_data["jd_text"]
 
-                resume_content = extract_text_from_file(resume_file)
+                resume_content, file_hash = extract_text_cached(resume_file)
 
                 if not resume_content or len(resume_content) < 10:
                     return Response({"code": 400, "message": "文件解析为空"}, status=400)
 
                 result = ai_analyze_resume(resume_content, jd_text)
-                return Response({"code": 200, "data": result})
+                diagnosis = persist_diagnosis(
+                    user_id=_user_id(request),
+                    file_name=resume_file.name,
+                    file_hash=file_hash,
+                    file_size=resume_file.size,
+                    resume_text=resume_content,
+                    jd_text=jd_text,
+                    result=result,
+                    model_name=MODEL_NAME,
+                    source="sync",
+                )
+                return Response({"code": 200, "data": result, "diagnosis_id": diagnosis.id if diagnosis else None})
+            except PDFExtractionError as e:
+                return Response({"code": 400, "message": str(e)}, status=400)
             except Exception as e:
                 return Response({"code": 500, "message": str(e)}, status=500)
 
@@ -40,3 +97,501 @@ class ResumeDiagnosisView(APIView):
             {"code": 400, "message": "参数校验错误", "errors": serializer.errors},
             status=400,
         )
+
+
+class ResumeDiagnosisStreamView(ResumeUploadMixin, APIView):
+    """
+    简历流式诊断接口（SSE）
+
+    POST /api/resume/diagnose/stream/
+    表单字段与同步接口相同（resume_file, jd_text）。文件解析失败时直接返回 JSON 400；
+    否则以 text/event-stream 返回，每个字段完整时推送一条：
+        data: {"code": 200, "type": "field", "field": "score", "value": 85}
+        data: {"code": 200, "type": "item", "field": "pros", "index": 0, "value": "..."}
+        data: {"code": 200, "type": "done", "result": {...}, "cached": false}
+    出错时推送 {"code": 500, "type": "error", "msg": "..."}。
+    ASGI（daphne）下逐条在线程中取事件后立即发送；同步生成器会被 Django 整体读完才发送。
+    """
+
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request, *args, **kwargs):
+        serializer = ResumeDiagnosisSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"code": 400, "message": "参数校验错误", "errors": serializer.errors},
+                status=400,
+            )
+
+        resume_file = serializer.validated_data["resume_file"]
+        jd_text = serializer.validated_data["jd_text"]
+        try:
+            resume_content, file_hash = extract_text_cached(resume_file)
+        except PDFExtractionError as e:
+            return Response({"code": 400, "message": str(e)}, status=400)
+        if not resume_content or len(resume_content) < 10:
+            return Response({"code": 400, "message": "文件解析为空"}, status=400)
+
+        user_id = _user_id(request)
+
+        def event_stream():
+            try:
+                for event in stream_analyze_resume(resume_content, jd_text):
+                    if event["type"] == "done":
+                        diagnosis = persist_diagnosis(
+                            user_id=user_id,
+                            file_name=resume_file.name,
+                            file_hash=file_hash,
+                            file_size=resume_file.size,
+                            resume_text=resume_content,
+                            jd_text=jd_text,
+                            result=event["result"],
+                            model_name=MODEL_NAME,
+                            source="stream",
+                        )
+                        event["diagnosis_id"] = diagnosis.id if diagnosis else None
+                    if event["type"] == "error":
+                        yield f"data: {json.dumps({'code': 500, 'type': 'error', 'msg': event['message']}, ensure_ascii=False)}\n\n"
+                    else:
+                        yield f"data: {json.dumps({'code': 200, **event}, ensure_ascii=False)}\n\n"
+            except Exception as e:
+                logger.error(f"简历流式诊断失败: {e}")
+                yield f"data: {json.dumps({'code': 500, 'type': 'error', 'msg': str(e)}, ensure_ascii=False)}\n\n"
+
+        stream = event_stream()
+        if isinstance(request._request, ASGIRequest):
+            stream = aiter_chunks(stream, batch_size=1)
+        response = StreamingHttpResponse(stream, content_type="text/event-stream")
+        # 禁用缓存确保实时性
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+class ResumeDiagnosisAsyncView(ResumeUploadMixin, APIView):
+    """
+    简历异步诊断接口
+
+    POST /api/resume/diagnose/async/
+    表单字段与同步接口相同（resume_file, jd_text），只保存文件并投递 Celery 任务（api_queue），
+    立即返回 job_id：
+    {
+        "code": 200,
+        "data": {
+            "job_id": "xxx",
+            "status_url": "/api/resume/diagnose/jobs/xxx/",
+            "ws_url": "ws://host/ws/resume/xxx/"
+        }
+    }
+    """
+
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request, *args, **kwargs):
+        serializer = ResumeDiagnosisSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"code": 400, "message": "参数校验错误", "errors": serializer.errors},
+                status=400,
+            )
+
+        resume_file = serializer.validated_data["resume_file"]
+        jd_text = serializer.validated_data["jd_text"]
+
+        # 同一文件 + 同一 JD 已诊断过：直接返回缓存结果，不再投递任务
+        file_hash = getattr(resume_file, "content_hash", None) or cache.file_digest(resume_file)
+        cached_text = cache.get_text(file_hash)
+        if cached_text:
+            cached_result = cache.get_diagnosis(cached_text, jd_text, MODEL_NAME)
+            if cached_result is not None:
+                persist_diagnosis(
+                    user_id=_user_id(request),
+                    file_name=resume_file.name,
+                    file_hash=file_hash,
+                    file_size=resume_file.size,
+                    resume_text=cached_text,
+                    jd_text=jd_text,
+                    result=cached_result,
+                    model_name=MODEL_NAME,
+                    source="async",
+                )
+                return Response(
+                    {
+                        "code": 200,
+                        "message": "命中缓存",
+                        "data": {"job_id": None, "status": "completed", "cached": True, "result": cached_result},
+                    }
+                )
+
+        try:
+            job_id = str(uuid.uuid4())
+            file_path = save_upload_for_job(resume_file, job_id)
+            cache.set_job_owner(job_id, _user_id(request))
+            # 使用 job_id 作为 Celery task_id，状态查询直接复用任务结果
+            diagnose_resume.apply_async(
+                args=[file_path, jd_text],
+                kwargs={"user_id": _user_id(request), "file_name": resume_file.name},
+                task_id=job_id,
+            )
+        except Exception as e:
+            logger.error(f"简历诊断任务提交失败: {e}")
+            return Response({"code": 500, "message": str(e)}, status=500)
+
+        ws_protocol = "wss" if request.is_secure() else "ws"
+        return Response(
+            {
+                "code": 200,
+                "message": "任务已提交到异步队列",
+                "data": {
+                    "job_id": job_id,
+                    "status": "pending",
+                    "cached": False,
+                    "status_url": f"/api/resume/diagnose/jobs/{job_id}/",
+                    "ws_url": f"{ws_protocol}://{request.get_host()}/ws/resume/{job_id}/",
+                },
+            }
+        )
+
+
+class ResumeDiagnosisJobView(APIView):
+    """
+    简历异步诊断任务状态查询
+
+    GET /api/resume/diagnose/jobs/<job_id>/
+    status: pending（排队中）/ processing（stage 为 extracting 或 analyzing）/ completed / failed
+    只有提交任务的用户可以查询（匿名提交的任务只能匿名查询），其他人返回 404。
+    """
+
+    STATE_MAP = {
+        "PENDING": "pending",
+        "STARTED": "processing",
+        "PROGRESS": "processing",
+        "SUCCESS": "completed",
+        "FAILURE": "failed",
+        "REVOKED": "failed",
+    }
+
+    def get(self, request, job_id, *args, **kwargs):
+        if not cache.is_job_owner(job_id, _user_id(request)):
+            return Response({"code": 404, "message": "任务不存在或已过期"}, status=404)
+        result = AsyncResult(job_id)
+        job_status = self.STATE_MAP.get(result.state, "processing")
+        data = {"job_id": job_id, "status": job_status, "stage": None, "progress": 0}
+
+        if result.state == "PROGRESS" and isinstance(result.info, dict):
+            data.update(stage=result.info.get("stage"), progress=result.info.get("progress", 0))
+        elif job_status == "completed":
+            data.update(stage="completed", progress=100, result=result.result)
+        elif job_status == "failed":
+            data.update(stage="failed", progress=100, error=str(result.result))
+
+        return Response({"code": 200, "data": data})
+
+
+class ResumeBatchScreenView(APIView):
+    """
+    简历批量筛选：一个 JD 对多份简历打分排名
+
+    POST /api/resume/batch/
+    表单字段：resume_files（可多个，支持 .pdf/.txt/.md 及包含它们的 .zip）、jd_text、
+    top_k（可选，简历数超过它时先做向量 + 关键词初筛，只把前 top_k 份交给大模型；0 表示不初筛）
+    每份简历一个 Celery 任务并行处理，立即返回 batch_id：
+    - 每份完成时通过 ws://host/ws/resume/<batch_id>/ 推送 item_completed / item_failed，
+      全部完成后推送 completed（附最终排名表）
+    - GET /api/resume/batch/<batch_id>/ 随时查询进度和当前排名
+    """
+
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request, *args, **kwargs):
+        serializer = ResumeBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"code": 400, "message": "参数校验错误", "errors": serializer.errors},
+                status=400,
+            )
+
+        jd_text = serializer.validated_data["jd_text"]
+        top_k = serializer.validated_data.get("top_k", getattr(settings, "RESUME_PRERANK_TOP_K", 10))
+        batch_id = batch.new_batch_id()
+        try:
+            files, skipped = batch.save_batch_files(serializer.validated_data["resume_files"], batch_id)
+        except batch.BatchUploadError as e:
+            shutil.rmtree(get_job_dir(batch_id), ignore_errors=True)
+            return Response({"code": 400, "message": str(e)}, status=400)
+
+        if not files:
+            shutil.rmtree(get_job_dir(batch_id), ignore_errors=True)
+            return Response({"code": 400, "message": "没有可解析的简历文件", "data": {"skipped": skipped}}, status=400)
+
+        try:
+            meta = batch.create_batch(batch_id, jd_text, files, top_k=top_k, user_id=_user_id(request))
+            # 简历数超过 top_k 时先初筛，只有入选的才调用大模型
+            task = prerank_resume if meta["prerank"] else screen_resume
+            group(task.s(batch_id, index, file_path) for index, (_, file_path) in enumerate(files)).apply_async()
+            if meta["prerank"]:
+                finish_prerank.apply_async(args=[batch_id], countdown=getattr(settings, "RESUME_PRERANK_TIMEOUT", 600))
+        except Exception as e:
+            logger.error(f"简历批量筛选任务提交失败: {e}")
+            shutil.rmtree(get_job_dir(batch_id), ignore_errors=True)
+            return Response({"code": 500, "message": str(e)}, status=500)
+
+        ws_protocol = "wss" if request.is_secure() else "ws"
+        return Response(
+            {
+                "code": 200,
+                "message": f"已提交 {len(files)} 份简历",
+                "data": {
+                    "batch_id": batch_id,
+                    "total": len(files),
+                    "top_k": top_k,
+                    "prerank": meta["prerank"],
+                    "skipped": skipped,
+                    "status_url": f"/api/resume/batch/{batch_id}/",
+                    "ws_url": f"{ws_protocol}://{request.get_host()}/ws/resume/{batch_id}/",
+                },
+            }
+        )
+
+
+class ResumeBatchDetailView(APIView):
+    """
+    简历批量筛选进度与排名
+
+    GET /api/resume/batch/<batch_id>/?similarity_weight=0.8
+    status: processing / completed；ranking 中已完成的按分数降序，其次是初筛淘汰（filtered）的，
+    失败和未完成的排在最后。similarity_weight（0-1）用于按新权重即时重算第一阶段得分。
+    只有提交批次的用户可以查询（匿名提交的批次只能匿名查询），其他人返回 404。
+    """
+
+    def get(self, request, batch_id, *args, **kwargs):
+        weight = request.query_params.get("similarity_weight")
+        if weight is not None:
+            try:
+                weight = float(weight)
+            except ValueError:
+                weight = -1
+            if not 0 <= weight <= 1:
+                return Response({"code": 400, "message": "similarity_weight 必须在 0-1 之间"}, status=400)
+
+        meta = batch.get_batch(batch_id)
+        data = None
+        if meta is not None and meta.get("user_id") == _user_id(request):
+            data = batch.get_batch_status(batch_id, similarity_weight=weight)
+        if data is None:
+            return Response({"code": 404, "message": "批次不存在或已过期"}, status=404)
+        return Response({"code": 200, "data": data})
+
+
+class ResumeCacheStatsView(APIView):
+    """
+    简历缓存命中率统计（仅管理员）
+
+    GET /api/resume/cache/stats/
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response({"code": 200, "data": cache.get_stats()})
+
+
+def _format_time(value):
+    return value.strftime("%Y-%m-%d %H:%M:%S") if value else None
+
+
+class ResumeHistoryListView(APIView):
+    """
+    当前用户的简历列表（游标分页，按上传时间倒序）
+
+    GET /api/resume/resumes/
+    查询参数：
+        - limit: 每页数量（默认 20，最大 100）
+        - cursor: 上一页返回的 next_cursor
+        - include_text: true 时返回简历全文（默认不加载压缩文本列）
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    LIST_FIELDS = ("id", "file_name", "content_hash", "file_size", "text_length", "created_at")
+
+    def get(self, request, *args, **kwargs):
+        include_text = request.query_params.get("include_text", "false").lower() == "true"
+        limit = parse_page_size(request.query_params.get("limit"))
+        cursor = request.query_params.get("cursor")
+
+        fields = self.LIST_FIELDS + ("text_compressed",) if include_text else self.LIST_FIELDS
+        queryset = Resume.objects.filter(user=request.user).only(*fields)
+        total, total_is_estimate = estimate_count(queryset)
+
+        # 命中 (user, -created_at) 索引
+        if cursor:
+            try:
+                queryset = keyset_filter(queryset, cursor)
+            except InvalidCursor as e:
+                return Response({"code": 400, "msg": str(e), "data": []}, status=status.HTTP_400_BAD_REQUEST)
+
+        resumes, next_cursor = paginate_keyset(queryset, limit)
+
+        data = []
+        for resume in resumes:
+            item = {
+                "id": resume.id,
+                "file_name": resume.file_name,
+                "content_hash": resume.content_hash,
+                "file_size": resume.file_size,
+                "text_length": resume.text_length,
+                "created_at": _format_time(resume.created_at),
+            }
+            if include_text:
+                item["text"] = resume.text
+            data.append(item)
+
+        return Response(
+            {
+                "code": 200,
+                "msg": "success",
+                "data": data,
+                "count": len(data),
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None,
+                "total": total,
+                "total_is_estimate": total_is_estimate,
+            }
+        )
+
+
+class DiagnosisHistoryListView(APIView):
+    """
+    当前用户的诊断历史（游标分页，按诊断时间倒序）
+
+    GET /api/resume/diagnoses/
+    查询参数：
+        - min_score / max_score: 按大模型评分筛选
+        - resume_id: 指定简历
+        - jd_hash: 指定 JD（同一 JD 下的所有诊断）
+        - source: sync/async/stream/batch
+        - batch_id: 批量筛选批次
+        - include: 逗号分隔的大字段，可选 result,jd_text（默认只返回摘要）
+        - limit / cursor: 同简历列表
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    LIST_FIELDS = (
+        "id",
+        "resume_id",
+        "resume__file_name",
+        "jd_hash",
+        "model_name",
+        "score",
+        "stage_one_score",
+        "source",
+        "batch_id",
+        "created_at",
+        "updated_at",
+    )
+    INCLUDE_FIELDS = ("result", "jd_text")
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        limit = parse_page_size(params.get("limit"))
+        cursor = params.get("cursor")
+        include = [field for field in params.get("include", "").split(",") if field in self.INCLUDE_FIELDS]
+
+        queryset = Diagnosis.objects.filter(user=request.user).select_related("resume").only(*self.LIST_FIELDS, *include)
+        try:
+            if params.get("min_score") is not None:
+                queryset = queryset.filter(score__gte=int(params["min_score"]))
+            if params.get("max_score") is not None:
+                queryset = queryset.filter(score__lte=int(params["max_score"]))
+            if params.get("resume_id") is not None:
+                queryset = queryset.filter(resume_id=int(params["resume_id"]))
+        except ValueError:
+            return Response({"code": 400, "msg": "min_score / max_score / resume_id 必须是整数", "data": []}, status=400)
+        for field in ("jd_hash", "source", "batch_id"):
+            if params.get(field):
+                queryset = queryset.filter(**{field: params[field]})
+
+        total, total_is_estimate = estimate_count(queryset)
+
+        if cursor:
+            try:
+                queryset = keyset_filter(queryset, cursor)
+            except InvalidCursor as e:
+                return Response({"code": 400, "msg": str(e), "data": []}, status=status.HTTP_400_BAD_REQUEST)
+
+        diagnoses, next_cursor = paginate_keyset(queryset, limit)
+
+        data = []
+        for diagnosis in diagnoses:
+            item = {
+                "id": diagnosis.id,
+                "resume_id": diagnosis.resume_id,
+                "file_name": diagnosis.resume.file_name,
+                "jd_hash": diagnosis.jd_hash,
+                "model_name": diagnosis.model_name,
+                "score": diagnosis.score,
+                "stage_one_score": diagnosis.stage_one_score,
+                "source": diagnosis.source,
+                "batch_id": diagnosis.batch_id,
+                "created_at": _format_time(diagnosis.created_at),
+                "updated_at": _format_time(diagnosis.updated_at),
+            }
+            for field in include:
+                item[field] = getattr(diagnosis, field)
+            data.append(item)
+
+        return Response(
+            {
+                "code": 200,
+                "msg": "success",
+                "data": data,
+                "count": len(data),
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None,
+                "total": total,
+                "total_is_estimate": total_is_estimate,
+            }
+        )
+
+
+class DiagnosisHistoryDetailView(APIView):
+    """
+    单条诊断详情（含完整结果和 JD）
+
+    GET /api/resume/diagnoses/<id>/
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk, *args, **kwargs):
+        diagnosis = Diagnosis.objects.select_related("resume").filter(pk=pk, user=request.user).first()
+        if diagnosis is None:
+            return Response({"code": 404, "msg": "诊断记录不存在"}, status=404)
+
+        return Response(
+            {
+                "code": 200,
+                "msg": "success",
+                "data": {
+                    "id": diagnosis.id,
+                    "resume": {
+                        "id": diagnosis.resume_id,
+                        "file_name": diagnosis.resume.file_name,
+                        "content_hash": diagnosis.resume.content_hash,
+                        "text_length": diagnosis.resume.text_length,
+                    },
+                    "jd_hash": diagnosis.jd_hash,
+                    "jd_text": diagnosis.jd_text,
+                    "model_name": diagnosis.model_name,
+                    "score": diagnosis.score,
+                    "stage_one_score": diagnosis.stage_one_score,
+                    "result": diagnosis.result,
+                    "source": diagnosis.source,
+                    "batch_id": diagnosis.batch_id,
+                    "created_at": _format_time(diagnosis.created_at),
+                    "updated_at": _format_time(diagnosis.updated_at),
+                },
+            }
+        )
@@ -231,6 +231,12 @@ CELERY_TASK_TIME_LIMIT = 30 * 60  # 30分钟超时
 CELERY_WORKER_PREFETCH_MULTIPLIER = 1  # ✅ 改为 1（重要！）
 CELERY_WORKER_MAX_TASKS_PER_CHILD = 50  # ✅ 新增：每50个任务重启Worker
 
+# ========== 对话归档配置 ==========
+# 冷会话归档文件目录（gzip 压缩的 JSONL）
+CHAT_ARCHIVE_ROOT = os.getenv("CHAT_ARCHIVE_ROOT", os.path.join(BASE_DIR, "archives", "chat"))
+CHAT_ARCHIVE_AFTER_DAYS = int(os.getenv("CHAT_ARCHIVE_AFTER_DAYS", "90"))  # 超过N天无新消息视为冷会话
+CHAT_ARCHIVE_SESSIONS_PER_RUN = int(os.getenv("CHAT_ARCHIVE_SESSIONS_PER_RUN", "500"))  # 单次最多归档会话数
+
 # ========== 邮件配置（用于测试）==========
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"  # 控制台打印邮件（安全！）
 DEFAULT_FROM_EMAIL = "noreply@skillspace.local"  # 设置默认发件人
@@ -284,6 +290,60 @@ else:
     }
 
 
+# ========== 缓存配置 ==========
+# default: 本地内存（与 Django 默认行为一致）
+# resume: 简历文本 / 诊断结果内容寻址缓存（生产环境使用 Redis，使 Web 与 Celery Worker 共享命中；
+#         容量由 Redis maxmemory + allkeys-lru 策略限制）
+if DEBUG:
+    _resume_cache = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "resume-cache",
+        "OPTIONS": {"MAX_ENTRIES": 1000},
+    }
+else:
+    _resume_cache = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": f"redis://:{os.getenv('REDIS_PASSWORD', '123456')}@{os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', '6379')}/2",
+    }
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "resume": {**_resume_cache, "KEY_PREFIX": "skillspace"},
+}
+RESUME_CACHE_TIMEOUT = int(os.getenv("RESUME_CACHE_TIMEOUT", str(7 * 24 * 3600)))  # 缓存有效期（秒）
+RESUME_CACHE_MAX_ENTRY_BYTES = 512 * 1024  # 单条缓存上限，超过则不缓存
+
+# 简历 PDF 解析限制
+RESUME_PDF_MAX_PAGES = int(os.getenv("RESUME_PDF_MAX_PAGES", "50"))  # 超过该页数直接拒绝
+RESUME_PDF_TIMEOUT = int(os.getenv("RESUME_PDF_TIMEOUT", "20"))  # 单个文件解析总耗时上限（秒）
+RESUME_PDF_PARALLEL_MIN_PAGES = 8  # 达到该页数才拆分到进程池并行解析
+RESUME_PDF_WORKERS = min(4, os.cpu_count() or 1)  # 解析进程数
+
+# 简历上传限制（单文件诊断接口，见 resume/upload.py）
+RESUME_UPLOAD_MAX_BYTES = int(os.getenv("RESUME_UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))  # 单个简历文件大小上限
+RESUME_UPLOAD_CHUNK_SIZE = 64 * 1024  # 流式写入临时文件的块大小
+
+# 简历 Prompt 预处理（见 resume/preprocess.py）
+RESUME_PROMPT_TOKEN_BUDGET = 3000  # 送入大模型的简历 token 预算（超出时按段落相关度压缩）
+RESUME_JD_TOKEN_BUDGET = 1000  # 送入大模型的 JD token 预算
+
+# 简历批量筛选
+RESUME_BATCH_MAX_FILES = 100  # 单批最多简历数（zip 展开后计算）
+RESUME_BATCH_MAX_FILE_BYTES = 10 * 1024 * 1024  # 单份简历大小上限
+RESUME_BATCH_MAX_TOTAL_BYTES = 200 * 1024 * 1024  # 单批解压后总大小上限
+RESUME_BATCH_LLM_CONCURRENCY = int(
+    os.getenv("RESUME_BATCH_LLM_CONCURRENCY", "4")
+)  # 同时调用大模型的简历数（所有 Worker 共享）
+RESUME_BATCH_ITEM_TIME_LIMIT = 180  # 单份简历处理时间上限（秒），超时记为失败
+RESUME_BATCH_TIMEOUT = 24 * 3600  # 批次状态保留时间（秒）
+
+# 简历初筛（向量相似度 + 技能关键词，见 resume/embedding.py）
+RESUME_PRERANK_TOP_K = 10  # 批量筛选时只把初筛前 K 份交给大模型，0 表示不初筛
+RESUME_PRERANK_SIMILARITY_WEIGHT = 0.6  # 初筛得分中语义相似度的权重（其余为技能关键词覆盖率）
+RESUME_EMBEDDING_CACHE_MAX_BYTES = 2 * 1024 * 1024  # 单个句向量矩阵的缓存上限（float16 存储，1024 维约 1000 句）
+RESUME_PRERANK_TIMEOUT = 600  # 初筛阶段时间上限（秒），超时后按已有的第一阶段得分继续，未打分的记为失败
+RESUME_EMBEDDING_MODEL = os.getenv("RESUME_EMBEDDING_MODEL")  # 句向量模型（如 BAAI/bge-small-zh-v1.5），不配置则用哈希向量
+
+
 # AI 阿里云大模型
 # ================= 配置区域 =================
 # 阿里云百炼的兼容 Base URL
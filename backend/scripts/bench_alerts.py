@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+监控告警判断基准测试
+
+功能：
+1. 为 N 台服务器（默认 300 台）各生成 M 条阈值规则（默认 40 条，指标、阈值、滞回、持续时间随机）
+2. 每个周期为每台服务器写入一个随机快照（AlertEngine.add），然后对所有规则做一次判断（AlertEngine.evaluate）；
+   --spike 控制服务器出现持续数个周期高负载的概率，即每个周期的告警事件数量
+3. 输出 add / evaluate 的平均、P50、P95、最大耗时，以及触发 / 恢复事件数量和正在触发的告警数量
+
+不需要数据库；告警事件不推送，只统计数量。
+
+使用方法：
+    python bench_alerts.py
+    python bench_alerts.py --servers 500 --rules 100 --ticks 200
+    python bench_alerts.py --spike 0.2
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+sys.path.insert(0, backend_dir)
+sys.path.insert(0, os.path.join(backend_dir, "SkillSpace", "myapps"))
+
+from django.conf import settings
+
+# 只需要频道层配置，不启动 Django 应用（避免拉起本机监控线程）
+if not settings.configured:
+    settings.configure(CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}})
+
+from monitor.alerts import SEVERITIES, AlertEngine, build_rules
+from monitor.history import METRIC_NAMES
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="监控告警判断基准测试")
+    parser.add_argument("--servers", type=int, default=300, help="服务器数量")
+    parser.add_argument("--rules", type=int, default=40, help="每台服务器的规则数量")
+    parser.add_argument("--ticks", type=int, default=100, help="判断周期数")
+    parser.add_argument("--spike", type=float, default=0.02, help="每台服务器每个周期出现高负载的概率")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def build_config(servers, rules_per_server):
+    """全局 cpu / memory / disk 阈值 + 每台服务器随机的自定义规则"""
+    global_config = {
+        "alerts": {"cpu_warning": 80, "cpu_critical": 95, "memory_warning": 85, "disk_warning": 80, "for_seconds": 3}
+    }
+    server_configs = []
+    for i in range(servers):
+        rules = [
+            {
+                "name": f"rule_{j}",
+                "metric": random.choice(METRIC_NAMES),
+                "threshold": random.uniform(50, 100),
+                "severity": random.choice(SEVERITIES),
+                "hysteresis": random.uniform(0, 10),
+                "for_seconds": random.choice([0, 2, 5]),
+            }
+            for j in range(rules_per_server)
+        ]
+        server_configs.append({"name": f"bench-{i:04d}", "alerts": {"rules": rules}})
+    return global_config, server_configs
+
+
+def summary(label, seconds):
+    ms = [s * 1000 for s in seconds]
+    print(
+        f"{label:<24} 平均 {sum(ms) / len(ms):8.3f} ms  P50 {percentile(ms, 50):8.3f} ms  "
+        f"P95 {percentile(ms, 95):8.3f} ms  最大 {max(ms):8.3f} ms"
+    )
+
+
+def main():
+    args = parse_args()
+    random.seed(args.seed)
+    global_config, server_configs = build_config(args.servers, args.rules)
+    rules = build_rules(global_config, server_configs)
+    engine = AlertEngine()
+    started = time.perf_counter()
+    engine.configure(rules)
+    print(f"服务器 {args.servers} 台，规则 {len(rules)} 条，configure 耗时 {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    names = [server["name"] for server in server_configs]
+    # 每台服务器一个基准负载，每个周期在其附近随机波动；每台服务器以 --spike 的概率出现持续数个周期的高负载
+    base = {name: [random.uniform(10, 70) for _ in METRIC_NAMES] for name in names}
+    spikes = {}  # 服务器 -> (指标位置, 结束周期)
+    add_times, evaluate_times = [], []
+    fired = resolved = 0
+    now = time.time()
+    for tick in range(args.ticks):
+        timestamp = now + tick
+        started = time.perf_counter()
+        for name in names:
+            row = [value + random.uniform(-5, 5) for value in base[name]]
+            if name not in spikes and random.random() < args.spike:
+                spikes[name] = (random.randrange(len(METRIC_NAMES)), tick + random.randint(3, 10))
+            if name in spikes:
+                column, until = spikes[name]
+                row[column] += 40
+                if tick >= until:
+                    del spikes[name]
+            engine.add(name, timestamp, row)
+        add_times.append((time.perf_counter() - started) / len(names))
+
+        started = time.perf_counter()
+        events = engine.evaluate(now=timestamp)
+        evaluate_times.append(time.perf_counter() - started)
+        fired += sum(1 for event in events if event["event"] == "firing")
+        resolved += sum(1 for event in events if event["event"] == "resolved")
+
+    summary("add（单个快照）", add_times)
+    summary("evaluate（所有规则）", evaluate_times)
+    print(
+        f"触发 {fired} 次，恢复 {resolved} 次（平均每周期 {(fired + resolved) / args.ticks:.1f} 个事件），"
+        f"正在触发 {len(engine.firing_alerts())} 条"
+    )
+
+
+if __name__ == "__main__":
+    main()
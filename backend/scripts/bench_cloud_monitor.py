@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+云服务器监控规模基准测试
+
+功能：
+1. 模拟 N 台云服务器（默认 200 台）：每台的 SSH 连接被替换为假客户端，
+   执行命令时按配置的网络延迟（平均值 + 抖动）等待，返回本机真实的采集脚本输出
+2. 可指定一部分“慢服务器”，响应时间超过单台采集超时，验证超时和跳过逻辑
+3. 分别以顺序采集（max_workers=1，等价于改造前的逐台采集）和不同并发数运行若干轮，
+   输出每轮耗时、推送数量、失败 / 超时 / 跳过数量以及首条 / P50 / P95 推送时间
+4. --backend 可对比 thread（paramiko + 线程池）与 asyncssh（单线程事件循环）两种采集后端，
+   同时输出采集过程中的进程线程数峰值
+
+不连接真实服务器，也不需要数据库；推送使用记录型频道层，只统计推送时间。
+
+使用方法：
+    python bench_cloud_monitor.py
+    python bench_cloud_monitor.py --servers 200 --latency 0.08 --jitter 0.03 --workers 1 16 64 200
+    python bench_cloud_monitor.py --slow 5 --timeout 2 --rounds 3 --workers 64 --verbose
+    python bench_cloud_monitor.py --backend thread asyncssh --workers 64 200 --servers 500
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+sys.path.insert(0, backend_dir)
+sys.path.insert(0, os.path.join(backend_dir, "SkillSpace", "myapps"))
+
+from django.conf import settings
+
+# 只需要频道层配置，不启动 Django 应用（避免拉起本机监控线程）
+if not settings.configured:
+    settings.configure(CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}})
+
+from monitor.async_cloud_tasks import AsyncCloudMonitorTask
+from monitor.cloud_collectors import build_collect_script
+from monitor.cloud_tasks import CloudMonitorTask
+
+BACKENDS = {"thread": CloudMonitorTask, "asyncssh": AsyncCloudMonitorTask}
+
+SERVICES = [
+    {"name": "nginx", "type": "web", "process_pattern": "nginx", "port": 80},
+    {"name": "sshd", "type": "other", "process_pattern": "sshd", "port": 22},
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="云服务器监控规模基准测试")
+    parser.add_argument("--servers", type=int, default=200, help="模拟服务器数量")
+    parser.add_argument("--backend", nargs="+", choices=sorted(BACKENDS), default=["thread"], help="采集后端")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 16, 64, 200], help="并发采集线程数（1 即顺序采集）")
+    parser.add_argument("--rounds", type=int, default=2, help="每组采集轮数")
+    parser.add_argument("--latency", type=float, default=0.05, help="单次 SSH 往返平均耗时（秒）")
+    parser.add_argument("--jitter", type=float, default=0.02, help="往返耗时标准差（秒）")
+    parser.add_argument("--slow", type=int, default=0, help="慢服务器数量（每次采集耗时为 --timeout 的 3 倍）")
+    parser.add_argument("--timeout", type=float, default=30.0, help="单台服务器采集超时 server_timeout（秒）")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--verbose", action="store_true", help="打印采集超时 / 跳过日志")
+    return parser.parse_args()
+
+
+def sample_output():
+    """在本机执行一次采集脚本，作为所有模拟服务器的返回内容"""
+    script = build_collect_script(with_services=True, cpu_sample=0)
+    return subprocess.run(["sh", "-c", script], capture_output=True, text=True, check=True).stdout.strip()
+
+
+class FakeSSHClient:
+    """模拟 SSHClientManager：execute_command 按网络延迟阻塞，超时行为与真实客户端一致"""
+
+    def __init__(self, output, latency, jitter, slow_seconds=None):
+        self.output = output
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_seconds = slow_seconds
+        self.commands = 0
+
+    def execute_command(self, command, timeout=30):
+        self.commands += 1
+        delay = self.slow_seconds or max(0.0, random.gauss(self.latency, self.jitter))
+        if delay > timeout:
+            time.sleep(timeout)
+            raise Exception(f"命令执行超时（{timeout}秒）")
+        time.sleep(delay)
+        return {"stdout": self.output, "stderr": "", "exit_code": 0}
+
+    def is_alive(self):
+        return True
+
+    def close(self):
+        pass
+
+
+class FakeAsyncSSHClient(FakeSSHClient):
+    """模拟 AsyncSSHClientManager：execute_command 为协程"""
+
+    async def execute_command(self, command, timeout=30):
+        self.commands += 1
+        delay = self.slow_seconds or max(0.0, random.gauss(self.latency, self.jitter))
+        if delay > timeout:
+            await asyncio.sleep(timeout)
+            raise Exception(f"命令执行超时（{timeout}秒）")
+        await asyncio.sleep(delay)
+        return {"stdout": self.output, "stderr": "", "exit_code": 0}
+
+
+class ThreadSampler:
+    """采集期间定期记录进程线程数，取峰值"""
+
+    def __init__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(0.01):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class RecordingChannelLayer:
+    """只记录推送时间的频道层"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def group_send(self, group, message):
+        self.sent.append((time.monotonic(), group))
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def build_task(backend, servers, clients):
+    task = BACKENDS[backend]()
+    task.channel_layer = RecordingChannelLayer()
+    task._get_ssh_connection = lambda server_name, connection: clients[server_name]
+
+    async def get_async_connection(server_name, connection):
+        return clients[server_name]
+
+    task._get_async_ssh_connection = get_async_connection
+    for server in servers:
+        task.local_hosts[server["connection"]["host"]] = False
+    return task
+
+
+def run_group(args, backend, servers, clients, workers):
+    task = build_task(backend, servers, clients)
+    global_config = {"collect_interval": args.timeout, "server_timeout": args.timeout, "max_workers": workers}
+    rows = []
+    for round_index in range(args.rounds):
+        task.channel_layer.sent.clear()
+        with ThreadSampler() as sampler:
+            started = time.monotonic()
+            stats = task.collect_round(servers, global_config)
+            elapsed = time.monotonic() - started
+        delays = [sent_at - started for sent_at, _ in task.channel_layer.sent]
+        rows.append((round_index + 1, elapsed, len(delays), stats, delays, sampler.peak))
+    # 等待超时的采集结束，避免影响下一组
+    if task.executor:
+        task.executor.shutdown(wait=True)
+    return rows
+
+
+def main():
+    args = parse_args()
+    random.seed(args.seed)
+    logging.basicConfig(level=logging.WARNING if args.verbose else logging.ERROR, format="%(message)s")
+
+    output = sample_output()
+    servers = []
+    clients = {"thread": {}, "asyncssh": {}}
+    for index in range(args.servers):
+        name = f"bench-server-{index:03d}"
+        servers.append(
+            {
+                "name": name,
+                "connection": {"host": f"10.0.{index // 250}.{index % 250 + 1}", "port": 22, "username": "bench"},
+                "monitoring": {"services": SERVICES},
+            }
+        )
+        slow_seconds = args.timeout * 3 if index < args.slow else None
+        clients["thread"][name] = FakeSSHClient(output, args.latency, args.jitter, slow_seconds)
+        clients["asyncssh"][name] = FakeAsyncSSHClient(output, args.latency, args.jitter, slow_seconds)
+
+    print(
+        f"模拟服务器: {args.servers} 台（慢服务器 {args.slow} 台），单次往返 {args.latency * 1000:.0f}±{args.jitter * 1000:.0f}ms，"
+        f"单台超时 {args.timeout}s，每组 {args.rounds} 轮"
+    )
+    print()
+    header = f"{'后端':>8} {'并发':>5} {'轮次':>4} {'耗时(s)':>8} {'推送':>5} {'失败':>5} {'超时':>5} {'跳过':>5} {'首条(s)':>8} {'P50(s)':>8} {'P95(s)':>8} {'线程峰值':>6}"
+    print(header)
+    print("-" * len(header))
+
+    for backend in args.backend:
+        for workers in args.workers:
+            run_backend(args, backend, servers, clients[backend], workers)
+
+
+def run_backend(args, backend, servers, clients, workers):
+    for client in clients.values():
+        client.commands = 0
+    for round_index, elapsed, published, stats, delays, threads in run_group(args, backend, servers, clients, workers):
+        print(
+            f"{backend:>8} {workers:>5} {round_index:>4} {elapsed:>8.2f} {published:>5} {stats['failed']:>5} "
+            f"{stats['timeout']:>5} {stats['skipped']:>5} {min(delays, default=0):>8.3f} "
+            f"{percentile(delays, 50):>8.3f} {percentile(delays, 95):>8.3f} {threads:>8}"
+        )
+    commands = sum(client.commands for client in clients.values())
+    print(f"{'':>8} SSH 命令数: {commands}（每台每轮 {commands / max(1, args.servers * args.rounds):.1f} 次）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+简历诊断全链路吞吐量基准测试
+
+功能：
+1. 启动本地 OpenAI 兼容桩服务（llm_stub_server.py），无需阿里云 API Key，延迟 / 返回 JSON 可配置
+2. 生成合成 PDF 语料（每份内容不同，不会命中文本 / 诊断缓存）
+3. 在不同并发数下分别压测：
+   - extract：仅 PDF 文本提取
+   - sync：同步诊断接口 POST /api/resume/diagnose/
+   - async：异步诊断接口 POST /api/resume/diagnose/async/ 到拿到任务结果
+   - batch：批量筛选接口 POST /api/resume/batch/ 到批次完成
+4. 输出每组的吞吐量、端到端延迟 P50/P95，以及文本提取耗时、大模型等待耗时
+
+默认以 Celery eager 模式在本进程内执行任务（结果后端用内存，数据库用临时 SQLite），
+不依赖 RabbitMQ / Redis；--worker 模式下任务发给真实 Worker（Worker 需指向同一个桩服务，
+批量筛选还要求 resume 缓存为 Redis，即 DEBUG=False），此时提取 / 大模型耗时只统计 Web 进程内的部分。
+
+使用方法：
+    python bench_resume_pipeline.py
+    python bench_resume_pipeline.py --scenarios sync async --concurrency 1 4 16 --requests 32 --latency 0.5
+    python bench_resume_pipeline.py --stub-url http://127.0.0.1:8900/v1 --worker
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目根目录到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+sys.path.insert(0, backend_dir)
+sys.path.insert(0, os.path.join(backend_dir, "SkillSpace", "myapps"))
+sys.path.insert(0, current_dir)
+
+from llm_stub_server import LLMStubServer, StubConfig
+
+SCENARIOS = ("extract", "sync", "async", "batch")
+
+JD_TEXT = """Python 后端工程师
+岗位职责：负责订单、支付等核心服务的设计与开发，保障高并发场景下的稳定性。
+任职要求：熟悉 Python、Django、Celery、Redis、PostgreSQL，了解 Docker / Kubernetes，有性能优化经验者优先。
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="简历诊断全链路吞吐量基准测试")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=32, help="每组简历份数")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 2, 3], help="语料 PDF 页数（随机选取）")
+    parser.add_argument("--batch-size", type=int, default=8, help="batch 场景每批简历数")
+    parser.add_argument("--latency", type=float, default=0.5, help="桩服务平均响应时间（秒）")
+    parser.add_argument("--jitter", type=float, default=0.1, help="桩服务响应时间标准差（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="桩服务返回 500 的比例")
+    parser.add_argument("--stub-url", help="使用已启动的桩服务（如 http://127.0.0.1:8900/v1），不传则在进程内启动")
+    parser.add_argument("--worker", action="store_true", help="任务发给真实 Celery Worker（默认 eager 模式在本进程执行）")
+    parser.add_argument("--timeout", type=float, default=300, help="单个任务 / 批次等待上限（秒）")
+    return parser.parse_args()
+
+
+def bootstrap(args, stub_url):
+    """在 django.setup() 之前配置大模型地址、结果后端和数据库"""
+    os.environ["ALIYUN_BASE_URL"] = stub_url
+    os.environ["ALIYUN_API_KEY"] = "stub"
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "SkillSpace.settings")
+    if not args.worker:
+        os.environ["CELERY_RESULT_BACKEND"] = "cache+memory://"
+
+    from django.conf import settings
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bench_resume_"), "bench.sqlite3")
+    settings.DATABASES["default"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": db_path,
+        "OPTIONS": {"timeout": 30},
+    }
+    settings.ALLOWED_HOSTS = list(settings.ALLOWED_HOSTS) + ["testserver"]
+    if not args.worker:
+        # eager 模式下重试不等待 countdown，槽位不足会空转，这里放开批量筛选的并发上限
+        settings.RESUME_BATCH_LLM_CONCURRENCY = max(settings.RESUME_BATCH_LLM_CONCURRENCY, max(args.concurrency))
+
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+    from SkillSpace.celery_demo import app
+
+    if not args.worker:
+        app.conf.task_always_eager = True
+        app.conf.task_store_eager_result = True
+    return db_path
+
+
+class Recorder:
+    """线程安全的耗时采样"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+
+    def add(self, name, value):
+        with self.lock:
+            self.samples[name].append(value)
+
+    def reset(self):
+        with self.lock:
+            self.samples = defaultdict(list)
+
+    def timed(self, name, func):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(name, time.perf_counter() - start)
+
+        return wrapper
+
+    def summary(self, name):
+        values = sorted(self.samples.get(name, []))
+        if not values:
+            return None, None
+        return sum(values) / len(values), percentile(values, 95)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def instrument(recorder):
+    """给文本提取和大模型调用包上计时（只影响本进程）"""
+    from resume import tasks, utils, views
+
+    utils.extract_text_from_file = recorder.timed("extract", utils.extract_text_from_file)
+    views.ai_analyze_resume = recorder.timed("llm", views.ai_analyze_resume)
+    tasks.ai_analyze_resume = recorder.timed("llm", tasks.ai_analyze_resume)
+
+
+def build_corpus(count, pages_choices, tag):
+    """生成 count 份内容互不相同的 PDF，返回 [(文件名, 字节内容)]"""
+    import random
+
+    from bench_pdf_extract import make_pdf
+
+    corpus = []
+    for i in range(count):
+        title = f"Candidate {tag}-{i} {uuid.uuid4().hex[:12]} - Backend Engineer"
+        corpus.append((f"{tag}_{i}.pdf", make_pdf(random.choice(pages_choices), title=title)))
+    return corpus
+
+
+_local = threading.local()
+
+
+def _client():
+    from django.test import Client
+
+    if not hasattr(_local, "client"):
+        _local.client = Client()
+    return _local.client
+
+
+def _upload(name, data):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+
+    return SimpleUploadedFile(name, data, content_type="application/pdf")
+
+
+def _is_ok(result):
+    from resume.history import is_fallback_result
+
+    return result is not None and not is_fallback_result(result)
+
+
+def run_extract(doc, args):
+    from resume.pdf_extract import extract_pdf_text
+
+    text = extract_pdf_text(doc[1])
+    return 1, int(bool(text))
+
+
+def run_sync(doc, args):
+    response = _client().post("/api/resume/diagnose/", {"resume_file": _upload(*doc), "jd_text": JD_TEXT})
+    body = response.json()
+    return 1, int(response.status_code == 200 and _is_ok(body.get("data")))
+
+
+def run_async(doc, args):
+    from celery.result import AsyncResult
+
+    response = _client().post("/api/resume/diagnose/async/", {"resume_file": _upload(*doc), "jd_text": JD_TEXT})
+    body = response.json()
+    if response.status_code != 200:
+        return 1, 0
+    data = body["data"]
+    if data.get("cached"):
+        return 1, int(_is_ok(data.get("result")))
+    try:
+        # eager 模式下多线程并发执行任务时，Celery 的任务栈跨线程可见，需关闭"任务内禁止同步等待"检查
+        result = AsyncResult(data["job_id"]).get(
+            timeout=args.timeout, interval=0.05, propagate=False, disable_sync_subtasks=False
+        )
+    except Exception:
+        return 1, 0
+    return 1, int(isinstance(result, dict) and _is_ok(result))
+
+
+def run_batch(docs, args):
+    from resume import batch
+
+    response = _client().post(
+        "/api/resume/batch/",
+        {"resume_files": [_upload(*doc) for doc in docs], "jd_text": JD_TEXT, "top_k": 0},
+    )
+    if response.status_code != 200:
+        return len(docs), 0
+    batch_id = response.json()["data"]["batch_id"]
+
+    deadline = time.monotonic() + args.timeout
+    while time.monotonic() < deadline:
+        status = batch.get_batch_status(batch_id)
+        if status and status["status"] == "completed":
+            ok = sum(1 for item in status["ranking"] if item.get("status") == "completed" and _is_ok(item.get("result")))
+            return len(docs), ok
+        time.sleep(0.05)
+    return len(docs), 0
+
+
+def _run_unit(runner, unit, args, latencies, lock):
+    from django.db import connection
+
+    start = time.perf_counter()
+    try:
+        total, ok = runner(unit, args)
+    except Exception as e:
+        print(f"  ⚠️ 请求异常: {e}")
+        total, ok = (len(unit) if isinstance(unit, list) else 1), 0
+    finally:
+        connection.close()
+    with lock:
+        latencies.append(time.perf_counter() - start)
+    return total, ok
+
+
+def run_scenario(name, concurrency, args, recorder, stub):
+    corpus = build_corpus(args.requests, args.pages, f"{name}{concurrency}")
+    runner = {"extract": run_extract, "sync": run_sync, "async": run_async, "batch": run_batch}[name]
+    if name == "batch":
+        units = [corpus[i : i + args.batch_size] for i in range(0, len(corpus), args.batch_size)]
+    else:
+        units = corpus
+
+    recorder.reset()
+    if stub:
+        stub.stats.reset()
+    latencies, lock = [], threading.Lock()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(lambda unit: _run_unit(runner, unit, args, latencies, lock), units))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    total = sum(item[0] for item in outcomes)
+    ok = sum(item[1] for item in outcomes)
+    extract_avg, extract_p95 = recorder.summary("extract")
+    llm_avg, llm_p95 = recorder.summary("llm")
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "total": total,
+        "ok": ok,
+        "wall": wall,
+        "throughput": total / wall if wall else 0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "extract_avg": extract_avg,
+        "extract_p95": extract_p95,
+        "llm_avg": llm_avg,
+        "llm_p95": llm_p95,
+        "llm_peak": stub.stats.snapshot()["max_in_flight"] if stub else None,
+    }
+
+
+def _fmt(value, digits=3):
+    return "-" if value is None else f"{value:.{digits}f}"
+
+
+def print_row(row):
+    print(
+        f"{row['scenario']:>8} {row['concurrency']:>5} {row['ok']:>4}/{row['total']:<4} {row['wall']:>8.2f} "
+        f"{row['throughput']:>9.2f} {_fmt(row['p50']):>8} {_fmt(row['p95']):>8} "
+        f"{_fmt(row['extract_avg']):>9} {_fmt(row['extract_p95']):>9} {_fmt(row['llm_avg']):>8} {_fmt(row['llm_p95']):>8} "
+        f"{row['llm_peak'] if row['llm_peak'] is not None else '-':>6}"
+    )
+
+
+def main():
+    args = parse_args()
+
+    stub = None
+    stub_url = args.stub_url
+    if not stub_url:
+        stub = LLMStubServer(("127.0.0.1", 0), StubConfig(args.latency, args.jitter, error_rate=args.error_rate)).start()
+        stub_url = stub.base_url
+
+    db_path = bootstrap(args, stub_url)
+    recorder = Recorder()
+    instrument(recorder)
+
+    mode = "Celery Worker" if args.worker else "eager（进程内）"
+    print(f"大模型桩服务: {stub_url}  任务执行: {mode}  临时数据库: {db_path}")
+    print(f"每组 {args.requests} 份简历，PDF 页数 {args.pages}，batch 每批 {args.batch_size} 份")
+    print("吞吐量单位：份/秒；延迟单位：秒（batch 的延迟为整批耗时）；峰值=桩服务同时处理的最大请求数")
+    print()
+    print(
+        f"{'场景':>6} {'并发':>4} {'成功/总数':>9} {'总耗时':>6} {'吞吐量':>7} {'P50':>8} {'P95':>8} "
+        f"{'提取avg':>7} {'提取P95':>7} {'LLMavg':>8} {'LLMP95':>8} {'峰值':>4}"
+    )
+    print("-" * 118)
+    try:
+        for name in args.scenarios:
+            for concurrency in args.concurrency:
+                print_row(run_scenario(name, concurrency, args, recorder, stub))
+    finally:
+        if stub:
+            stub.stop()
+
+
+if __name__ == "__main__":
+    main()
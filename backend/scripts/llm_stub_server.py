@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地 OpenAI 兼容大模型桩服务（压测用）
+
+功能：
+1. 实现 POST /v1/chat/completions（普通 / stream=True 两种返回），openai 库可直接指向它
+2. 响应延迟可配置（平均值 + 抖动），流式返回时先等首 token 延迟再逐段推送
+3. 返回的 JSON 可配置（--payload 指定 JSON 文件，默认生成随机评分的诊断结果）
+4. 可按比例返回 500 错误，模拟上游故障
+5. GET /stats 返回请求数、错误数、最大并发数
+
+不依赖 Django，可单独运行，也可被 bench_resume_pipeline.py 在进程内启动。
+
+使用方法：
+    python llm_stub_server.py --port 8900 --latency 1.5 --jitter 0.3
+    # 然后让后端 / Celery Worker 指向它
+    export ALIYUN_BASE_URL=http://127.0.0.1:8900/v1
+    export ALIYUN_API_KEY=stub
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PAYLOAD = {
+    "summary": "候选人技术栈与岗位要求基本匹配，有后端服务开发与性能优化经验。",
+    "pros": ["熟悉 Python / Django 后端开发", "有高并发服务优化经验", "项目描述量化清晰"],
+    "cons": ["缺少大规模分布式系统经验", "技能描述偏泛"],
+    "suggestions": "补充项目中的具体职责与量化结果，突出与 JD 相关的技术关键词。",
+}
+
+
+class StubConfig:
+    """桩服务配置（运行中可直接修改属性，下一个请求生效）"""
+
+    def __init__(self, latency=1.0, jitter=0.0, ttft=None, chunk_chars=16, error_rate=0.0, payload=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.ttft = ttft
+        self.chunk_chars = chunk_chars
+        self.error_rate = error_rate
+        self.payload = payload
+
+    def sample_latency(self):
+        return max(0.0, random.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+
+    def make_content(self):
+        payload = dict(self.payload or DEFAULT_PAYLOAD)
+        payload.setdefault("score", random.randint(40, 95))
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class StubStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.total_latency = 0.0
+
+    def begin(self):
+        with self.lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def end(self, elapsed, error=False):
+        with self.lock:
+            self.in_flight -= 1
+            self.total_latency += elapsed
+            self.errors += int(error)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "avg_latency": round(self.total_latency / self.requests, 4) if self.requests else 0,
+            }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # 压测时不打印每个请求
+        pass
+
+    @property
+    def config(self):
+        return self.server.config
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            self._send_json(200, self.server.stats.snapshot())
+        elif self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "stub"}]})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        stats = self.server.stats
+        stats.begin()
+        start = time.monotonic()
+        error = random.random() < self.config.error_rate
+        try:
+            if error:
+                time.sleep(self.config.sample_latency())
+                self._send_json(500, {"error": {"message": "stub upstream error", "type": "server_error"}})
+            elif body.get("stream"):
+                self._stream(body)
+            else:
+                self._complete(body)
+        finally:
+            stats.end(time.monotonic() - start, error)
+
+    def _complete(self, body):
+        time.sleep(self.config.sample_latency())
+        content = self.config.make_content()
+        self._send_json(
+            200,
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(content), "total_tokens": len(content)},
+            },
+        )
+
+    def _stream(self, body):
+        total = self.config.sample_latency()
+        ttft = min(total, self.config.ttft if self.config.ttft is not None else total * 0.2)
+        content = self.config.make_content()
+        size = max(1, self.config.chunk_chars)
+        pieces = [content[i : i + size] for i in range(0, len(content), size)]
+        interval = (total - ttft) / max(1, len(pieces))
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        time.sleep(ttft)
+        for index, piece in enumerate(pieces):
+            if index:
+                time.sleep(interval)
+            chunk = {
+                "id": chunk_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class LLMStubServer(ThreadingHTTPServer):
+    """
+    用法：
+        server = LLMStubServer(("127.0.0.1", 0), StubConfig(latency=0.5))
+        server.start()
+        ...  # server.base_url -> http://127.0.0.1:<port>/v1
+        server.stop()
+    """
+
+    daemon_threads = True
+    # 压测时并发连接较多，放大监听队列
+    request_queue_size = 256
+
+    def __init__(self, address, config=None):
+        super().__init__(address, StubHandler)
+        self.config = config or StubConfig()
+        self.stats = StubStats()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="llm-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 OpenAI 兼容大模型桩服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=1.0, help="平均响应时间（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="响应时间标准差（秒）")
+    parser.add_argument("--ttft", type=float, default=None, help="流式返回的首 token 延迟（秒，默认为总延迟的 20%%）")
+    parser.add_argument("--chunk-chars", type=int, default=16, help="流式返回每段字符数")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 500 的比例（0-1）")
+    parser.add_argument("--payload", help="返回内容 JSON 文件（不含 score 时随机生成）")
+    args = parser.parse_args()
+
+    payload = None
+    if args.payload:
+        with open(args.payload, encoding="utf-8") as fp:
+            payload = json.load(fp)
+
+    config = StubConfig(args.latency, args.jitter, args.ttft, args.chunk_chars, args.error_rate, payload)
+    server = LLMStubServer((args.host, args.port), config)
+    print(f"LLM 桩服务已启动: {server.base_url}（平均延迟 {args.latency}s，错误率 {args.error_rate:.0%}）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n已停止")
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
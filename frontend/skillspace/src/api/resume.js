@@ -22,4 +22,141 @@ export function diagnoseResume(formData) {
   }).then(res => {
     return res.data
   })
-}
\ No newline at end of file
+}
+/**
+ * 流式简历诊断（SSE over fetch），每个字段 / 列表条目生成完即回调
+ * @param {FormData} formData - 包含 resume_file 和 jd_text
+ * @param {(evt: {type:string, field?:string, index?:number, value?:any, result?:object})=>void} onEvent - 事件回调
+ * @param {AbortSignal} signal - 取消信号
+ */
+export async function diagnoseResumeStream(formData, onEvent = () => {}, signal = undefined) {
+  const response = await fetch('/api/resume/diagnose/stream/', {
+    method: 'POST',
+    body: formData,
+    headers: { 'X-CSRFToken': Cookies.get('csrftoken') },
+    credentials: 'include',
+    signal,
+  })
+  // 参数或文件解析错误时返回普通 JSON
+  if (!response.ok || !(response.headers.get('content-type') || '').includes('text/event-stream')) {
+    const data = await response.json().catch(() => ({}))
+    throw new Error(data.message || `HTTP ${response.status}`)
+  }
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder('utf-8')
+  let buffer = ''
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    const lines = buffer.split('\n')
+    for (let i = 0; i < lines.length - 1; i++) {
+      const line = lines[i].trim()
+      if (line.startsWith('data:')) {
+        const jsonStr = line.slice(5).trim()
+        if (jsonStr) {
+          try {
+            onEvent(JSON.parse(jsonStr))
+          } catch (e) {
+            console.warn('[diagnoseResumeStream] 解析错误:', e, '原始:', jsonStr)
+          }
+        }
+      }
+    }
+    buffer = lines[lines.length - 1]
+  }
+}
+
+/**
+ * 提交异步简历诊断任务（立即返回 job_id，进度通过 ws_url 推送）
+ * @param {FormData} formData - 包含 resume_file 和 jd_text
+ */
+export function diagnoseResumeAsync(formData) {
+  return axios({
+    url: '/api/resume/diagnose/async/',
+    method: 'post',
+    data: formData,
+    withCredentials: true,
+    headers: {
+      'X-CSRFToken': Cookies.get('csrftoken'),
+    }
+  }).then(res => res.data)
+}
+
+/**
+ * 查询异步诊断任务状态 / 结果
+ * @param {string} jobId - 任务ID
+ */
+export function getDiagnosisJob(jobId) {
+  return axios({
+    url: `/api/resume/diagnose/jobs/${jobId}/`,
+    method: 'get',
+    withCredentials: true,
+  }).then(res => res.data)
+}
+
+/**
+ * 提交简历批量筛选（多个简历文件或 zip，对同一 JD 打分排名）
+ * @param {FormData} formData - 包含多个 resume_files 和 jd_text
+ */
+export function screenResumeBatch(formData) {
+  return axios({
+    url: '/api/resume/batch/',
+    method: 'post',
+    data: formData,
+    withCredentials: true,
+    headers: {
+      'X-CSRFToken': Cookies.get('csrftoken'),
+    }
+  }).then(res => res.data)
+}
+
+/**
+ * 查询批量筛选进度与排名表
+ * @param {string} batchId - 批次ID
+ */
+export function getResumeBatch(batchId) {
+  return axios({
+    url: `/api/resume/batch/${batchId}/`,
+    method: 'get',
+    withCredentials: true,
+  }).then(res => res.data)
+}
+
+/**
+ * 查询我的简历列表（游标分页）
+ * @param {Object} params - { limit, cursor, include_text }
+ */
+export function getResumeHistory(params) {
+  return axios({
+    url: '/api/resume/resumes/',
+    method: 'get',
+    params,
+    withCredentials: true,
+  }).then(res => res.data)
+}
+
+/**
+ * 查询我的诊断历史（游标分页）
+ * @param {Object} params - { limit, cursor, min_score, max_score, resume_id, jd_hash, source, batch_id, include }
+ */
+export function getDiagnosisHistory(params) {
+  return axios({
+    url: '/api/resume/diagnoses/',
+    method: 'get',
+    params,
+    withCredentials: true,
+  }).then(res => res.data)
+}
+
+/**
+ * 查询单条诊断详情
+ * @param {number} id - 诊断记录ID
+ */
+export function getDiagnosisDetail(id) {
+  return axios({
+    url: `/api/resume/diagnoses/${id}/`,
+    method: 'get',
+    withCredentials: true,
+  }).then(res => res.data)
+}